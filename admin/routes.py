@@ -22,10 +22,17 @@ from admin.service import (
     test_bots_enabled,
     update_user,
     user_activity,
+    user_balance_statement,
+    user_transactions_page,
     read_backend_logs,
     clear_backend_logs,
 )
 from database import User
+from services.ledger import parse_statement_range
+from services.outbound import outbound
+from services.query_stats import query_stats
+from services.rate_limits import rate_limiter
+from services.read_replica import replica_reads
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin', template_folder='templates')
 
@@ -59,6 +66,7 @@ def login_required_only(f):
 
 @admin_bp.route('/dashboard', methods=['GET'])
 @admin_required
+@replica_reads
 def admin_dashboard():
     return jsonify(dashboard_summary())
 
@@ -70,6 +78,7 @@ def admin():
 
 @admin_bp.route('/users', methods=['GET'])
 @admin_required
+@replica_reads
 def get_users():
     search = request.args.get('search', '').strip()
     return jsonify({'users': list_users(search)})
@@ -93,6 +102,7 @@ def patch_user(user_id):
 
 @admin_bp.route('/users/<int:user_id>/activity', methods=['GET'])
 @admin_required
+@replica_reads
 def user_activity_route(user_id):
     """Full activity for one user: profile + financial ledger + audit trail."""
     try:
@@ -101,6 +111,34 @@ def user_activity_route(user_id):
         return jsonify({'error': str(exc)}), 404
 
 
+@admin_bp.route('/users/<int:user_id>/transactions', methods=['GET'])
+@admin_required
+@replica_reads
+def user_transactions_route(user_id):
+    """Keyset-paged ledger: pass ``next_cursor`` back as ``?cursor=`` for older rows."""
+    try:
+        return jsonify(user_transactions_page(
+            user_id,
+            limit=request.args.get('limit', 200, type=int),
+            cursor=request.args.get('cursor') or None,
+        ))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+
+@admin_bp.route('/users/<int:user_id>/statement', methods=['GET'])
+@admin_required
+@replica_reads
+def user_statement_route(user_id):
+    """Balance statement for ``?start=&end=`` (ISO timestamps; ``end`` defaults to now)."""
+    try:
+        start, end = parse_statement_range(request.args)
+        return jsonify(user_balance_statement(
+            user_id, start, end, request.args.get('balance_type', 'real')))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+
 @admin_bp.route('/users/<int:user_id>/credits', methods=['POST'])
 @admin_required
 def award_user_credits(user_id):
@@ -135,12 +173,14 @@ def adjust_wallet_route(user_id):
 
 @admin_bp.route('/tournaments', methods=['GET'])
 @admin_required
+@replica_reads
 def get_tournaments():
     return jsonify({'tournaments': list_tournaments()})
 
 
 @admin_bp.route('/tournaments/<int:tournament_id>', methods=['GET'])
 @admin_required
+@replica_reads
 def tournament_detail_route(tournament_id):
     return jsonify(get_tournament_detail(tournament_id))
 
@@ -197,8 +237,33 @@ def clear_backend_logs_route():
     return jsonify(clear_backend_logs())
 
 
+@admin_bp.route('/rate-limits', methods=['GET'])
+@admin_required
+def rate_limit_stats():
+    """Socket event allow/reject counts from the per-user token buckets."""
+    return jsonify(rate_limiter.stats())
+
+
+@admin_bp.route('/socket-outbound', methods=['GET'])
+@admin_required
+def socket_outbound_stats():
+    """Frames parked, coalesced and dropped for slow socket clients."""
+    return jsonify(outbound.stats())
+
+
+@admin_bp.route('/query-stats', methods=['GET'])
+@admin_required
+def query_stats_route():
+    """Queries and DB time per route / socket event since start (``?reset=1`` clears)."""
+    stats = query_stats.stats()
+    if request.args.get('reset'):
+        query_stats.reset()
+    return jsonify({'scopes': stats})
+
+
 @admin_bp.route('/audit-logs', methods=['GET'])
 @admin_required
+@replica_reads
 def get_audit_logs():
     try:
         limit = min(int(request.args.get('limit', 100)), 500)
@@ -209,6 +274,7 @@ def get_audit_logs():
 
 @admin_bp.route('/disputes', methods=['GET'])
 @admin_required
+@replica_reads
 def get_disputes():
     status = request.args.get('status', '').strip()
     return jsonify({'disputes': list_disputes(status)})
@@ -14,11 +14,12 @@ from database import (
     AdminAuditLog,
     Dispute,
     WalletAdjustment,
-    Transaction,
     add_tournament_participant,
     create_tournament_record,
     get_player_by_user_id,
 )
+from services.identity_cache import preload_users, username_for
+from services.ledger import ledger
 from sqlalchemy import or_
 
 
@@ -35,10 +36,7 @@ def log_admin_action(admin_user_id, action, entity_type=None, entity_id=None, su
 
 
 def _username(user_id):
-    if not user_id:
-        return None
-    user = User.query.get(user_id)
-    return user.username if user else None
+    return username_for(user_id)
 
 
 def _serialize_user(user):
@@ -267,10 +265,19 @@ def get_tournament_detail(tournament_id):
     tournament = Tournament.query.get_or_404(tournament_id)
     matches = TournamentMatch.query.filter_by(tournament_id=tournament.id).order_by(TournamentMatch.id).all()
     participants = TournamentParticipant.query.filter_by(tournament_id=tournament.id).all()
+    preload_users(
+        [tournament.creator_id]
+        + [p.user_id for p in participants]
+        + [uid for m in matches for uid in (m.player1_id, m.player2_id)]
+    )
+
+    brackets = {
+        b.id: b for b in TournamentBracket.query.filter_by(tournament_id=tournament.id).all()
+    }
 
     fixtures = []
     for match in matches:
-        bracket = TournamentBracket.query.get(match.bracket_id) if match.bracket_id else None
+        bracket = brackets.get(match.bracket_id) if match.bracket_id else None
         fixtures.append({
             'id': match.id,
             'round_name': bracket.round_name if bracket else None,
@@ -327,6 +334,7 @@ def _serialize_audit_log(log):
 
 def list_audit_logs(limit=100):
     logs = AdminAuditLog.query.order_by(AdminAuditLog.created_at.desc()).limit(limit).all()
+    preload_users(log.admin_user_id for log in logs)
     return [_serialize_audit_log(log) for log in logs]
 
 
@@ -350,14 +358,26 @@ def _serialize_transaction(tx):
     }
 
 
-def list_user_transactions(user_id, limit=200):
-    """All wallet transactions for a user (via their player row)."""
+def list_user_transactions(user_id, limit=200, cursor=None):
+    """One page of a user's wallet transactions (via their player row), newest first."""
+    return user_transactions_page(user_id, limit=limit, cursor=cursor)['transactions']
+
+
+def user_transactions_page(user_id, limit=200, cursor=None):
+    """Keyset page of a user's ledger plus the cursor for the next page."""
+    player = get_player_by_user_id(user_id)
+    if player is None:
+        return {'transactions': [], 'next_cursor': None}
+    txs, next_cursor = ledger.page(player.id, limit=limit, cursor=cursor)
+    return {'transactions': [_serialize_transaction(tx) for tx in txs], 'next_cursor': next_cursor}
+
+
+def user_balance_statement(user_id, start, end, balance_type='real'):
+    """Opening/closing balance and ledger rows for one user over ``[start, end]``."""
     player = get_player_by_user_id(user_id)
     if player is None:
-        return []
-    txs = Transaction.query.filter_by(player_id=player.id)\
-        .order_by(Transaction.id.desc()).limit(limit).all()
-    return [_serialize_transaction(tx) for tx in txs]
+        raise ValueError('Player not found')
+    return ledger.statement(player.id, start, end, balance_type)
 
 
 def list_user_audit_logs(user_id, limit=200):
@@ -368,6 +388,7 @@ def list_user_audit_logs(user_id, limit=200):
             (AdminAuditLog.entity_type == 'wallet') & (AdminAuditLog.entity_id == user_id),
         )
     ).order_by(AdminAuditLog.created_at.desc()).limit(limit).all()
+    preload_users(log.admin_user_id for log in logs)
     return [_serialize_audit_log(log) for log in logs]
 
 
@@ -376,9 +397,11 @@ def user_activity(user_id):
     user = User.query.get(user_id)
     if user is None:
         raise ValueError('User not found')
+    ledger_page = user_transactions_page(user_id)
     return {
         'user': _serialize_user(user),
-        'transactions': list_user_transactions(user_id),
+        'transactions': ledger_page['transactions'],
+        'transactions_next_cursor': ledger_page['next_cursor'],
         'audit_logs': list_user_audit_logs(user_id),
     }
 
@@ -540,7 +563,9 @@ def list_disputes(status=''):
     query = Dispute.query.order_by(Dispute.created_at.desc())
     if status:
         query = query.filter_by(status=status)
-    return [_serialize_dispute(dispute) for dispute in query.all()]
+    disputes = query.all()
+    preload_users(uid for d in disputes for uid in (d.user_id, d.resolved_by))
+    return [_serialize_dispute(dispute) for dispute in disputes]
 
 
 def resolve_dispute(dispute_id, admin_user_id, status='resolved', resolution=None):
@@ -1,13 +1,3 @@
-try:
-    # Optional: if running under gevent, patch the stdlib to be cooperative.
-    # Doing this before other imports is safest. Wrapped in try/except so
-    # the app still runs when gevent isn't installed locally.
-    from gevent import monkey
-    monkey.patch_all()
-    print("[APP] gevent monkey patched")
-except Exception:
-    pass
-
 # Load environment variables from the .env file (python-dotenv). This must run
 # before any module reads os.environ (e.g. config.PaymentConfig).
 #
@@ -28,6 +18,25 @@ try:
 except Exception:
     pass
 
+# Cooperative Socket.IO runtimes (see config.SocketIOConfig) need the stdlib
+# patched before anything else opens sockets or starts threads. Falls back to
+# threading when the configured runtime isn't installed locally.
+from config import SocketIOConfig
+
+SOCKETIO_ASYNC_MODE = SocketIOConfig.SOCKETIO_ASYNC_MODE
+if SOCKETIO_ASYNC_MODE in SocketIOConfig.COOPERATIVE_MODES:
+    try:
+        if SOCKETIO_ASYNC_MODE == 'gevent':
+            from gevent import monkey
+            monkey.patch_all()
+        else:
+            import eventlet
+            eventlet.monkey_patch()
+        print(f"[APP] {SOCKETIO_ASYNC_MODE} monkey patched")
+    except ImportError:
+        print(f"[APP] {SOCKETIO_ASYNC_MODE} is not installed - falling back to threading")
+        SOCKETIO_ASYNC_MODE = 'threading'
+
 from flask import Flask, render_template, request, jsonify, session
 from flask_socketio import SocketIO
 from game.manager_redis import GameManager
@@ -40,10 +49,10 @@ from user.routes import user_bp
 from Forms import  *
 from database import db, init_db, Tournament, User
 from database import Player
+from services.read_replica import replica_reads
 from werkzeug.middleware.proxy_fix import ProxyFix
 from jinja2 import ChoiceLoader, FileSystemLoader
-from config import PaymentConfig, LogConfig
-import os
+from config import PaymentConfig, LogConfig, ArchiveConfig
 
 app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1,x_proto=1)
@@ -65,6 +74,7 @@ app.config['TOURNAMENT_TEST_BOTS_ENABLED'] = os.environ.get(
 
 app.config.from_object(PaymentConfig)
 app.config.from_object(LogConfig)
+app.config.from_object(ArchiveConfig)
 
 # -----------------------------
 # BACKEND PRINT LOG CAPTURE
@@ -93,23 +103,23 @@ else:
 # SOCKETIO INITIALIZATION
 # -----------------------------
 
-# local should use threading async mode (polling transport — the Werkzeug dev
-# server cannot upgrade websockets with the threading driver)
-if os.environ.get("ENV") == "development":
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
-    app.config['SOCKET_TRANSPORTS'] = ['websocket', 'polling']
-else:
-    socketio = SocketIO(
-        app,
-        cors_allowed_origins="*",
-        async_mode="gevent",
-        message_queue="redis://127.0.0.1:6379/0",  # hardcoded Redis
-        logger=True,
-        engineio_logger=True
-    )
-    app.config['SOCKET_TRANSPORTS'] = ['websocket', 'polling']
-
-# socketio = SocketIO(app, cors_allowed_origins="*",async_mode='threading')
+# Server driver and message queue come from config.SocketIOConfig. Locally
+# (ENV=development) that is threading mode without a queue -- the Werkzeug dev
+# server cannot upgrade websockets with the threading driver, so clients fall
+# back to polling.
+app.config.from_object(SocketIOConfig)
+_socketio_options = {
+    'cors_allowed_origins': "*",
+    'async_mode': SOCKETIO_ASYNC_MODE,
+    'logger': SocketIOConfig.SOCKETIO_LOGGER,
+    'engineio_logger': SocketIOConfig.SOCKETIO_LOGGER,
+}
+if SocketIOConfig.SOCKETIO_MESSAGE_QUEUE:
+    _socketio_options['message_queue'] = SocketIOConfig.SOCKETIO_MESSAGE_QUEUE
+socketio = SocketIO(app, **_socketio_options)
+app.config['SOCKET_TRANSPORTS'] = ['websocket', 'polling']
+print(f"[APP] Socket.IO async_mode={socketio.async_mode}, "
+      f"message_queue={SocketIOConfig.SOCKETIO_MESSAGE_QUEUE or 'none'}")
 
 # -----------------------------
 # DATABASE INITIALIZATION
@@ -148,34 +158,119 @@ app.extensions['game_manager'] = manager
 # -----------------------------
 
 from controllers.multiplayer_controller import init_multiplayer_events
+from services.room_actor import room_actors
+
+# Serialise each room's mutations across workers too when Redis is available
+# (the in-process per-room mailbox always applies).
+room_actors.configure(redis_client=manager.redis_client if manager.use_redis else None)
 init_multiplayer_events(socketio, manager, app)
 init_tournament_events(socketio, app)
 
+# Count queries per socket event too (HTTP requests are covered by init_db)
+from services.query_stats import query_stats
+query_stats.instrument_socketio(socketio)
+
 # -----------------------------
 # BACKGROUND SCHEDULER
-# (fires scheduled tournament starts + resolves no-show roll deadlines)
+# (fires scheduled tournament starts + resolves no-show roll deadlines,
+#  abandons stale rooms; AFK turn timeouts fire from the turn timer wheel,
+#  this only reconciles it)
 # -----------------------------
 
+# Re-arm room turn timers from the DB every N scheduler ticks (20s each).
+TURN_TIMER_RECONCILE_TICKS = 15
+
+# Abandon stale waiting/paused rooms every N scheduler ticks.
+ROOM_SWEEP_TICKS = 3
+
+# Snapshot changed wallet balances (services/ledger.py) every N ticks (~hourly).
+BALANCE_CHECKPOINT_TICKS = 180
+
+# Move old finished games to cold storage (services/game_archive.py) every N
+# ticks (~hourly), a few batches at a time so a backlog drains gradually.
+GAME_ARCHIVE_TICKS = 180
+GAME_ARCHIVE_MAX_BATCHES = 5
+
+# Recount running tournaments' participant counters
+# (services/tournament_counters.py) every N ticks (~hourly) and fix drift.
+TOURNAMENT_COUNTER_CHECK_TICKS = 180
+
 def start_background_scheduler(app, socketio):
-    import threading
-    import time
+    from services.turn_timers import turn_timers
+    from services.leader_lease import LeaderLease
+
+    # socketio.start_background_task / socketio.sleep map to real threads in
+    # threading mode and to green threads under gevent/eventlet.
+    turn_timers.start(socketio.start_background_task, socketio.sleep)
+
+    # Every worker runs this thread; only the lease holder runs the sweeps.
+    # The lease outlives a couple of missed ticks before another worker
+    # takes over.
+    lease = LeaderLease('scheduler', ttl_seconds=60,
+                        redis_client=manager.redis_client if manager.use_redis else None)
+
+    def _tick(tick):
+        """One scheduler pass (the caller holds the lease and an app context)."""
+        try:
+            from controllers.tournament_controller import process_scheduled_events
+            process_scheduled_events()
+        except Exception as exc:
+            print(f'[SCHEDULER] error: {exc}')
+        if tick % TURN_TIMER_RECONCILE_TICKS == 0:
+            try:
+                from controllers.multiplayer_controller import reconcile_turn_timers
+                armed = reconcile_turn_timers()
+                if armed:
+                    print(f'[SCHEDULER] Re-armed {armed} room turn timer(s)')
+            except Exception as exc:
+                print(f'[SCHEDULER] turn timer reconcile error: {exc}')
+                db.session.rollback()
+        if tick % ROOM_SWEEP_TICKS == 0:
+            try:
+                from controllers.multiplayer_controller import sweep_stale_rooms
+                swept = sweep_stale_rooms()
+                if swept:
+                    print(f'[SCHEDULER] Abandoned {swept} stale room(s)')
+            except Exception as exc:
+                print(f'[SCHEDULER] room sweep error: {exc}')
+                db.session.rollback()
+        if tick % BALANCE_CHECKPOINT_TICKS == 0:
+            try:
+                from services.ledger import ledger
+                written = ledger.checkpoint()
+                if written:
+                    print(f'[SCHEDULER] Checkpointed {written} wallet balance(s)')
+            except Exception as exc:
+                print(f'[SCHEDULER] balance checkpoint error: {exc}')
+                db.session.rollback()
+        if tick % GAME_ARCHIVE_TICKS == 0:
+            try:
+                from services.game_archive import game_archive
+                game_archive.archive(max_batches=GAME_ARCHIVE_MAX_BATCHES)
+            except Exception as exc:
+                print(f'[SCHEDULER] game archive error: {exc}')
+                db.session.rollback()
+        if tick % TOURNAMENT_COUNTER_CHECK_TICKS == 0:
+            try:
+                from services.tournament_counters import tournament_counters, ACTIVE_STATUSES
+                tournament_counters.check(repair=True, statuses=ACTIVE_STATUSES)
+            except Exception as exc:
+                print(f'[SCHEDULER] tournament counter check error: {exc}')
+                db.session.rollback()
 
     def _run():
-        with app.app_context():
-            while True:
-                try:
-                    from controllers.tournament_controller import process_scheduled_events
-                    process_scheduled_events()
-                except Exception as exc:
-                    print(f'[SCHEDULER] error: {exc}')
-                try:
-                    from controllers.multiplayer_controller import process_expired_room_turns
-                    process_expired_room_turns(socketio, manager)
-                except Exception as exc:
-                    print(f'[SCHEDULER] multiplayer turn sweep error: {exc}')
-                time.sleep(20)
-
-    threading.Thread(target=_run, daemon=True).start()
+        tick = 0
+        while True:
+            # A fresh app context per tick, so per-context state (flask.g's
+            # identity cache, the scoped db session) does not outlive it
+            with app.app_context():
+                held = lease.acquire_or_renew()
+                if held:
+                    _tick(tick)
+            tick = tick + 1 if held else 0
+            socketio.sleep(20)
+
+    socketio.start_background_task(_run)
     print('[APP] Background scheduler started')
 
 
@@ -328,6 +423,22 @@ def spectator_tournament_bracket_page(tournament_id):
     return render_template("spectator_tournament_bracket.html")
 
 
+@app.route("/spectators/rooms/<room_code>")
+def spectator_room_page(room_code):
+    return render_template("spectator_room.html", room_code=room_code)
+
+
+@app.route("/spectators/matches/<int:match_id>")
+@replica_reads
+def spectator_match_page(match_id):
+    from database import TournamentMatch, GameRoom
+    match = TournamentMatch.query.get_or_404(match_id)
+    room = GameRoom.query.get(match.game_room_id) if match.game_room_id else None
+    if room is None:
+        return render_template("spectator_room.html", room_code=None)
+    return render_template("spectator_room.html", room_code=room.room_code)
+
+
 # -----------------------------
 # PAYMENT CALLBACK (MojaPOS)
 # -----------------------------
@@ -534,7 +645,8 @@ def _handle_entry_fee_callback(payload, data, transaction, status):
             participant.external_payment_id = transaction.external_ref_id
             participant.status = 'registered'
 
-            tournament.current_player_count += 1
+            from services.tournament_counters import tournament_counters
+            tournament.current_player_count = tournament_counters.counts(tournament)[0]
             tournament.prize_pool_amount += tournament.entry_fee
 
             from controllers.tournament_controller import (
@@ -883,6 +995,26 @@ def rule8_crash(game_id):
     return result
 
 
+@app.route("/api/game/<game_id>/replay")
+def game_replay(game_id):
+    """Finished game's move history, from the live tables or cold storage."""
+    from services.game_archive import game_archive
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    record = game_archive.load(game_id=game_id)
+    if record is None:
+        return jsonify({'error': 'Game not found'}), 404
+    room = record['room']
+    if room['status'] not in ('completed', 'abandoned'):
+        return jsonify({'error': 'Game is still in progress'}), 409
+    if user_id not in (room['player1_id'], room['player2_id']):
+        user = User.query.get(user_id)
+        if not user or not (user.is_admin or user.is_super_admin):
+            return jsonify({'error': 'Not a player in this game'}), 403
+    return jsonify(record)
+
+
 @app.route("/api/game/<game_id>/leaderboard")
 def leaderboard(game_id):
     engine = manager.get_game(game_id)
@@ -57,9 +57,56 @@ class GameConfig:
 
 
 class DatabaseConfig:
-    """Database configuration"""
+    """Database configuration.
+
+    DATABASE_URL picks the engine; the default is the local SQLite file.
+      - SQLite: every new connection gets the SQLITE_* pragmas below (WAL so
+        readers never block the writer, synchronous=NORMAL, a busy timeout
+        instead of instant "database is locked", mmap and a page cache).
+      - Server databases (PostgreSQL/MySQL URLs): a QueuePool of
+        DB_POOL_SIZE (+ DB_MAX_OVERFLOW) connections, recycled after
+        DB_POOL_RECYCLE seconds and pinged before use.
+    """
     DATABASE_PATH = 'dealuxe_game.db'
-    ECHO_SQL = False  # Set to True for debugging
+    DATABASE_URL = os.environ.get('DATABASE_URL', f'sqlite:///{DATABASE_PATH}')
+    ECHO_SQL = os.environ.get('ECHO_SQL', 'false').lower() in ('1', 'true', 'yes', 'on')
+
+    # Apply pending migrations/ inside init_db. Only sensible for a single
+    # local process; deployments run "python -m migrations upgrade" instead.
+    AUTO_MIGRATE = os.environ.get(
+        'DB_AUTO_MIGRATE', 'true' if os.environ.get('ENV') == 'development' else 'false'
+    ).lower() in ('1', 'true', 'yes', 'on')
+
+    # Server-database pooling
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+
+    # SQLite pragmas, applied per connection
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', str(64 * 1024)))
+
+    # Query instrumentation (services/query_stats.py): per-request/per-event
+    # query counts, a [SLOW SQL] log line past SLOW_QUERY_MS, a [QUERIES]
+    # warning past QUERY_COUNT_WARN statements, and an X-DB-Queries response
+    # header when QUERY_STATS_HEADER is on.
+    QUERY_STATS_ENABLED = os.environ.get('QUERY_STATS_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+    QUERY_COUNT_WARN = int(os.environ.get('QUERY_COUNT_WARN', '50'))
+    QUERY_STATS_HEADER = os.environ.get(
+        'QUERY_STATS_HEADER', 'true' if os.environ.get('ENV') == 'development' else 'false'
+    ).lower() in ('1', 'true', 'yes', 'on')
+
+    # Read replica (services/read_replica.py): SELECTs of views and socket
+    # handlers marked @replica_reads go to DATABASE_REPLICA_URL. A user who
+    # just wrote reads from the primary for REPLICA_STICKY_SECONDS; keep it
+    # above the replica's worst lag.
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL') or None
+    REPLICA_STICKY_SECONDS = float(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
 
 
 class PaymentConfig:
@@ -105,6 +152,73 @@ class PaymentConfig:
     )
 
 
+class SocketIOConfig:
+    """Socket.IO server runtime.
+
+    SOCKETIO_ASYNC_MODE picks the server driver:
+      - 'threading' -- one OS thread per connected client. Needed by the
+        Werkzeug dev server, so it is the default when ENV=development.
+      - 'gevent' / 'eventlet' -- cooperative green threads; thousands of
+        clients share one OS thread. app.py monkey-patches the stdlib for
+        these before anything else is imported, so blocking socket, Redis and
+        sleep calls in the handlers yield instead of stalling the worker.
+
+    SOCKETIO_MESSAGE_QUEUE lets several workers broadcast to each other's
+    clients; set it to 'none' for a single worker.
+    """
+    _DEVELOPMENT = os.environ.get('ENV') == 'development'
+
+    SOCKETIO_ASYNC_MODE = os.environ.get(
+        'SOCKETIO_ASYNC_MODE', 'threading' if _DEVELOPMENT else 'gevent'
+    ).lower()
+
+    _queue = os.environ.get(
+        'SOCKETIO_MESSAGE_QUEUE', '' if _DEVELOPMENT else 'redis://127.0.0.1:6379/0'
+    )
+    SOCKETIO_MESSAGE_QUEUE = None if _queue.lower() in ('', 'none', 'off') else _queue
+
+    # Verbose Socket.IO / Engine.IO logging (on by default outside development).
+    SOCKETIO_LOGGER = os.environ.get(
+        'SOCKETIO_LOGGER', 'false' if _DEVELOPMENT else 'true'
+    ).lower() in ('1', 'true', 'yes', 'on')
+
+    # Runtimes whose stdlib must be monkey-patched at startup.
+    COOPERATIVE_MODES = ('gevent', 'eventlet')
+
+    # Live room spectating: at most this many spectator_update broadcasts per
+    # room per second; moves arriving faster are coalesced into the latest.
+    SPECTATOR_MAX_UPDATES_PER_SECOND = float(
+        os.environ.get('SPECTATOR_MAX_UPDATES_PER_SECOND', '2')
+    )
+
+    # Per-user token buckets on socket events (services/rate_limits.py).
+    # SOCKET_RATE_LIMITS overrides individual events, e.g.
+    # "game_action=8/2,get_lobby=5/5" (burst of N, refilled over S seconds).
+    SOCKET_RATE_LIMIT_ENABLED = os.environ.get(
+        'SOCKET_RATE_LIMIT_ENABLED', 'true'
+    ).lower() in ('1', 'true', 'yes', 'on')
+    SOCKET_RATE_LIMITS = os.environ.get('SOCKET_RATE_LIMITS', '')
+
+    # Outbound backpressure (services/outbound.py): a client with more than
+    # OUTBOUND_MAX_BACKLOG engine.io packets still unsent counts as slow and
+    # gets broadcasts parked, coalesced per topic, at most
+    # OUTBOUND_MAX_PENDING per client (oldest dropped first).
+    OUTBOUND_MAX_BACKLOG = int(os.environ.get('OUTBOUND_MAX_BACKLOG', '64'))
+    OUTBOUND_MAX_PENDING = int(os.environ.get('OUTBOUND_MAX_PENDING', '32'))
+
+
+class ArchiveConfig:
+    """Cold storage for finished games (services/game_archive.py).
+
+    Completed and abandoned rooms older than GAME_ARCHIVE_AFTER_DAYS move,
+    with their bet session and moves, into one gzip file per day under
+    GAME_ARCHIVE_DIR (default: <instance>/archive).
+    """
+    GAME_ARCHIVE_DIR = os.environ.get('GAME_ARCHIVE_DIR') or None
+    GAME_ARCHIVE_AFTER_DAYS = int(os.environ.get('GAME_ARCHIVE_AFTER_DAYS', '30'))
+    GAME_ARCHIVE_BATCH_SIZE = int(os.environ.get('GAME_ARCHIVE_BATCH_SIZE', '200'))
+
+
 class LogConfig:
     """Backend print-log capture settings (viewable in the admin dashboard)."""
     LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
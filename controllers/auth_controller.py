@@ -10,6 +10,8 @@ from database import (
 from Forms import LoginForm, RegistrationForm
 from functools import wraps
 
+from services.read_replica import replica_reads
+
 auth_bp = Blueprint('auth', __name__)
 
 
@@ -360,25 +362,27 @@ def deposit():
 
 
 @auth_bp.route('/leaderboard', methods=['GET'])
+@replica_reads
 def leaderboard():
     """Get leaderboard (top players)"""
-    from database import Leaderboard
-    
-    limit = request.args.get('limit', 10, type=int)
-    top_players = Leaderboard.get_top_players(limit=limit)
-    
-    result = []
-    for rank, (player_id, username, total_games, wins, total_winnings, win_rate) in enumerate(top_players, 1):
-        result.append({
-            'rank': rank,
-            'username': username,
-            'total_games': total_games,
-            'wins': wins,
-            'total_winnings': total_winnings,
-            'win_rate': round(win_rate, 2) if win_rate else 0.0
-        })
-    
-    return jsonify({'leaderboard': result})
+    from services.leaderboard import leaderboard as board
+    
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify({'leaderboard': board.top(limit)})
+
+
+@auth_bp.route('/leaderboard/me', methods=['GET'])
+@login_required
+def my_leaderboard_position():
+    """Current player's rank plus the players just above and below"""
+    from services.leaderboard import leaderboard as board
+    
+    radius = max(0, min(request.args.get('radius', 5, type=int), 25))
+    user_id = session['user_id']
+    return jsonify({
+        'rank': board.rank(user_id),
+        'neighbors': board.around(user_id, radius),
+    })
 
 
 # ============================================================
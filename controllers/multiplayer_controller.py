@@ -5,27 +5,53 @@ Handles real-time 2-player games, room management, and turn-based gameplay
 from flask import session, request
 from flask_socketio import emit, join_room, leave_room, rooms
 from datetime import datetime, timedelta
-from database import db, GameRoom, User, BetSession, Player, get_player_by_user_id, Move
+from database import db, GameRoom, User, BetSession, Player, Transaction, get_player_by_user_id, Move, TX_BET, TX_WIN
 import json
 # NOTE: no `from game.manager import GameManager` here -- that import was
 # unused (this file always receives its live GameManager instance, built
 # from game.manager_redis, as the `game_manager` parameter). See the
 # deprecation banner at the top of game/manager.py for details.
 from controllers.flask_controller import FlaskGameController
-import random
-import string
-
-
-# In-memory room cache for fast access
-active_rooms = {}  # room_code -> {game_manager_ref, player_sockets, etc.}
-
-
-def generate_room_code():
-    """Generate unique 6-character room code"""
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        if not GameRoom.query.filter_by(room_code=code).first():
-            return code
+from services.room_actor import RoomBusy, room_actors, serialized_by_room
+from services.turn_timers import turn_timers
+from services.lobby_cache import lobby_cache
+from services.identity_cache import preload_users
+from services.presence import presence
+from services.leaderboard import leaderboard
+from services.room_codes import room_codes
+from services.room_registry import room_registry
+from services.spectators import spectator_feed, spectator_room, public_state
+from services import wire_codec
+from services.outbound import outbound
+from services.rate_limits import rate_limiter, rate_limited, parse_limits
+from services.wallet import wallet
+from services.read_replica import read_replica, replica_reads
+import time
+
+
+# How long past turn_deadline an absent player gets before their turn is
+# auto-played (late moves that DO arrive are always accepted as submitted).
+AFK_GRACE_SECONDS = 60
+
+# Seconds between both players being seated and game_started.
+GAME_START_COUNTDOWN_SECONDS = 3
+
+# How long a player must stay offline (no live connection) before their seat
+# is marked disconnected in the DB and the opponent is told. Reconnects inside
+# the window - flaky mobile networks, page reloads - cost no DB writes at all.
+OFFLINE_GRACE_SECONDS = 15
+
+# Waiting rooms nobody joined, and paused casual games nobody resumed, are
+# abandoned by sweep_stale_rooms() once they are this old.
+WAITING_ROOM_MAX_AGE_HOURS = 5
+PAUSED_ROOM_MAX_AGE_HOURS = 24
+
+# Engines built while a room counts down: room_code -> game_id.
+_prepared_games = {}
+
+# Set by init_multiplayer_events so turn-timer callbacks (which fire on the
+# timer wheel's thread) can reach the app, socketio and game manager.
+_timer_context = {}
 
 
 def handle_game_over(room, state, socketio):
@@ -49,22 +75,33 @@ def handle_game_over(room, state, socketio):
             # Award prize pool to winner
             winner_player_db = get_player_by_user_id(winner_id)
             loser_player_db = get_player_by_user_id(loser_id)
+            # One settlement: winner's credit, both results and the ledger row
+            # are conditional UPDATEs committed together below.
+            credits = []
+            results = {}
             if winner_player_db:
                 winnings_awarded = float(bet_session.prize_pool or 0)
-                winner_player_db.award_winnings(winnings_awarded, bet_session.bet_type)
-                winner_player_db.record_game_result(won=True)
-                new_balances[winner_id] = {
-                    'real': winner_player_db.real_balance,
-                    'fake': winner_player_db.fake_balance,
-                    'fake_expires_at': winner_player_db.fake_balance_expires_at.isoformat() if winner_player_db.fake_balance_expires_at else None
-                }
+                credits.append({
+                    'player_id': winner_player_db.id,
+                    'amount': winnings_awarded,
+                    'balance_type': bet_session.bet_type,
+                    'transaction_type': TX_WIN,
+                    'session_id': bet_session.id,
+                    'game_id': bet_session.game_id,
+                    'description': f'Versus win in room {room.room_code}',
+                })
+                results[winner_player_db.id] = True
             if loser_player_db:
-                loser_player_db.record_game_result(won=False)
-                new_balances[loser_id] = {
-                    'real': loser_player_db.real_balance,
-                    'fake': loser_player_db.fake_balance,
-                    'fake_expires_at': loser_player_db.fake_balance_expires_at.isoformat() if loser_player_db.fake_balance_expires_at else None
-                }
+                results[loser_player_db.id] = False
+            wallet.settle(credits=credits, results=results)
+
+            for user_id, player_db in ((winner_id, winner_player_db), (loser_id, loser_player_db)):
+                if player_db:
+                    new_balances[user_id] = {
+                        'real': player_db.real_balance,
+                        'fake': player_db.fake_balance,
+                        'fake_expires_at': player_db.fake_balance_expires_at.isoformat() if player_db.fake_balance_expires_at else None
+                    }
 
             bet_session.status = 'completed'
             # Same FK mismatch as above: bet_session.winner_id -> players.id,
@@ -129,9 +166,15 @@ def handle_game_over(room, state, socketio):
                 'tournaments_url': '/tournaments',
             }
 
-    # Remove from active rooms
-    if room.room_code in active_rooms:
-        del active_rooms[room.room_code]
+    # Spectators always get the final position, then the feed is closed
+    spectator_feed.publish(room.room_code, public_state(state, room), final=True)
+    spectator_feed.close(room.room_code)
+
+    # Remove from the live room registry (for every worker)
+    room_registry.discard(room.room_code)
+    room_actors.discard(room.room_code)
+    turn_timers.cancel(room.room_code)
+    presence.clear_room(room.room_code)
 
     print(f"[MULTIPLAYER] Game completed in room {room.room_code}, winner: {winner_id}")
 
@@ -167,6 +210,37 @@ def handle_game_over(room, state, socketio):
 
 def init_multiplayer_events(socketio, game_manager, app=None):
     """Initialize all SocketIO event handlers"""
+    _timer_context.update(app=app, socketio=socketio, game_manager=game_manager)
+
+    def _publish_lobby_delta(added, removed):
+        outbound.send('lobby_delta', {'added': added, 'removed': removed}, socketio=socketio)
+
+    outbound.configure(
+        socketio=socketio,
+        max_pending=app.config.get('OUTBOUND_MAX_PENDING') if app else None,
+        max_backlog=app.config.get('OUTBOUND_MAX_BACKLOG') if app else None,
+    )
+
+    shared_redis = game_manager.redis_client if getattr(game_manager, 'use_redis', False) else None
+    room_codes.configure(redis_client=shared_redis)
+    room_registry.configure(redis_client=shared_redis)
+    spectator_feed.configure(
+        emit=lambda event, payload, room: wire_codec.emit_encoded(socketio, event, payload, room, topic=room),
+        max_per_second=app.config.get('SPECTATOR_MAX_UPDATES_PER_SECOND') if app else None,
+    )
+    lobby_cache.configure(
+        redis_client=shared_redis,
+        loader=_load_lobby_rooms,
+        publisher=_publish_lobby_delta,
+    )
+    presence.configure(redis_client=shared_redis)
+    leaderboard.configure(redis_client=shared_redis)
+    read_replica.configure(redis_client=shared_redis)
+    rate_limiter.configure(
+        redis_client=shared_redis,
+        limits=parse_limits(app.config.get('SOCKET_RATE_LIMITS')) if app else None,
+        enabled=app.config.get('SOCKET_RATE_LIMIT_ENABLED') if app else None,
+    )
 
     def run_tournament_test_bot_if_needed(room, engine):
         """Let reserved local-test bot accounts take their turn.
@@ -199,7 +273,11 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         user_id = session.get('user_id')
         if user_id:
             print(f"[MULTIPLAYER] User {user_id} connected - SID: {request.sid}")
+            presence.connect(user_id, request.sid)
+            # Back inside the grace window: nothing was persisted, nothing to undo
+            turn_timers.cancel(_offline_timer_key(user_id))
             join_room(f"user_{user_id}")
+            wire_codec.join_encoded(f"user_{user_id}")
             emit('connected', {'user_id': user_id, 'authenticated': True})
         else:
             print(f"[MULTIPLAYER] Guest user connected - SID: {request.sid}")
@@ -212,63 +290,50 @@ def init_multiplayer_events(socketio, game_manager, app=None):
     @socketio.on('disconnect')
     def handle_disconnect():
         """Handle client disconnection"""
+        outbound.forget(request.sid)
         user_id = session.get('user_id')
         if not user_id:
             return
         
         print(f"[MULTIPLAYER] User {user_id} disconnected - SID: {request.sid}")
         
-        # Update last seen for all rooms user is in
-        rooms_to_check = GameRoom.query.filter(
-            db.or_(
-                GameRoom.player1_id == user_id,
-                GameRoom.player2_id == user_id
-            ),
-            GameRoom.status.in_(['in_progress', 'paused'])
-        ).all()
+        # Other tabs/devices still connected: the user never went offline
+        if not presence.disconnect(user_id, request.sid):
+            return
         
-        for room in rooms_to_check:
-            if room.player1_id == user_id:
-                room.player1_connected = False
-                room.player1_last_seen = datetime.utcnow()
-            elif room.player2_id == user_id:
-                room.player2_connected = False
-                room.player2_last_seen = datetime.utcnow()
-            
-            db.session.commit()
-            
-            # Notify opponent
-            opponent_id = room.get_opponent_id(user_id)
-            if opponent_id:
-                socketio.emit('opponent_disconnected', {
-                    'room_code': room.room_code,
-                    'reconnection_window': 120  # 2 minutes
-                }, room=f"user_{opponent_id}")
+        # Seats are only marked disconnected if the user stays away
+        turn_timers.schedule(_offline_timer_key(user_id),
+                             time.time() + OFFLINE_GRACE_SECONDS,
+                             _on_offline_grace_elapsed)
+    
+    
+    @socketio.on('set_encoding')
+    @rate_limited('set_encoding')
+    def handle_set_encoding(data=None):
+        """Opt this connection into the compact wire encoding (or back to JSON)"""
+        encoding = wire_codec.set_encoding((data or {}).get('encoding'))
+        if encoding == wire_codec.ENCODING_COMPACT:
+            emit('encoding_set', wire_codec.tables())
+        else:
+            emit('encoding_set', {'encoding': encoding})
+    
+    
+    @socketio.on('presence_heartbeat')
+    @rate_limited('presence_heartbeat')
+    def handle_presence_heartbeat(data=None):
+        """Keep this connection counted as online"""
+        user_id = session.get('user_id')
+        if user_id:
+            presence.heartbeat(user_id, request.sid)
     
     
     @socketio.on('get_lobby')
+    @rate_limited('get_lobby')
+    @replica_reads
     def handle_get_lobby():
         """Get list of available rooms - public access allowed"""
-        from datetime import timedelta
         user_id = session.get('user_id')
         
-        # Get waiting rooms created in last 5 hours (available to everyone)
-        five_hours_ago = datetime.utcnow() - timedelta(hours=5)
-        waiting_rooms = GameRoom.query.filter(
-            GameRoom.status == 'waiting',
-            GameRoom.created_at >= five_hours_ago
-        ).order_by(GameRoom.created_at.desc()).limit(20).all()
-        
-        # Clean up expired rooms (older than 5 hours)
-        expired_rooms = GameRoom.query.filter(
-            GameRoom.status == 'waiting',
-            GameRoom.created_at < five_hours_ago
-        ).all()
-        for room in expired_rooms:
-            room.status = 'abandoned'
-        if expired_rooms:
-            db.session.commit()
-        
         # Get user's active rooms (only if logged in)
         my_active_rooms = []
         if user_id:
@@ -280,13 +345,21 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                 GameRoom.status.in_(['in_progress', 'paused'])
             ).all()
         
-        emit('lobby_data', {
-            'available_rooms': [r.to_dict() for r in waiting_rooms],
+        # Waiting rooms (available to everyone) come from the cached snapshot;
+        # only the creators' online flags are live.
+        available_rooms = lobby_cache.rooms()
+        online = presence.online_users(r['player1_id'] for r in available_rooms)
+        for r in available_rooms:
+            r['creator_online'] = r['player1_id'] in online
+        preload_users(uid for r in my_active_rooms for uid in (r.player1_id, r.player2_id))
+        wire_codec.reply_encoded('lobby_data', {
+            'available_rooms': available_rooms,
             'my_active_rooms': [r.to_dict() for r in my_active_rooms]
         })
     
     
     @socketio.on('create_room')
+    @rate_limited('create_room')
     def handle_create_room(data):
         """Create a new game room"""
         print("Create a new game room")
@@ -314,10 +387,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             emit('error', {'message': f'Insufficient {bet_type} balance. You have {player.fake_balance if bet_type == "fake" else player.real_balance}'})
             return
         
-        # Create room
-        room_code = generate_room_code()
+        # Create room (the code is assigned on insert)
         new_room = GameRoom(
-            room_code=room_code,
             player1_id=user_id,
             card_count=card_count,
             bet_amount=bet_amount,
@@ -327,8 +398,10 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             player1_last_seen=datetime.utcnow()
         )
         
-        db.session.add(new_room)
+        room_codes.insert_room(new_room)
         db.session.commit()
+        room_code = new_room.room_code
+        presence.enter_room(room_code, user_id)
         
         # Join SocketIO room
         join_room(room_code)
@@ -341,11 +414,13 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             'message': 'Waiting for opponent...'
         })
         
-        # Broadcast to lobby (use to=None instead of broadcast=True)
-        socketio.emit('lobby_updated', {}, to=None)
+        # Lobby viewers get it in the next debounced lobby_delta
+        lobby_cache.upsert(new_room.to_dict())
     
 
     @socketio.on('join_room')
+    @rate_limited('join_room')
+    @serialized_by_room
     def handle_join_room(data):
         """Join an existing room"""
         user_id = session.get('user_id')
@@ -387,6 +462,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         room.player2_connected = True
         room.player2_last_seen = datetime.utcnow()
         db.session.commit()
+        lobby_cache.remove(room_code)
+        presence.enter_room(room_code, user_id)
 
         # If this is a tournament match room, cancel any active no-show roll
         # (the opponent has now joined).
@@ -423,145 +500,220 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             'opponent_username': player1_user.username
         })
         
-        # Start game
-        socketio.emit('game_starting', {'countdown': 3}, room=room_code)
-        socketio.start_background_task(start_game_countdown, room_code, socketio, game_manager, app)
+        # Start game: deal the engine now, while the clients show the
+        # countdown, and let the timer wheel fire the start -- nothing sleeps,
+        # so hundreds of rooms starting together (tournament round
+        # boundaries) all get game_started on time.
+        _prepare_game(room_code, room.card_count)
+        socketio.emit('game_starting', {'countdown': GAME_START_COUNTDOWN_SECONDS}, room=room_code)
+        turn_timers.schedule(f"start:{room_code}",
+                             datetime.utcnow() + timedelta(seconds=GAME_START_COUNTDOWN_SECONDS),
+                             _on_countdown_elapsed)
     
     
-    def start_game_countdown(room_code, socketio, game_manager, app):
-        """Start game after countdown"""
-        import time
-        time.sleep(3)
-        
-        # Need application context for database access in background thread
+    def _prepare_game(room_code, card_count):
+        """Pre-create the engine for a room that is counting down."""
+        try:
+            game_id, _ = game_manager.create_game(mode="local", card_count=card_count)
+            _prepared_games[room_code] = game_id
+        except Exception as exc:
+            # _start_game builds it instead.
+            print(f"[MULTIPLAYER] Could not pre-create game for room {room_code}: {exc}")
+
+    def _on_countdown_elapsed(key):
+        """Timer-wheel callback: start the room's game on a worker."""
+        room_code = key.split(':', 1)[1]
+        socketio.start_background_task(_run_game_start, room_code)
+
+    def _run_game_start(room_code):
+        # Need application context for database access in background task
         with app.app_context():
-            room = GameRoom.query.filter_by(room_code=room_code).first()
-            if not room or room.status != 'waiting':
-                return
-            
-            # Deduct bets from both players
-            player1 = get_player_by_user_id(room.player1_id)
-            player2 = get_player_by_user_id(room.player2_id)
-            
-            if player1:
-                player1.deduct_bet(room.bet_amount, room.bet_type)
-            if player2:
-                player2.deduct_bet(room.bet_amount, room.bet_type)
-            
-            # Create game via GameManager
-            game_id, game_details = game_manager.create_game(mode="local", card_count=room.card_count)
-            
-            # Create bet session
-            # NOTE: BetSession.player_id / opponent_id are ForeignKey('players.id') --
-            # the wallet Player table's PK -- NOT the same as GameRoom.player1_id /
-            # player2_id, which store users.id. Must pass player1.id / player2.id here,
-            # not room.player1_id / room.player2_id, or these FKs point at the wrong
-            # (or a nonexistent) player row.
-            bet_session = BetSession(
-                game_id=game_id,
-                player_id=player1.id if player1 else None,
-                opponent_id=player2.id if player2 else None,
-                opponent_type='human',
-                bet_type=room.bet_type,
-                bet_amount=room.bet_amount,
-                prize_pool=room.bet_amount * 2,
-                card_count=room.card_count
-            )
-            db.session.add(bet_session)
-            db.session.flush()
-            
-            # Update room
-            room.game_id = game_id
-            room.bet_session_id = bet_session.id
-            room.status = 'in_progress'
-            room.started_at = datetime.utcnow()
-            room.current_turn_player = room.player1_id
-            room.turn_deadline = datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds)
-            
-            db.session.commit()
-            
-            # Store in memory
-            active_rooms[room_code] = {
-                'game_id': game_id,
-                'manager': game_manager
-            }
-            
-            print(f"[MULTIPLAYER] Game {game_id} started for room {room_code}")
-            
-            # Send game state to both players
-            engine = game_manager.get_game(game_id)
-            state = engine.get_state()
-            
-            # Get user IDs before leaving context
-            player1_id = room.player1_id
-            player2_id = room.player2_id
-            turn_deadline_iso = room.turn_deadline.isoformat()
-            
-            # Player 1 is index 0, Player 2 is index 1
-            # Prepare per-player transformed state to avoid leaking opponent private info
-            def _is_my_turn(state_obj, player_index):
-                phase = state_obj.get('phase')
-                if phase == 'ATTACK':
-                    return state_obj.get('attacker') == player_index
-                if phase == 'DEFENSE':
-                    return state_obj.get('defender') == player_index
-                if phase == 'RULE_8':
-                    return state_obj.get('attacker') == player_index
-                return False
-
-            base_state = {
-                'phase': state.get('phase'),
-                'attacker': state.get('attacker'),
-                'defender': state.get('defender'),
-                'attack_card': state.get('attack_card'),
-                'attack_card_value': state.get('attack_card_value'),
-                'game_over': state.get('game_over'),
-                'winner': state.get('winner'),
-                'ui_log': state.get('ui_log', []),
-                'attack_pile': [state.get('attack_card')] if state.get('attack_card') else []
-            }
+            try:
+                room_actors.run(room_code, _start_game, room_code, socketio, game_manager)
+            except RoomBusy:
+                # Another worker holds the room: try the start again shortly
+                print(f"[MULTIPLAYER] Room {room_code} busy, retrying the game start")
+                turn_timers.schedule(f"start:{room_code}", datetime.utcnow() + timedelta(seconds=1),
+                                     _on_countdown_elapsed)
+
+    def _start_game(room_code, socketio, game_manager):
+        """Seat the pre-built engine and announce the game (runs inside the room's actor)."""
+        game_id = _prepared_games.pop(room_code, None)
+        room = GameRoom.query.filter_by(room_code=room_code).first()
+        if not room or room.status != 'waiting':
+            if game_id:
+                game_manager.delete_game(game_id)
+            return
+        
+        # Deduct bets from both players
+        player1 = get_player_by_user_id(room.player1_id)
+        player2 = get_player_by_user_id(room.player2_id)
+        
+        # Normally dealt during the countdown; create it now if that failed
+        # (or the join was handled before a restart).
+        if not game_id:
+            game_id, _ = game_manager.create_game(mode="local", card_count=room.card_count)
+        
+        # Both stakes are conditional UPDATEs: a player whose balance no longer
+        # covers the stake (spent during the countdown or in another room)
+        # stops the start instead of playing for free.
+        short = []
+        for user_id, player in ((room.player1_id, player1), (room.player2_id, player2)):
+            taken = player is not None and wallet.debit(
+                player.id, room.bet_amount, room.bet_type, transaction_type=TX_BET,
+                game_id=game_id, description=f'Versus stake in room {room_code}') is not None
+            if not taken and room.bet_amount:
+                short.append(user_id)
+        if short:
+            db.session.rollback()
+            game_manager.delete_game(game_id)
+            _abort_start(room_code, short, socketio)
+            return
+        
+        # Create bet session
+        # NOTE: BetSession.player_id / opponent_id are ForeignKey('players.id') --
+        # the wallet Player table's PK -- NOT the same as GameRoom.player1_id /
+        # player2_id, which store users.id. Must pass player1.id / player2.id here,
+        # not room.player1_id / room.player2_id, or these FKs point at the wrong
+        # (or a nonexistent) player row.
+        bet_session = BetSession(
+            game_id=game_id,
+            player_id=player1.id if player1 else None,
+            opponent_id=player2.id if player2 else None,
+            opponent_type='human',
+            bet_type=room.bet_type,
+            bet_amount=room.bet_amount,
+            prize_pool=room.bet_amount * 2,
+            card_count=room.card_count
+        )
+        db.session.add(bet_session)
+        db.session.flush()
+        # Link the two stake ledger rows (added above, same transaction)
+        Transaction.query.filter(
+            Transaction.game_id == game_id,
+            Transaction.transaction_type == TX_BET,
+            Transaction.session_id.is_(None),
+        ).update({'session_id': bet_session.id}, synchronize_session=False)
+        
+        # Update room
+        room.game_id = game_id
+        room.bet_session_id = bet_session.id
+        room.status = 'in_progress'
+        room.started_at = datetime.utcnow()
+        room.current_turn_player = room.player1_id
+        room.turn_deadline = datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds)
+        
+        db.session.commit()
+        arm_turn_timer(room)
+        room_registry.register(room)
+        
+        print(f"[MULTIPLAYER] Game {game_id} started for room {room_code}")
+        
+        # Send game state to both players
+        engine = game_manager.get_game(game_id)
+        state = engine.get_state()
+        spectator_feed.publish(room_code, public_state(state, room))
+        
+        # Get user IDs before leaving context
+        player1_id = room.player1_id
+        player2_id = room.player2_id
+        turn_deadline_iso = room.turn_deadline.isoformat()
+        
+        # Player 1 is index 0, Player 2 is index 1
+        # Prepare per-player transformed state to avoid leaking opponent private info
+        def _is_my_turn(state_obj, player_index):
+            phase = state_obj.get('phase')
+            if phase == 'ATTACK':
+                return state_obj.get('attacker') == player_index
+            if phase == 'DEFENSE':
+                return state_obj.get('defender') == player_index
+            if phase == 'RULE_8':
+                return state_obj.get('attacker') == player_index
+            return False
 
-            # Player 1 view: show full hand for player 1, only hand count for player 2
-            p1_hand = state.get('hands', {}).get(0, [])
-            p2_hand = state.get('hands', {}).get(1, [])
-            transformed_p1 = dict(base_state)
-            transformed_p1['players'] = [
-                {'hand': p1_hand},
-                {'hand_count': len(p2_hand)}
-            ]
-
-            # Player 2 view: show full hand for player 2, only hand count for player 1
-            transformed_p2 = dict(base_state)
-            transformed_p2['players'] = [
-                {'hand_count': len(p1_hand)},
-                {'hand': p2_hand}
-            ]
-
-            socketio.emit('game_started', {
-                'game_id': game_id,
-                'room_code': room_code,
-                'your_player_index': 0,
-                'your_turn': _is_my_turn(state, 0),
-                'state': transformed_p1,
-                'bet_total': (room.bet_amount or 0) * 2,
-                'turn_deadline': turn_deadline_iso
-            }, room=f"user_{player1_id}")
-
-            socketio.emit('game_started', {
-                'game_id': game_id,
-                'room_code': room_code,
-                'your_player_index': 1,
-                'your_turn': _is_my_turn(state, 1),
-                'state': transformed_p2,
-                'bet_total': (room.bet_amount or 0) * 2,
-                'turn_deadline': turn_deadline_iso
-            }, room=f"user_{player2_id}")
-            
-            # Update lobby
-            socketio.emit('lobby_updated', {}, to=None)
+        base_state = {
+            'phase': state.get('phase'),
+            'attacker': state.get('attacker'),
+            'defender': state.get('defender'),
+            'attack_card': state.get('attack_card'),
+            'attack_card_value': state.get('attack_card_value'),
+            'game_over': state.get('game_over'),
+            'winner': state.get('winner'),
+            'ui_log': state.get('ui_log', []),
+            'attack_pile': [state.get('attack_card')] if state.get('attack_card') else []
+        }
+
+        # Player 1 view: show full hand for player 1, only hand count for player 2
+        p1_hand = state.get('hands', {}).get(0, [])
+        p2_hand = state.get('hands', {}).get(1, [])
+        transformed_p1 = dict(base_state)
+        transformed_p1['players'] = [
+            {'hand': p1_hand},
+            {'hand_count': len(p2_hand)}
+        ]
+
+        # Player 2 view: show full hand for player 2, only hand count for player 1
+        transformed_p2 = dict(base_state)
+        transformed_p2['players'] = [
+            {'hand_count': len(p1_hand)},
+            {'hand': p2_hand}
+        ]
+
+        wire_codec.emit_encoded(socketio, 'game_started', {
+            'game_id': game_id,
+            'room_code': room_code,
+            'your_player_index': 0,
+            'your_turn': _is_my_turn(state, 0),
+            'state': transformed_p1,
+            'bet_total': (room.bet_amount or 0) * 2,
+            'turn_deadline': turn_deadline_iso
+        }, f"user_{player1_id}")
+
+        wire_codec.emit_encoded(socketio, 'game_started', {
+            'game_id': game_id,
+            'room_code': room_code,
+            'your_player_index': 1,
+            'your_turn': _is_my_turn(state, 1),
+            'state': transformed_p2,
+            'bet_total': (room.bet_amount or 0) * 2,
+            'turn_deadline': turn_deadline_iso
+        }, f"user_{player2_id}")
+    
+    
+    def _abort_start(room_code, short_user_ids, socketio):
+        """A stake could not be taken: reopen the room, or abandon it if the creator is short."""
+        room = GameRoom.query.filter_by(room_code=room_code).first()
+        if room is None or room.status != 'waiting':
+            return
+        player1_id, player2_id = room.player1_id, room.player2_id
+        if player1_id in short_user_ids:
+            room.status = 'abandoned'
+            room.completed_at = datetime.utcnow()
+            db.session.commit()
+            lobby_cache.remove(room_code)
+        else:
+            room.player2_id = None
+            room.player2_connected = False
+            room.player2_last_seen = None
+            db.session.commit()
+            lobby_cache.upsert(room.to_dict())
+        room_registry.discard(room_code)
+        print(f"[MULTIPLAYER] Room {room_code} could not start: insufficient balance for {short_user_ids}")
+        
+        for user_id in (player1_id, player2_id):
+            if user_id in short_user_ids:
+                message = f'Insufficient {room.bet_type} balance for the {room.bet_amount} stake - game not started'
+            elif room.status == 'abandoned':
+                message = 'Your opponent could not cover the stake - the room was closed'
+            else:
+                message = 'Your opponent could not cover the stake - waiting for a new opponent'
+            socketio.emit('error', {'message': message, 'room_code': room_code,
+                                    'room_status': room.status}, room=f"user_{user_id}")
     
     
     @socketio.on('game_action')
+    @rate_limited('game_action')
+    @serialized_by_room
     def handle_game_action(data):
         """Handle game action from player"""
         user_id = session.get('user_id')
@@ -573,7 +725,9 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         action_type = data.get('action')
         action_data = data.get('data', {})
         
-        room = GameRoom.query.filter_by(room_code=room_code).first()
+        # Seats, game and status come from the shared registry; the GameRoom
+        # row is only read if the room isn't registered yet.
+        room = room_registry.lookup(room_code)
         if not room:
             emit('error', {'message': 'Room not found'})
             return
@@ -624,7 +778,7 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                 else:
                     transformed['players'] = [ {'hand_count': len(p1_hand)}, {'hand': p2_hand} ]
 
-                emit('game_update', {
+                wire_codec.reply_encoded('game_update', {
                     'game_state': transformed,
                     'player_index': player_index,
                     'is_my_turn': transformed['attacker'] == player_index or transformed['defender'] == player_index,
@@ -671,8 +825,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         # index 1 saw the server play the J at index 0 -- the UI then looked
         # like it had rendered the wrong card even though both sides were
         # technically 'correct'. Players who send NO action at all are handled
-        # by the background AFK sweep process_expired_room_turns() below, which
-        # only fires when a room's turn is long overdue and nothing arrived.
+        # by the room's turn timer (arm_turn_timer() below), which only fires
+        # when a room's turn is long overdue and nothing arrived.
         if room.turn_deadline and datetime.utcnow() > room.turn_deadline:
             print(f"[MULTIPLAYER] Turn expired for user {user_id} - accepting late action '{action_type}' as submitted")
             socketio.emit('turn_timeout', {
@@ -683,7 +837,21 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             }, room=room_code)
             # Continue with the player's own action (don't return here)
         
-        # Get game engine
+        # Claim the move before touching the engine: the registry copy can be
+        # up to local_ttl_seconds old, and another worker may have paused the
+        # room or applied a move since. move_seq is bumped by every claim, so a
+        # stale copy never matches and the engine is left as it was.
+        if not _claim_move(room_code, room.move_seq):
+            db.session.rollback()
+            current = room_registry.refresh(room_code)
+            print(f"[MULTIPLAYER] Stale room state for {room_code} - '{action_type}' from user {user_id} not applied")
+            emit('error', {'message': 'The game changed before your move was applied - please retry',
+                           'room_code': room_code, 'room_status': current.status if current else None})
+            return
+        db.session.commit()
+        room = room_registry.register(room.replace(move_seq=(room.move_seq or 0) + 1))
+
+        # Get game engine (after the claim, so it includes every earlier move)
         game_id = room.game_id
         engine = game_manager.get_game(game_id)
         # For multiplayer we must NOT run the local AI; pass run_ai=False so the
@@ -771,14 +939,22 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             print(f"[MULTIPLAYER] Failed to persist move: {e}")
             db.session.rollback()
 
-        # Update turn
-        room.current_turn_player = room.player1_id if state['attacker'] == 0 else room.player2_id
-        room.turn_deadline = datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds)
+        # Update turn (the move was claimed above, so this is our row to write)
+        room = room.replace(
+            current_turn_player=room.player1_id if state['attacker'] == 0 else room.player2_id,
+            turn_deadline=datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds or 300),
+        )
+        GameRoom.query.filter_by(room_code=room_code).update({
+            'current_turn_player': room.current_turn_player,
+            'turn_deadline': room.turn_deadline,
+        })
         db.session.commit()
+        arm_turn_timer(room)
+        room_registry.register(room)
         
         # Check if game over
         if state.get('game_over'):
-            handle_game_over(room, state, socketio)
+            handle_game_over(GameRoom.query.filter_by(room_code=room_code).first(), state, socketio)
             return
         
         # Broadcast state to both players with per-player masking
@@ -797,7 +973,7 @@ def init_multiplayer_events(socketio, game_manager, app=None):
             player_index = 0 if pid == room.player1_id else 1
             is_my_turn = transformed['attacker'] == player_index or transformed['defender'] == player_index
             print(f"[MULTIPLAYER] Broadcasting game_update to user_{pid} (player_index={player_index})")
-            socketio.emit('game_update', {
+            wire_codec.emit_encoded(socketio, 'game_update', {
                 'game_state': transformed,
                 'player_index': player_index,
                 'actor_index': actor_index,
@@ -806,12 +982,48 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                 'result': result.get_json() if hasattr(result, 'get_json') else result,
                 'turn_deadline': room.turn_deadline.isoformat(),
                 'bet_total': (room.bet_amount or 0) * 2
-            }, room=f"user_{pid}")
+            }, f"user_{pid}", topic=room_code)
             print(f"[MULTIPLAYER] Emitted game_update to user_{pid}")
+
+        # One coalesced, rate-limited emit for however many spectators
+        spectator_feed.publish(room_code, public_state(state, room))
+    
+    
+    @socketio.on('spectate_room')
+    @rate_limited('spectate_room')
+    @replica_reads
+    def handle_spectate_room(data):
+        """Watch a live room - public access allowed"""
+        room_code = (data or {}).get('room_code')
+        room = room_registry.lookup(room_code)
+        if not room or room.status not in ('in_progress', 'paused'):
+            emit('error', {'message': 'Room is not live'})
+            return
+        
+        wire_codec.join_encoded(spectator_room(room_code))
+        
+        snapshot = spectator_feed.snapshot(room_code)
+        if snapshot is None and room.game_id:
+            try:
+                snapshot = public_state(game_manager.get_game(room.game_id).get_state(), room)
+            except KeyError:
+                snapshot = None
+        if snapshot is not None:
+            wire_codec.reply_encoded('spectator_update', snapshot)
     
     
+    @socketio.on('leave_spectate')
+    @rate_limited('leave_spectate')
+    def handle_leave_spectate(data):
+        """Stop watching a room"""
+        room_code = (data or {}).get('room_code')
+        if room_code:
+            wire_codec.leave_encoded(spectator_room(room_code))
+    
     
     @socketio.on('request_pause')
+    @rate_limited('request_pause')
+    @serialized_by_room
     def handle_request_pause(data):
         """Request to pause the game"""
         user_id = session.get('user_id')
@@ -841,6 +1053,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
     
     
     @socketio.on('approve_pause')
+    @rate_limited('approve_pause')
+    @serialized_by_room
     def handle_approve_pause(data):
         """Approve pause request"""
         user_id = session.get('user_id')
@@ -867,6 +1081,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         room.pause_approved_by = user_id
         room.paused_at = datetime.utcnow()
         db.session.commit()
+        turn_timers.cancel(room_code)
+        room_registry.register(room)
         
         socketio.emit('game_paused', {
             'paused_at': room.paused_at.isoformat()
@@ -874,6 +1090,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
     
     
     @socketio.on('resume_game')
+    @rate_limited('resume_game')
+    @serialized_by_room
     def handle_resume_game(data):
         """Resume paused game"""
         user_id = session.get('user_id')
@@ -899,6 +1117,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
         # Reset turn deadline
         room.turn_deadline = datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds)
         db.session.commit()
+        arm_turn_timer(room)
+        room_registry.register(room)
         
         socketio.emit('game_resumed', {
             'turn_deadline': room.turn_deadline.isoformat()
@@ -906,6 +1126,8 @@ def init_multiplayer_events(socketio, game_manager, app=None):
     
     
     @socketio.on('reconnect_to_room')
+    @rate_limited('reconnect_to_room')
+    @serialized_by_room
     def handle_reconnect(data):
         """Reconnect to an active game"""
         try:
@@ -929,20 +1151,24 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                 emit('error', {'message': 'You are not in this room'})
                 return
             
-            # Update connection status
+            # Update connection status - only a seat that was actually marked
+            # disconnected needs a write; plain page reloads don't.
             if room.player1_id == user_id:
-                room.player1_connected = True
-                room.player1_last_seen = datetime.utcnow()
                 player_index = 0
+                if not room.player1_connected:
+                    room.player1_connected = True
+                    room.player1_last_seen = datetime.utcnow()
+                    db.session.commit()
             elif room.player2_id == user_id:
-                room.player2_connected = True
-                room.player2_last_seen = datetime.utcnow()
                 player_index = 1
+                if not room.player2_connected:
+                    room.player2_connected = True
+                    room.player2_last_seen = datetime.utcnow()
+                    db.session.commit()
             else:
                 emit('error', {'message': 'Invalid player'})
                 return
-            
-            db.session.commit()
+            presence.enter_room(room_code, user_id)
             
             # Rejoin rooms
             join_room(room_code)
@@ -963,6 +1189,7 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                         # Update room with new game ID
                         room.game_id = game_id
                         db.session.commit()
+                        room_registry.register(room)
                         engine = game_manager.get_game(game_id)
                         print(f"[MULTIPLAYER] Game recreated with new ID: {game_id}")
                     except Exception as e:
@@ -1010,7 +1237,7 @@ def init_multiplayer_events(socketio, game_manager, app=None):
                 
                 print(f"[MULTIPLAYER] Sending game state to user {user_id}, player index {player_index}")
                 
-                emit('game_update', {
+                wire_codec.reply_encoded('game_update', {
                     'game_state': transformed_state,
                     'player_index': player_index,
                     'actor_index': None,  # reconnect update has no immediate actor
@@ -1043,18 +1270,156 @@ def init_multiplayer_events(socketio, game_manager, app=None):
     return socketio
 
 
+def _load_lobby_rooms():
+    """Rebuild the lobby snapshot: waiting rooms from the last 5 hours."""
+    five_hours_ago = datetime.utcnow() - timedelta(hours=5)
+    waiting_rooms = GameRoom.query.filter(
+        GameRoom.status == 'waiting',
+        GameRoom.created_at >= five_hours_ago
+    ).order_by(GameRoom.created_at.desc()).limit(lobby_cache.limit * 10).populate_existing().all()
+    preload_users(uid for r in waiting_rooms for uid in (r.player1_id, r.player2_id))
+    return [r.to_dict() for r in waiting_rooms]
+
+
 # ---------------------------------------------------------------------------
-# BACKGROUND TURN SWEEP (genuinely AFK players)
+# TURN TIMERS (genuinely AFK players)
 # ---------------------------------------------------------------------------
-# Called every ~20s from app.py's scheduler. Handles players who miss their
-# turn WITHOUT submitting any action, so the opponent isn't held hostage by an
-# absent player. It never overrides a move the player actually sent --
-# handle_game_action now accepts late-but-real actions as submitted.
+# Every in-progress room arms one timer on the process-wide timer wheel
+# (services/turn_timers.py) for turn_deadline + AFK_GRACE_SECONDS. Each move
+# re-arms it, pause and game over cancel it, and when it fires the room's turn
+# is auto-played so the opponent isn't held hostage by an absent player. It
+# never overrides a move the player actually sent -- handle_game_action
+# accepts late-but-real actions as submitted. app.py's scheduler only runs
+# reconcile_turn_timers() every few minutes to re-arm rooms this process
+# doesn't hold a timer for (e.g. after a restart).
 # ---------------------------------------------------------------------------
 
 
+def arm_turn_timer(room):
+    """(Re-)arm the AFK timer for ``room`` from its current turn_deadline."""
+    if room.status == 'in_progress' and room.turn_deadline is not None:
+        turn_timers.schedule(room.room_code,
+                             room.turn_deadline + timedelta(seconds=AFK_GRACE_SECONDS),
+                             _on_turn_timer_fired)
+    else:
+        turn_timers.cancel(room.room_code)
+
+
+def _offline_timer_key(user_id):
+    return f"presence:{user_id}"
+
+
+def _on_offline_grace_elapsed(key):
+    """Timer-wheel callback: persist a disconnect that outlasted the grace window."""
+    socketio = _timer_context.get('socketio')
+    if socketio is None:
+        return
+    socketio.start_background_task(_persist_offline, int(key.split(':', 1)[1]))
+
+
+def _persist_offline(user_id):
+    """Mark the user's seats disconnected unless they came back meanwhile."""
+    app = _timer_context.get('app')
+    socketio = _timer_context.get('socketio')
+    if app is None:
+        return
+
+    with app.app_context():
+        if presence.is_online(user_id):
+            return
+        rooms_to_mark = GameRoom.query.filter(
+            db.or_(
+                GameRoom.player1_id == user_id,
+                GameRoom.player2_id == user_id
+            ),
+            GameRoom.status.in_(['in_progress', 'paused'])
+        ).all()
+        for room in rooms_to_mark:
+            try:
+                room_actors.run(room.room_code, _mark_disconnected, socketio, room, user_id)
+            except Exception as exc:
+                print(f"[MULTIPLAYER] Failed to mark user {user_id} offline in {room.room_code}: {exc}")
+                db.session.rollback()
+
+
+def _mark_disconnected(socketio, room, user_id):
+    """Record one player's disconnect (runs inside the room's actor)."""
+    db.session.refresh(room)
+    last_seen = presence.last_seen(user_id) or datetime.utcnow()
+    if room.player1_id == user_id:
+        room.player1_connected = False
+        room.player1_last_seen = last_seen
+    elif room.player2_id == user_id:
+        room.player2_connected = False
+        room.player2_last_seen = last_seen
+    
+    db.session.commit()
+    
+    # Notify opponent
+    opponent_id = room.get_opponent_id(user_id)
+    if opponent_id:
+        socketio.emit('opponent_disconnected', {
+            'room_code': room.room_code,
+            'reconnection_window': 120  # 2 minutes
+        }, room=f"user_{opponent_id}")
+
+
+def _on_turn_timer_fired(room_code):
+    """Timer-wheel callback: hand the timeout to a worker so the wheel keeps ticking."""
+    socketio = _timer_context.get('socketio')
+    if socketio is None:
+        return
+    socketio.start_background_task(_handle_turn_timeout, room_code)
+
+
+def _handle_turn_timeout(room_code):
+    """Auto-play one overdue turn inside the room's actor."""
+    app = _timer_context.get('app')
+    socketio = _timer_context.get('socketio')
+    game_manager = _timer_context.get('game_manager')
+    if app is None or game_manager is None:
+        return
+
+    with app.app_context():
+        room = GameRoom.query.filter_by(room_code=room_code).first()
+        if not room:
+            return
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=AFK_GRACE_SECONDS)
+        try:
+            room_actors.run(room_code, _auto_play_if_still_expired,
+                            socketio, game_manager, room, cutoff, now)
+        except Exception as exc:
+            print(f"[MULTIPLAYER] Turn timeout error for room {room_code}: {exc}")
+            db.session.rollback()
+            # Push the deadline out so we don't hot-loop a broken room.
+            try:
+                room.turn_deadline = now + timedelta(seconds=room.turn_duration_seconds or 300)
+                db.session.commit()
+                arm_turn_timer(room)
+                room_registry.register(room)
+            except Exception:
+                db.session.rollback()
+
+
+def _claim_move(room_code, move_seq):
+    """Bump ``move_seq`` if the room is still in progress at ``move_seq`` (not committed)."""
+    return bool(GameRoom.query.filter(
+        GameRoom.room_code == room_code,
+        GameRoom.status == 'in_progress',
+        GameRoom.move_seq == (move_seq or 0),
+    ).update({'move_seq': GameRoom.move_seq + 1}, synchronize_session=False))
+
+
 def _auto_play_expired_room(socketio, game_manager, room, now):
-    """Execute one safe auto-play action for a room whose turn is long overdue."""
+    """Execute one safe auto-play action for a room whose turn is long overdue.
+
+    Auto-play rules (only for genuinely absent players):
+      - DEFENSE         -> draw
+      - ATTACK          -> attack with the first card
+      - RULE_8 attacker -> drop their lowest-value card
+      - RULE_8 defender -> default to NOT crashing the trail
+    """
     if not room.game_id:
         return
 
@@ -1107,6 +1472,14 @@ def _auto_play_expired_room(socketio, game_manager, room, now):
     if not action_type:
         return
 
+    # Same claim as game_action, so a move arriving on another worker and
+    # this auto-play cannot both be applied
+    if not _claim_move(room.room_code, room.move_seq):
+        db.session.rollback()
+        return
+    db.session.commit()
+    db.session.refresh(room)
+
     print(f"[MULTIPLAYER] Auto-playing '{action_type}' for user {user_id} (room {room.room_code}, expired turn)")
 
     controller = FlaskGameController(engine, run_ai=False)
@@ -1188,6 +1561,8 @@ def _auto_play_expired_room(socketio, game_manager, room, now):
     room.current_turn_player = room.player1_id if state['attacker'] == 0 else room.player2_id
     room.turn_deadline = datetime.utcnow() + timedelta(seconds=room.turn_duration_seconds)
     db.session.commit()
+    arm_turn_timer(room)
+    room_registry.register(room)
 
     # Tell both clients what happened (and which card was auto-played)
     auto_played_card = None
@@ -1225,7 +1600,7 @@ def _auto_play_expired_room(socketio, game_manager, room, now):
         pidx = 0 if pid == room.player1_id else 1
         is_my_turn = transformed['attacker'] == pidx or transformed['defender'] == pidx
         print(f"[MULTIPLAYER] Broadcasting auto-play game_update to user_{pid} (player_index={pidx})")
-        socketio.emit('game_update', {
+        wire_codec.emit_encoded(socketio, 'game_update', {
             'game_state': transformed,
             'player_index': pidx,
             'actor_index': player_index,
@@ -1234,40 +1609,97 @@ def _auto_play_expired_room(socketio, game_manager, room, now):
             'result': result.get_json() if hasattr(result, 'get_json') else result,
             'turn_deadline': room.turn_deadline.isoformat(),
             'bet_total': (room.bet_amount or 0) * 2
-        }, room=f"user_{pid}")
+        }, f"user_{pid}", topic=room.room_code)
 
-def process_expired_room_turns(socketio, game_manager, grace_seconds=60):
-    """Background worker: auto-play for rooms whose turn deadline has passed.
+    spectator_feed.publish(room.room_code, public_state(state, room))
 
-    Called periodically from the app-level scheduler thread (see app.py). A
-    grace period prevents robbing a player who reconnects just after their
-    deadline and sends a move -- handle_game_action accepts those late moves,
-    and the sweep only fires when NO action arrived at all.
 
-    Auto-play rules (only for genuinely absent players):
-      - DEFENSE         -> draw
-      - ATTACK          -> attack with the first card
-      - RULE_8 attacker -> drop their lowest-value card
-      - RULE_8 defender -> default to NOT crashing the trail
+def _auto_play_if_still_expired(socketio, game_manager, room, cutoff, now):
+    """Re-check a timed-out room inside its actor before auto-playing.
+
+    The timer may have been armed from a stale deadline (or by another worker),
+    so a real move may have landed in between and pushed the deadline out;
+    reload the row and just re-arm if so.
     """
-    if socketio is None or game_manager is None:
+    db.session.refresh(room)
+    if room.status != 'in_progress' or room.turn_deadline is None:
+        return
+    if room.turn_deadline > cutoff:
+        arm_turn_timer(room)
         return
-    now = datetime.utcnow()
-    cutoff = now - timedelta(seconds=grace_seconds)
-    rooms = GameRoom.query.filter(
+    _auto_play_expired_room(socketio, game_manager, room, now)
+
+
+def reconcile_turn_timers():
+    """Arm a timer for every in-progress room this process isn't tracking.
+
+    Called at startup and every few minutes from the app-level scheduler (see
+    app.py), so rooms survive a restart and rooms started by another worker
+    still time out. Rooms already past their deadline + grace fire on the next
+    tick. Returns the number of timers armed.
+    """
+    rows = db.session.query(GameRoom.room_code, GameRoom.turn_deadline).filter(
         GameRoom.status == 'in_progress',
         GameRoom.turn_deadline.isnot(None),
-        GameRoom.turn_deadline <= cutoff,
     ).all()
 
-    for room in rooms:
-        try:
-            _auto_play_expired_room(socketio, game_manager, room, now)
-        except Exception as exc:
-            print(f"[MULTIPLAYER] Auto-play sweep error for room {room.room_code}: {exc}")
-            # Push the deadline out so we don't hot-loop a broken room.
+    armed = 0
+    for room_code, turn_deadline in rows:
+        if turn_timers.is_armed(room_code):
+            continue
+        turn_timers.schedule(room_code, turn_deadline + timedelta(seconds=AFK_GRACE_SECONDS),
+                             _on_turn_timer_fired)
+        armed += 1
+    return armed
+
+
+def sweep_stale_rooms(now=None):
+    """Abandon expired waiting rooms and long-paused games in one UPDATE.
+
+    Run from the app-level scheduler (see app.py) so the lobby read path never
+    writes. Paused rooms holding a bet or belonging to a tournament match are
+    left alone - their stakes and brackets are settled elsewhere. The rooms'
+    engines are dropped from the game manager and waiting rooms leave the
+    lobby snapshot. Returns the number of rooms abandoned.
+    """
+    now = now or datetime.utcnow()
+    waiting_cutoff = now - timedelta(hours=WAITING_ROOM_MAX_AGE_HOURS)
+    paused_cutoff = now - timedelta(hours=PAUSED_ROOM_MAX_AGE_HOURS)
+
+    stale = db.or_(
+        db.and_(GameRoom.status == 'waiting', GameRoom.created_at < waiting_cutoff),
+        db.and_(GameRoom.status == 'paused', GameRoom.paused_at < paused_cutoff,
+                GameRoom.bet_session_id.is_(None), GameRoom.match_id.is_(None)),
+    )
+    columns = (GameRoom.room_code, GameRoom.game_id, GameRoom.paused_at)
+    stmt = db.update(GameRoom).where(stale).values(status='abandoned') \
+        .execution_options(synchronize_session=False)
+    if db.session.get_bind(mapper=GameRoom).dialect.update_returning:
+        swept = db.session.execute(stmt.returning(*columns)).all()
+    else:
+        # Select the candidates, then abandon only those still stale
+        candidates = db.session.execute(db.select(GameRoom.id, *columns).where(stale)).all()
+        ids = [row[0] for row in candidates]
+        swept = []
+        if ids and db.session.execute(stmt.where(GameRoom.id.in_(ids))).rowcount:
+            # Same transaction, so this reads our own write
+            abandoned = set(db.session.execute(
+                db.select(GameRoom.id).where(GameRoom.id.in_(ids), GameRoom.status == 'abandoned')).scalars())
+            swept = [tuple(row[1:]) for row in candidates if row[0] in abandoned]
+    db.session.commit()
+
+    game_manager = _timer_context.get('game_manager')
+    for room_code, game_id, paused_at in swept:
+        if paused_at is None:
+            # Only waiting rooms were ever listed in the lobby
+            lobby_cache.remove(room_code)
+        room_registry.discard(room_code)
+        room_actors.discard(room_code)
+        turn_timers.cancel(room_code)
+        presence.clear_room(room_code)
+        if game_id and game_manager is not None:
             try:
-                room.turn_deadline = now + timedelta(seconds=room.turn_duration_seconds or 300)
-                db.session.commit()
-            except Exception:
-                db.session.rollback()
+                game_manager.delete_game(game_id)
+            except Exception as exc:
+                print(f"[MULTIPLAYER] Failed to drop game {game_id} of room {room_code}: {exc}")
+    return len(swept)
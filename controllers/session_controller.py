@@ -115,8 +115,12 @@ def create_game_session():
                 'error': f'Insufficient {bet_type} balance'
             }), 400
         
-        # Deduct bet from player balance
-        player.deduct_bet(bet_amount, bet_type)
+        # Deduct bet from player balance (re-checked atomically by the UPDATE)
+        if not player.deduct_bet(bet_amount, bet_type):
+            return jsonify({
+                'success': False,
+                'error': f'Insufficient {bet_type} balance'
+            }), 400
         
         # Generate game ID (will be replaced with actual game ID from engine)
         game_id = str(uuid.uuid4())
@@ -209,7 +213,8 @@ def complete_game_session():
             if player_won:
                 # Player won - award the full prize pool
                 winnings_awarded = session.prize_pool
-                player.award_winnings(winnings_awarded, session.bet_type)
+                player.award_winnings(winnings_awarded, session.bet_type,
+                                      session_id=session.id, game_id=session.game_id)
                 player.record_game_result(won=True)
                 print(f"[SESSION] Player {session.player_id} won {winnings_awarded} in session {session.id}")
             else:
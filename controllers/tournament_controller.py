@@ -25,6 +25,14 @@ from database import (
     TX_PRIZE_AWARD,
     TX_REFUND,
 )
+from services.identity_cache import preload_users, username_for
+from services.outbound import outbound
+from services.presence import presence
+from services.wallet import wallet
+from services.rate_limits import rate_limited
+from services.read_replica import replica_reads
+from services.room_registry import room_registry
+from services.tournament_counters import tournament_counters
 
 
 tournament_bp = Blueprint('tournament', __name__, url_prefix='/api/tournaments')
@@ -52,16 +60,12 @@ def _lock_consensus_info(tournament):
     Only non-creator registered participants vote. When every voter has voted,
     the tournament may be locked early at its current player count.
     """
-    participants = TournamentParticipant.query.filter_by(
-        tournament_id=tournament.id, status='registered'
-    ).all()
-    voters_needed = [p for p in participants if p.user_id != tournament.creator_id]
-    votes_received = sum(1 for p in voters_needed if p.lock_voted)
+    _, votes_needed, votes_received = tournament_counters.counts(tournament)
     return {
         'mode': 'auto' if tournament.is_auto_lock else 'manual',
-        'votes_needed': len(voters_needed),
+        'votes_needed': votes_needed,
         'votes_received': votes_received,
-        'consensus_reached': bool(voters_needed and votes_received >= len(voters_needed)),
+        'consensus_reached': bool(votes_needed and votes_received >= votes_needed),
     }
 
 
@@ -72,9 +76,7 @@ def _perform_tournament_lock(tournament):
     Mirrors the existing lock behaviour (status -> locked, then the bracket
     builder transitions the tournament into 'in_progress' with scheduled matches).
     """
-    participant_count = TournamentParticipant.query.filter_by(
-        tournament_id=tournament.id, status='registered'
-    ).count()
+    participant_count = tournament_counters.counts(tournament)[0]
     if participant_count < 2:
         return False, 'At least two paid players are required'
 
@@ -101,8 +103,8 @@ def _announce_tournament_locked(tournament, countdown=3):
     room = _tournament_room(tournament.id)
     _socketio.emit('tournament_locked', {'tournament': summary}, room=room)
     _socketio.emit('tournament_starting', {'countdown': countdown}, room=room)
-    _socketio.emit('tournament_updated', summary, room=room)
-    _socketio.emit('tournament_updated', summary, to=None)
+    outbound.send('tournament_updated', summary, topic=f"tournament:{tournament.id}",
+                  socketio=_socketio)
 
 
 def _parse_custom_time(custom_time_str, now):
@@ -174,9 +176,7 @@ def _schedule_message(tournament):
 
 def _serialize_tournament(tournament):
     """Return the stable, UI-facing tournament contract."""
-    current_players = TournamentParticipant.query.filter_by(
-        tournament_id=tournament.id, status='registered'
-    ).count()
+    current_players = tournament_counters.counts(tournament)[0]
     return {
         'id': tournament.id,
         'code': tournament.tournament_code,
@@ -205,9 +205,10 @@ def _serialize_tournament(tournament):
 def _emit_tournament_updated(tournament):
     """Broadcast a public tournament summary when the real-time layer exists."""
     if _socketio is not None:
-        _socketio.emit('tournament_updated', _serialize_tournament(tournament),
-                       room=_tournament_room(tournament.id))
-        _socketio.emit('tournament_updated', _serialize_tournament(tournament), to=None)
+        # One global broadcast: tournament-room members are connected too, so a
+        # second emit to the room only delivered the same summary twice.
+        outbound.send('tournament_updated', _serialize_tournament(tournament),
+                      topic=f"tournament:{tournament.id}", socketio=_socketio)
 
 
 def _emit_match_complete(tournament, match):
@@ -546,10 +547,20 @@ def _build_bracket(tournament):
 
 
 def _get_username(user_id):
-    if not user_id:
-        return None
-    user = User.query.get(user_id)
-    return user.username if user else None
+    return username_for(user_id)
+
+
+def _preload_tournament_users(tournaments):
+    """Bulk-load creator and podium usernames for a list of tournaments."""
+    preload_users(
+        uid for t in tournaments
+        for uid in (t.creator_id, t.winner_id, t.runner_up_id, t.third_place_id)
+    )
+
+
+def _preload_match_users(rows):
+    """Bulk-load player/winner usernames for brackets or matches."""
+    preload_users(uid for r in rows for uid in (r.player1_id, r.player2_id, r.winner_id))
 
 
 def _serialize_podium(tournament):
@@ -629,7 +640,7 @@ def _withdraw_participant(tournament, participant):
     participant.status = 'withdrawn'
     participant.payment_status = 'refunded'
     participant.withdrew_at = datetime.utcnow()
-    tournament.current_player_count = max(0, tournament.current_player_count - 1)
+    tournament.current_player_count = tournament_counters.counts(tournament)[0]
     tournament.prize_pool_amount = max(0.0, tournament.prize_pool_amount - amount)
     _ensure_prize_pool(tournament)
     return True, None
@@ -663,8 +674,11 @@ def _serialize_match(match):
         room = GameRoom.query.get(match.game_room_id)
         if room:
             room_code = room.room_code
-            player1_connected = bool(room.player1_connected)
-            player2_connected = bool(room.player2_connected)
+            # Live presence: the *_connected columns only change after the
+            # offline grace period
+            online = presence.online_in_room(room_code)
+            player1_connected = match.player1_id in online
+            player2_connected = match.player2_id in online
 
     roll = MatchRoll.query.filter_by(match_id=match.id, status='rolling').first()
     return {
@@ -700,6 +714,7 @@ def _build_rounds(tournament):
     brackets = TournamentBracket.query.filter_by(tournament_id=tournament.id).order_by(
         TournamentBracket.round_number, TournamentBracket.match_number
     ).all()
+    _preload_match_users(brackets)
     rounds = {}
     for bracket in brackets:
         entry = _serialize_bracket(bracket)
@@ -735,6 +750,7 @@ def _finalize_tournament(tournament):
     tournament.status = 'completed'
     tournament.completed_at = datetime.utcnow()
 
+    credits = []
     for placement, user_id in placements.items():
         if not user_id:
             continue
@@ -757,22 +773,19 @@ def _finalize_tournament(tournament):
             row.status = 'awarded'
             row.award_date = datetime.utcnow()
 
-        # Credit the player's real wallet.
         player = Player.query.filter_by(user_id=user_id).first()
         if player is not None and amount > 0:
-            balance_before = player.real_balance
-            player.real_balance += amount
-            player.total_winnings += amount
-            log_transaction(
-                player_id=player.id,
-                transaction_type=TX_PRIZE_AWARD,
-                amount=amount,
-                balance_type='real',
-                balance_before=balance_before,
-                balance_after=player.real_balance,
-                description=f'Tournament #{tournament.id} prize (placement {placement})',
-                tournament_id=tournament.id,
-            )
+            credits.append({
+                'player_id': player.id,
+                'amount': amount,
+                'balance_type': 'real',
+                'transaction_type': TX_PRIZE_AWARD,
+                'description': f'Tournament #{tournament.id} prize (placement {placement})',
+                'tournament_id': tournament.id,
+            })
+
+    # Credit the podium's real wallets in one settlement (committed by the caller).
+    wallet.settle(credits=credits)
 
 
 def _maybe_finalize(tournament):
@@ -805,6 +818,8 @@ def init_tournament_events(socketio, app=None):
         return tournament
 
     @socketio.on('get_tournaments')
+    @rate_limited('get_tournaments')
+    @replica_reads
     def handle_get_tournaments(data=None):
         data = data or {}
         filter_name = data.get('filter', 'all')
@@ -821,12 +836,14 @@ def init_tournament_events(socketio, app=None):
         if filter_name != 'all':
             query = query.filter_by(status=filter_name)
         tournaments = query.limit(limit).all()
+        _preload_tournament_users(tournaments)
         emit('tournaments_list', {
             'tournaments': [_serialize_tournament(t) for t in tournaments],
             'count': len(tournaments),
         })
 
     @socketio.on('join_tournament_room')
+    @rate_limited('join_tournament_room')
     def handle_join_tournament_room(data=None):
         user_id = _get_current_user_id()
         if not user_id:
@@ -846,13 +863,16 @@ def init_tournament_events(socketio, app=None):
             'is_creator': _can_manage_tournament(tournament, user_id),
         })
         emit('tournament_updated', summary)
+        participants = TournamentParticipant.query.filter_by(
+            tournament_id=tournament.id, status='registered'
+        ).order_by(TournamentParticipant.registered_at.asc()).all()
+        preload_users(p.user_id for p in participants)
         emit('tournament_participants', {
-            'participants': [_serialize_participant(p) for p in TournamentParticipant.query.filter_by(
-                tournament_id=tournament.id, status='registered'
-            ).order_by(TournamentParticipant.registered_at.asc()).all()]
+            'participants': [_serialize_participant(p) for p in participants]
         })
 
     @socketio.on('get_tournament_participants')
+    @rate_limited('get_tournament_participants')
     def handle_get_tournament_participants(data=None):
         user_id = _get_current_user_id()
         if not user_id:
@@ -867,11 +887,13 @@ def init_tournament_events(socketio, app=None):
         participants = TournamentParticipant.query.filter_by(
             tournament_id=tournament.id, status='registered'
         ).order_by(TournamentParticipant.registered_at.asc()).all()
+        preload_users(p.user_id for p in participants)
         emit('tournament_participants', {
             'participants': [_serialize_participant(p) for p in participants]
         })
 
     @socketio.on('request_tournament_lock')
+    @rate_limited('request_tournament_lock')
     def handle_request_tournament_lock(data=None):
         user_id = _get_current_user_id()
         tournament = get_tournament_from_payload(data)
@@ -889,6 +911,7 @@ def init_tournament_events(socketio, app=None):
             emit('tournament_error', {'message': error})
 
     @socketio.on('vote_tournament_lock')
+    @rate_limited('vote_tournament_lock')
     def handle_vote_tournament_lock(data=None):
         """Manual-lock consensus (D3): every registered non-creator player votes.
 
@@ -934,6 +957,7 @@ def init_tournament_events(socketio, app=None):
         }, room=_tournament_room(tournament.id))
 
     @socketio.on('leave_tournament')
+    @rate_limited('leave_tournament')
     def handle_leave_tournament(data=None):
         user_id = _get_current_user_id()
         if not user_id:
@@ -968,6 +992,7 @@ def init_tournament_events(socketio, app=None):
         _emit_tournament_updated(tournament)
 
     @socketio.on('start_tournament_match')
+    @rate_limited('start_tournament_match')
     def handle_start_tournament_match(data=None):
         data = data or {}
         user_id = _get_current_user_id()
@@ -986,6 +1011,7 @@ def init_tournament_events(socketio, app=None):
             emit('tournament_match_started_response', response)
 
     @socketio.on('roll_match')
+    @rate_limited('roll_match')
     def handle_roll_match(data=None):
         """Start the 10-minute no-show roll for a tournament match."""
         user_id = _get_current_user_id()
@@ -1014,6 +1040,7 @@ def init_tournament_events(socketio, app=None):
         })
 
     @socketio.on('join_bracket_room')
+    @rate_limited('join_bracket_room')
     def handle_join_bracket_room(data=None):
         """Allow bracket viewers (players + spectators) to receive live updates."""
         code = (data or {}).get('tournament_code')
@@ -1030,6 +1057,7 @@ def init_tournament_events(socketio, app=None):
 @tournament_bp.route('', methods=['GET'])
 def list_tournaments():
     tournaments = Tournament.query.order_by(Tournament.created_at.desc()).all()
+    _preload_tournament_users(tournaments)
     return jsonify({'tournaments': [_serialize_tournament(t) for t in tournaments]})
 
 
@@ -1047,14 +1075,17 @@ def my_active_tournaments():
     active = Tournament.query.filter(
         Tournament.status.in_(['open', 'locked', 'in_progress'])
     ).order_by(Tournament.created_at.desc()).all()
+    _preload_tournament_users(active)
 
-    mine = []
-    for tournament in active:
-        is_participant = TournamentParticipant.query.filter_by(
-            tournament_id=tournament.id, user_id=user_id, status='registered'
-        ).first() is not None
-        if tournament.creator_id == user_id or is_participant:
-            mine.append(_serialize_tournament(tournament))
+    joined = {
+        row.tournament_id for row in TournamentParticipant.query.with_entities(
+            TournamentParticipant.tournament_id
+        ).filter_by(user_id=user_id, status='registered')
+    }
+    mine = [
+        _serialize_tournament(tournament) for tournament in active
+        if tournament.creator_id == user_id or tournament.id in joined
+    ]
 
     return jsonify({'tournaments': mine})
 
@@ -1221,7 +1252,7 @@ def join_tournament(tournament_id):
     if already_registered:
         return jsonify({'error': 'Already registered'}), 400
 
-    if tournament.current_player_count >= tournament.max_players:
+    if tournament_counters.counts(tournament)[0] >= tournament.max_players:
         return jsonify({'error': 'Tournament is full'}), 400
 
     participant = add_tournament_participant(
@@ -1247,7 +1278,7 @@ def join_tournament(tournament_id):
     participant.status = 'registered'
     participant.payment_completed_at = datetime.utcnow()
     participant.paid_amount = tournament.entry_fee
-    tournament.current_player_count += 1
+    tournament.current_player_count = tournament_counters.counts(tournament)[0]
     tournament.prize_pool_amount += tournament.entry_fee
     _ensure_prize_pool(tournament)
 
@@ -1341,6 +1372,7 @@ def generate_bracket(tournament_id):
 
 
 @tournament_bp.route('/<int:tournament_id>/overview', methods=['GET'])
+@replica_reads
 def tournament_overview(tournament_id):
     tournament = Tournament.query.get_or_404(tournament_id)
     participants = TournamentParticipant.query.filter_by(tournament_id=tournament.id).all()
@@ -1348,6 +1380,9 @@ def tournament_overview(tournament_id):
 
     next_matches = [m for m in matches if m.status in {'scheduled', 'pending'}]
     recent_results = [m for m in matches if m.status == 'completed']
+    preload_users(p.user_id for p in participants)
+    _preload_match_users(matches)
+    _preload_tournament_users([tournament])
 
     return jsonify({
         'tournament': tournament.to_dict(),
@@ -1519,6 +1554,19 @@ def _start_roll(match, user_id):
     return roll, payload
 
 
+def _close_match_room(match):
+    """Abandon a no-show match's room if one was opened (committed by the caller)."""
+    if not match.game_room_id:
+        return None
+    from database import GameRoom
+    room = GameRoom.query.get(match.game_room_id)
+    if room is None or room.status not in ('waiting', 'in_progress', 'paused'):
+        return None
+    room.status = 'abandoned'
+    room.completed_at = datetime.utcnow()
+    return room
+
+
 def _resolve_roll(roll):
     """Resolve an expired roll: the waiting player wins by no-show."""
     match = TournamentMatch.query.get(roll.match_id)
@@ -1545,7 +1593,13 @@ def _resolve_roll(roll):
     roll.status = 'resolved'
     roll.winner_id = winner_id
     roll.resolved_at = datetime.utcnow()
+    room = _close_match_room(match)
     db.session.commit()
+    if room is not None:
+        from services.turn_timers import turn_timers
+        turn_timers.cancel(room.room_code)
+        room_registry.discard(room.room_code)
+        presence.clear_room(room.room_code)
 
     tournament = Tournament.query.get(match.tournament_id)
     resolved_payload = {
@@ -1580,9 +1634,7 @@ def process_scheduled_events():
         tournament = Tournament.query.get(schedule.tournament_id)
         if tournament is None or tournament.status != 'open':
             continue
-        registered = TournamentParticipant.query.filter_by(
-            tournament_id=tournament.id, status='registered'
-        ).count()
+        registered = tournament_counters.counts(tournament)[0]
         if registered >= tournament.max_players:
             _perform_tournament_lock(tournament)
         else:
@@ -1611,7 +1663,8 @@ def start_tournament_match_helper(tournament_id, match_id, user_id=None):
     initializing the GameEngine, and setting room status.
     """
     from database import GameRoom
-    from controllers.multiplayer_controller import generate_room_code
+    from controllers.multiplayer_controller import arm_turn_timer
+    from services.room_codes import room_codes
 
     tournament = Tournament.query.get(tournament_id)
     if not tournament:
@@ -1642,9 +1695,6 @@ def start_tournament_match_helper(tournament_id, match_id, user_id=None):
                 'status': match.status,
             }, 200
 
-    # Generate a unique room code
-    room_code = generate_room_code()
-
     game_manager = current_app.extensions.get('game_manager')
     if game_manager is None:
         return None, {'error': 'Game service is unavailable'}, 503
@@ -1655,7 +1705,6 @@ def start_tournament_match_helper(tournament_id, match_id, user_id=None):
 
     # Create new GameRoom
     room = GameRoom(
-        room_code=room_code,
         player1_id=match.player1_id,
         player2_id=match.player2_id,
         game_id=game_id,
@@ -1669,8 +1718,10 @@ def start_tournament_match_helper(tournament_id, match_id, user_id=None):
         started_at=datetime.utcnow(),
         created_at=datetime.utcnow()
     )
-    db.session.add(room)
-    db.session.flush()
+    room_codes.insert_room(room)
+    room_code = room.room_code
+    for player_id in (match.player1_id, match.player2_id):
+        presence.enter_room(room_code, player_id)
 
     match.game_room_id = room.id
     match.status = 'in_progress'
@@ -1684,6 +1735,8 @@ def start_tournament_match_helper(tournament_id, match_id, user_id=None):
         tournament.status = 'in_progress'
 
     db.session.commit()
+    arm_turn_timer(room)
+    room_registry.register(room)
 
     # Emit socket events to notify players and update tournament UI
     if _socketio:
@@ -1746,8 +1799,8 @@ def roll_match_endpoint(tournament_id, match_id):
     if match.game_room_id:
         room = GameRoom.query.get(match.game_room_id)
         if room is not None:
-            opponent_connected = room.player2_connected if match.player1_id == user_id else room.player1_connected
-            if opponent_connected:
+            opponent_id = match.player2_id if match.player1_id == user_id else match.player1_id
+            if opponent_id in presence.online_in_room(room.room_code):
                 return jsonify({'error': 'Your opponent is online — start the match instead'}), 400
 
     roll, payload = _start_roll(match, user_id)
@@ -1803,6 +1856,7 @@ def complete_match(tournament_id, match_id):
 def get_tournament(tournament_id):
     tournament = Tournament.query.get_or_404(tournament_id)
     participants = TournamentParticipant.query.filter_by(tournament_id=tournament.id).all()
+    preload_users(p.user_id for p in participants)
     return jsonify({
         'tournament': tournament.to_dict(),
         'participants': [_serialize_participant(p) for p in participants],
@@ -3,139 +3,138 @@ Database Configuration and Models
 SQLAlchemy setup for Dealuxe Card Game
 """
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session as OrmSession
 from werkzeug.security import generate_password_hash, check_password_hash
 
+from config import DatabaseConfig
+from services.read_replica import read_replica
 
-db = SQLAlchemy()
 
+class RoutingSession(FlaskSession):
+    """Sends @replica_reads SELECTs to the read replica, everything else to the primary."""
 
-def _table_has_column(table_name, column_name):
-    """Check whether an SQLite table already includes a column."""
-    if db.engine is None:
-        return False
-    if db.engine.name != 'sqlite':
-        return True
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing:
+            replica = read_replica.engine_for(self, clause)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
 
-    with db.engine.connect() as connection:
-        rows = connection.execute(text(f'PRAGMA table_info({table_name})')).fetchall()
-    return any(row[1] == column_name for row in rows)
 
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def ensure_tournament_schema():
-    """Add missing columns to existing tables when the database already exists.
+# Read-your-writes bookkeeping (see services/read_replica.py)
+event.listen(OrmSession, 'after_flush', lambda session, _ctx: read_replica.session_flushed(session))
+event.listen(OrmSession, 'after_commit', read_replica.session_committed)
+event.listen(OrmSession, 'after_rollback', read_replica.session_rolled_back)
 
-    SQLAlchemy's ``db.create_all()`` never alters existing tables, so every
-    new column added to the models after a database was first created must be
-    listed here or legacy databases (e.g. a pre-existing VPS install) will fail
-    with ``no such column``.
-    """
-    if db.engine is None:
-        return
 
-    if db.engine.name != 'sqlite':
-        return
+def _is_sqlite(uri):
+    return uri.startswith('sqlite')
 
-    # with db.session.begin():
-    #     for table_name, column_definition in [
-    #         ('users', 'is_super_admin BOOLEAN DEFAULT 0'),
-    #         ('bet_sessions', 'tournament_id INTEGER'),
-    #         ('game_rooms', 'tournament_id INTEGER'),
-    #         ('game_rooms', 'match_id INTEGER'),
-    #         ('game_rooms', 'is_tournament_game BOOLEAN DEFAULT 0'),
-    #         ('transactions', 'tournament_id INTEGER'),
-    #         ('tournament_participants', 'lock_voted BOOLEAN DEFAULT 0'),
-    #     ]:
-    #         column_name = column_definition.split()[0]
-    #         if not _table_has_column(table_name, column_name):
-    #             db.session.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {column_definition}'))
-
-    #     for index_sql in [
-    #         'CREATE INDEX IF NOT EXISTS idx_bet_sessions_tournament_id ON bet_sessions (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_game_rooms_tournament_id ON game_rooms (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_game_rooms_match_id ON game_rooms (match_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_transactions_tournament_id ON transactions (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments (status)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournaments_tournament_type ON tournaments (tournament_type)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_participants_tournament_id ON tournament_participants (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_participants_user_id ON tournament_participants (user_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_participants_status ON tournament_participants (status)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_brackets_tournament_id ON tournament_brackets (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_matches_tournament_id ON tournament_matches (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_matches_status ON tournament_matches (status)',
-    #         'CREATE INDEX IF NOT EXISTS idx_tournament_prize_pools_tournament_id ON tournament_prize_pools (tournament_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_user_id ON withdrawal_requests (user_id)',
-    #         'CREATE INDEX IF NOT EXISTS idx_withdrawal_requests_status ON withdrawal_requests (status)',
-    #     ]:
-    #         db.session.execute(text(index_sql))
-
-
-def ensure_user_account_schema():
-    """Add user-account / KYC columns to an existing ``users`` table.
-
-    ``db.create_all()`` never alters existing tables, so databases created
-    before these columns existed need ALTER TABLE (SQLite path shown; the
-    users table is small so this runs at startup inside init_db).
-    """
-    if db.engine is None:
-        return
-    if db.engine.name != 'sqlite':
-        return
 
-    user_columns = [
-        ('country', 'VARCHAR(50)'),
-        ('address', 'VARCHAR(200)'),
-        ('date_of_birth', 'DATE'),
-        ('id_number', 'VARCHAR(50)'),
-        ('kyc_document_path', 'VARCHAR(255)'),
-        ('id_photo_path', 'VARCHAR(255)'),
-        ('id_photo_back_path', 'VARCHAR(255)'),
-        ('kyc_status', "VARCHAR(20) DEFAULT 'not_submitted'"),
-        ('kyc_submitted_at', 'DATETIME'),
-    ]
-    with db.session.begin():
-        for column_name, column_definition in user_columns:
-            if not _table_has_column('users', column_name):
-                db.session.execute(text(f'ALTER TABLE users ADD COLUMN {column_name} {column_definition}'))
+def engine_options(uri, config=DatabaseConfig):
+    """SQLAlchemy engine options for ``uri`` (see config.DatabaseConfig)."""
+    if _is_sqlite(uri):
+        # The sqlite3 driver's own lock wait, on top of PRAGMA busy_timeout
+        return {'connect_args': {'timeout': config.SQLITE_BUSY_TIMEOUT_MS / 1000}}
+    return {
+        'pool_size': config.DB_POOL_SIZE,
+        'max_overflow': config.DB_MAX_OVERFLOW,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+        'pool_recycle': config.DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
 
 
-def ensure_payment_schema():
-    """Add payment-related columns to existing tables (SQLite path).
+def sqlite_pragmas(uri, config=DatabaseConfig):
+    """PRAGMA statements run on every new SQLite connection."""
+    pragmas = [
+        f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{config.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if ':memory:' not in uri and uri not in ('sqlite://', 'sqlite:///'):
+        pragmas.insert(0, f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        pragmas.append(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    return pragmas
+
+
+def _install_sqlite_pragmas(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _install_query_stats(app):
+    """Per-request query counts and the slow-query log (services/query_stats.py)."""
+    from services.query_stats import query_stats
+    query_stats.configure(
+        enabled=app.config.get('QUERY_STATS_ENABLED', DatabaseConfig.QUERY_STATS_ENABLED),
+        slow_query_ms=app.config.get('SLOW_QUERY_MS', DatabaseConfig.SLOW_QUERY_MS),
+        query_count_warn=app.config.get('QUERY_COUNT_WARN', DatabaseConfig.QUERY_COUNT_WARN),
+        add_header=app.config.get('QUERY_STATS_HEADER', DatabaseConfig.QUERY_STATS_HEADER),
+    )
+    query_stats.install(db.engine)
+    query_stats.init_app(app)
 
-    Legacy databases created before ``external_ref_id`` existed need the column
-    added via ALTER TABLE; the index is created with IF NOT EXISTS so startup
-    stays idempotent.
-    """
-    if db.engine is None:
-        return
-    if db.engine.name != 'sqlite':
+
+def _init_read_replica(app):
+    """Connect the read replica when DATABASE_REPLICA_URL is set."""
+    url = app.config.get('DATABASE_REPLICA_URL', DatabaseConfig.DATABASE_REPLICA_URL)
+    if not url:
         return
-    with db.session.begin():
-        if not _table_has_column('transactions', 'external_ref_id'):
-            db.session.execute(text('ALTER TABLE transactions ADD COLUMN external_ref_id VARCHAR(64)'))
-        if not _table_has_column('transactions', 'status'):
-            db.session.execute(text("ALTER TABLE transactions ADD COLUMN status VARCHAR(20) DEFAULT 'pending'"))
-        db.session.execute(text(
-            'CREATE INDEX IF NOT EXISTS idx_transactions_external_ref_id '
-            'ON transactions (external_ref_id)'
-        ))
+    engine = create_engine(url, **engine_options(url))
+    if _is_sqlite(url):
+        _install_sqlite_pragmas(engine, sqlite_pragmas(url))
+    read_replica.configure(
+        engine=engine,
+        sticky_seconds=app.config.get('REPLICA_STICKY_SECONDS', DatabaseConfig.REPLICA_STICKY_SECONDS),
+    )
+    from services.query_stats import query_stats
+    query_stats.install(engine)
+    print(f"[DATABASE] Read replica: {engine.name} ({engine.pool.__class__.__name__})")
 
 
 def init_db(app):
     """Initialize database with Flask app"""
-    # SQLite configuration (will switch to MySQL later)
-    app.config['SQLALCHEMY_DATABASE_URI'] ='sqlite:///dealuxe_game.db'
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or DatabaseConfig.DATABASE_URL
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ECHO'] = False  # Set to True for SQL debugging
+    app.config['SQLALCHEMY_ECHO'] = DatabaseConfig.ECHO_SQL
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(uri))
     
     db.init_app(app)
     
     with app.app_context():
-        db.create_all()
-        ensure_tournament_schema()
-        ensure_user_account_schema()
-        ensure_payment_schema()
+        if _is_sqlite(uri):
+            # Registered before the pool opens its first connection
+            _install_sqlite_pragmas(db.engine, sqlite_pragmas(uri))
+        print(f"[DATABASE] Engine: {db.engine.name} ({db.engine.pool.__class__.__name__})")
+        _install_query_stats(app)
+        _init_read_replica(app)
+        from services.tournament_counters import tournament_counters
+        tournament_counters.install()
+        # Schema changes are versioned in migrations/ and applied once per
+        # deploy (python -m migrations upgrade), not probed by every worker.
+        from migrations import pending, upgrade
+        if app.config.get('DB_AUTO_MIGRATE', DatabaseConfig.AUTO_MIGRATE):
+            upgrade()
+        else:
+            waiting = pending()
+            if waiting:
+                print(f"[DATABASE] {len(waiting)} pending migration(s) - run: python -m migrations upgrade")
+            db.session.remove()
         print("[DATABASE] Database initialized successfully")
 
 
@@ -291,39 +290,24 @@ class Player(db.Model):
         self.daily_spending_amount += amount
         self.last_spending_reset = self.last_spending_reset or datetime.utcnow()
 
-    def deduct_bet(self, amount, bet_type):
-        """Deduct bet amount from appropriate balance"""
-        from config import GameConfig
-        if not self.has_sufficient_balance(amount, bet_type):
+    def deduct_bet(self, amount, bet_type, **ledger):
+        """Deduct bet amount from appropriate balance (atomically; see services/wallet.py)"""
+        from services.wallet import wallet
+        if wallet.debit(self.id, amount, bet_type, transaction_type=TX_BET, **ledger) is None:
             return False
-        
-        if bet_type == GameConfig.BET_TYPE_REAL:
-            self.real_balance -= amount
-        elif bet_type == GameConfig.BET_TYPE_FAKE:
-            self.fake_balance -= amount
-        
-        self.total_wagered += amount
         db.session.commit()
         return True
     
-    def award_winnings(self, amount, bet_type):
+    def award_winnings(self, amount, bet_type, **ledger):
         """Award winnings to player's balance"""
-        from config import GameConfig
-        if bet_type == GameConfig.BET_TYPE_REAL:
-            self.real_balance += amount
-        elif bet_type == GameConfig.BET_TYPE_FAKE:
-            self.fake_balance += amount
-        
-        self.total_winnings += amount
+        from services.wallet import wallet
+        wallet.credit(self.id, amount, bet_type, transaction_type=TX_WIN, **ledger)
         db.session.commit()
     
     def record_game_result(self, won):
         """Update player statistics after a game"""
-        self.total_games += 1
-        if won:
-            self.wins += 1
-        else:
-            self.losses += 1
+        from services.wallet import wallet
+        wallet.record_results({self.id: won})
         db.session.commit()
     
     def get_win_rate(self):
@@ -481,9 +465,16 @@ class GameHistory(db.Model):
 # ========================================
 
 class Leaderboard(db.Model):
-    """Virtual table/view for leaderboard queries"""
+    """Maintained leaderboard rows, one per qualifying player.
+
+    Kept current by ``Player.record_game_result`` (see
+    services/leaderboard.py); ``score`` orders the board.
+    """
     __tablename__ = 'leaderboard'
-    __table_args__ = {'info': {'is_view': True}}
+    __table_args__ = (
+        db.Index('uq_leaderboard_user_id', 'user_id', unique=True),
+        db.Index('idx_leaderboard_score_user_id', 'score', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -493,21 +484,21 @@ class Leaderboard(db.Model):
     wins = db.Column(db.Integer)
     win_rate = db.Column(db.Float)
     total_winnings = db.Column(db.Float)
+    score = db.Column(db.BigInteger, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     @staticmethod
     def get_top_players(limit=10):
         """Get top players by win rate"""
         return db.session.query(
-            Player.id,
-            User.username,
-            Player.total_games,
-            Player.wins,
-            Player.total_winnings,
-            (Player.wins * 100.0 / db.func.nullif(Player.total_games, 0)).label('win_rate')
-        ).join(User).filter(
-            Player.total_games >= 5  # Minimum games to qualify
+            Leaderboard.player_id,
+            Leaderboard.username,
+            Leaderboard.total_games,
+            Leaderboard.wins,
+            Leaderboard.total_winnings,
+            Leaderboard.win_rate,
         ).order_by(
-            db.desc('win_rate')
+            Leaderboard.score.desc(), Leaderboard.user_id
         ).limit(limit).all()
 
 
@@ -532,6 +523,10 @@ TX_FREE_CASH = 'free_cash'        # Welcome / promotional free cash
 class Transaction(db.Model):
     """Log all wallet transactions for audit"""
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # Keyset pagination of one player's ledger (services/ledger.py)
+        db.Index('idx_transactions_player_created_id', 'player_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
@@ -554,10 +549,44 @@ class Transaction(db.Model):
     tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def to_dict(self):
+        """Convert to dictionary for JSON serialization"""
+        return {
+            'id': self.id,
+            'transaction_type': self.transaction_type,
+            'amount': self.amount,
+            'balance_type': self.balance_type,
+            'balance_before': self.balance_before,
+            'balance_after': self.balance_after,
+            'status': self.status,
+            'description': self.description,
+            'game_id': self.game_id,
+            'tournament_id': self.tournament_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
     def __repr__(self):
         return f'<Transaction {self.id} - {self.transaction_type}: {self.amount}>'
 
 
+class BalanceCheckpoint(db.Model):
+    """Periodic snapshot of a player's balances (see services/ledger.py)."""
+    __tablename__ = 'balance_checkpoints'
+    __table_args__ = (
+        db.Index('idx_balance_checkpoints_player_taken_at', 'player_id', 'taken_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('players.id'), nullable=False)
+    real_balance = db.Column(db.Float, nullable=False, default=0.0)
+    fake_balance = db.Column(db.Float, nullable=False, default=0.0)
+    last_transaction_id = db.Column(db.Integer, nullable=True)  # newest ledger row at snapshot time
+    taken_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<BalanceCheckpoint player {self.player_id} at {self.taken_at}>'
+
+
 class Tournament(db.Model):
     """Represents a tournament instance for the upgraded platform."""
     __tablename__ = 'tournaments'
@@ -578,6 +607,10 @@ class Tournament(db.Model):
     prize_pool_amount = db.Column(db.Float, nullable=False, default=0.0)
     max_players = db.Column(db.Integer, nullable=False)
     current_player_count = db.Column(db.Integer, nullable=False, default=1)
+    # Maintained per flush by services/tournament_counters.py
+    registered_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    lock_voter_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    lock_vote_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     status = db.Column(db.String(20), nullable=False, default='open')
     is_auto_lock = db.Column(db.Boolean, default=False)
     locked_player_count = db.Column(db.Integer, nullable=True)
@@ -609,6 +642,7 @@ class Tournament(db.Model):
             'prize_pool_amount': self.prize_pool_amount,
             'max_players': self.max_players,
             'current_player_count': self.current_player_count,
+            'registered_count': self.registered_count,
             'status': self.status,
             'is_auto_lock': self.is_auto_lock,
             'locked_player_count': self.locked_player_count,
@@ -631,7 +665,10 @@ class TournamentParticipant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tournament_id = db.Column(db.Integer, db.ForeignKey('tournaments.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    status = db.Column(db.String(20), nullable=False, default='registered')
+    # active_history: the tournament counters need the value being replaced
+    # even when the row was expired by a commit before it changed.
+    status = db.column_property(
+        db.Column(db.String(20), nullable=False, default='registered'), active_history=True)
     payment_status = db.Column(db.String(20), nullable=False, default='pending')
     transaction_id = db.Column(db.String(255), nullable=True)
     external_payment_id = db.Column(db.String(255), nullable=True)
@@ -641,7 +678,8 @@ class TournamentParticipant(db.Model):
     prize_awarded = db.Column(db.Float, nullable=False, default=0.0)
     registered_at = db.Column(db.DateTime, default=datetime.utcnow)
     payment_completed_at = db.Column(db.DateTime, nullable=True)
-    lock_voted = db.Column(db.Boolean, default=False)  # manual-lock consensus vote (D3)
+    lock_voted = db.column_property(
+        db.Column(db.Boolean, default=False), active_history=True)  # manual-lock consensus vote (D3)
     withdrew_at = db.Column(db.DateTime, nullable=True)
     notes = db.Column(db.Text, nullable=True)
 
@@ -679,6 +717,8 @@ class TournamentMatch(db.Model):
         db.CheckConstraint('card_count > 0', name='ck_tournament_matches_card_count_positive'),
         db.Index('idx_tournament_matches_tournament_id', 'tournament_id'),
         db.Index('idx_tournament_matches_status', 'status'),
+        db.Index('idx_tournament_matches_player1_status', 'player1_id', 'status'),
+        db.Index('idx_tournament_matches_player2_status', 'player2_id', 'status'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -991,6 +1031,13 @@ def add_tournament_participant(tournament_id, user_id, payment_status='pending',
 class GameRoom(db.Model):
     """Multiplayer game room for live player vs player games"""
     __tablename__ = 'game_rooms'
+    __table_args__ = (
+        # Hot-query indexes (migrations/003_hot_query_indexes.sql)
+        db.Index('idx_game_rooms_status_created_at', 'status', 'created_at'),
+        db.Index('idx_game_rooms_status_turn_deadline', 'status', 'turn_deadline'),
+        db.Index('idx_game_rooms_player1_status', 'player1_id', 'status'),
+        db.Index('idx_game_rooms_player2_status', 'player2_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     room_code = db.Column(db.String(10), unique=True, nullable=False, index=True)
@@ -1011,6 +1058,7 @@ class GameRoom(db.Model):
     current_turn_player = db.Column(db.Integer, nullable=True)  # user_id whose turn it is
     turn_deadline = db.Column(db.DateTime, nullable=True)  # when current turn expires
     turn_duration_seconds = db.Column(db.Integer, default=300)  # time limit per turn (5 minutes)
+    move_seq = db.Column(db.Integer, nullable=False, default=0)  # bumped per accepted move (compare-and-set)
     
     # Pause/Resume
     pause_requested_by = db.Column(db.Integer, nullable=True)  # user_id who requested pause
@@ -1041,14 +1089,12 @@ class GameRoom(db.Model):
     
     def to_dict(self):
         """Convert room to dictionary"""
-        from datetime import timedelta
-        player1_username = User.query.get(self.player1_id).username if self.player1_id else None
+        from services.identity_cache import username_for
+        from services.presence import presence
+        player1_username = username_for(self.player1_id)
         
-        # Check if creator is online (connected in last 2 minutes)
-        creator_online = False
-        if self.player1_last_seen:
-            time_since_seen = datetime.utcnow() - self.player1_last_seen
-            creator_online = time_since_seen.total_seconds() < 120  # 2 minutes
+        # Creator has a live (heartbeating) connection
+        creator_online = presence.is_online(self.player1_id)
         
         # Calculate room age and if it's expired (5 hours)
         room_age_hours = (datetime.utcnow() - self.created_at).total_seconds() / 3600
@@ -1060,7 +1106,7 @@ class GameRoom(db.Model):
             'player1_id': self.player1_id,
             'player2_id': self.player2_id,
             'player1_username': player1_username,
-            'player2_username': User.query.get(self.player2_id).username if self.player2_id else None,
+            'player2_username': username_for(self.player2_id),
             'created_by_username': player1_username,  # player1 is always the creator
             'creator_online': creator_online,
             'status': self.status,
@@ -1179,3 +1225,52 @@ class Snapshot(db.Model):
 
     def __repr__(self):
         return f'<Snapshot {self.id} - seq:{self.seq_num}>'
+
+
+class GameArchiveEntry(db.Model):
+    """Where an archived game lives in the cold-storage files (see services/game_archive.py)."""
+    __tablename__ = 'game_archive_index'
+
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, nullable=False, unique=True)
+    room_code = db.Column(db.String(10), nullable=False, index=True)
+    game_id = db.Column(db.String(100), nullable=True, index=True)
+    bet_session_id = db.Column(db.Integer, nullable=True, index=True)
+
+    archive_file = db.Column(db.String(100), nullable=False)  # name inside the archive directory
+    offset = db.Column(db.BigInteger, nullable=False)         # byte offset of the gzip member
+    length = db.Column(db.Integer, nullable=False)            # compressed size in bytes
+
+    completed_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<GameArchiveEntry {self.room_code} in {self.archive_file}@{self.offset}>'
+
+
+class SchedulerLease(db.Model):
+    """Leader lease for background sweeps when Redis is unavailable.
+
+    One row per lease name; whichever worker holds an unexpired row runs the
+    sweep (see services/leader_lease.py).
+    """
+    __tablename__ = 'scheduler_leases'
+
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(100), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder} until {self.expires_at}>'
+
+
+class SchemaMigration(db.Model):
+    """One row per applied file in migrations/ (see migrations/__init__.py)."""
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.version:03d} {self.name}>'
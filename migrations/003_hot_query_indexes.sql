@@ -0,0 +1,14 @@
+-- Composite indexes for the hot queries audited by tools/explain_hot_queries.py
+--   lobby:            game_rooms (status, created_at)
+--   AFK timers:       game_rooms (status, turn_deadline)
+--   disconnect:       game_rooms (player1_id, status) / (player2_id, status)
+--   my_next_match:    tournament_matches (player1_id, status) / (player2_id, status)
+-- MatchRoll (match_id, status) and TournamentParticipant (tournament_id, user_id)
+-- are already served by their unique constraints' indexes.
+
+CREATE INDEX IF NOT EXISTS idx_game_rooms_status_created_at ON game_rooms (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_game_rooms_status_turn_deadline ON game_rooms (status, turn_deadline);
+CREATE INDEX IF NOT EXISTS idx_game_rooms_player1_status ON game_rooms (player1_id, status);
+CREATE INDEX IF NOT EXISTS idx_game_rooms_player2_status ON game_rooms (player2_id, status);
+CREATE INDEX IF NOT EXISTS idx_tournament_matches_player1_status ON tournament_matches (player1_id, status);
+CREATE INDEX IF NOT EXISTS idx_tournament_matches_player2_status ON tournament_matches (player2_id, status);
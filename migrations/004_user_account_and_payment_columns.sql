@@ -0,0 +1,17 @@
+-- User-account / KYC and payment columns that init_db used to probe for on
+-- every boot (ensure_user_account_schema / ensure_payment_schema).
+-- The runner skips ADD COLUMN for columns that already exist.
+
+ALTER TABLE users ADD COLUMN country VARCHAR(50);
+ALTER TABLE users ADD COLUMN address VARCHAR(200);
+ALTER TABLE users ADD COLUMN date_of_birth DATE;
+ALTER TABLE users ADD COLUMN id_number VARCHAR(50);
+ALTER TABLE users ADD COLUMN kyc_document_path VARCHAR(255);
+ALTER TABLE users ADD COLUMN id_photo_path VARCHAR(255);
+ALTER TABLE users ADD COLUMN id_photo_back_path VARCHAR(255);
+ALTER TABLE users ADD COLUMN kyc_status VARCHAR(20) DEFAULT 'not_submitted';
+ALTER TABLE users ADD COLUMN kyc_submitted_at DATETIME;
+
+ALTER TABLE transactions ADD COLUMN external_ref_id VARCHAR(64);
+ALTER TABLE transactions ADD COLUMN status VARCHAR(20) DEFAULT 'pending';
+CREATE INDEX IF NOT EXISTS idx_transactions_external_ref_id ON transactions (external_ref_id);
@@ -0,0 +1,17 @@
+-- The leaderboard table becomes a maintained ranking (services/leaderboard.py).
+-- Backfill it afterwards with: python tools/rebuild_leaderboard.py
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER REFERENCES users (id),
+    player_id INTEGER REFERENCES players (id),
+    username VARCHAR(80),
+    total_games INTEGER,
+    wins INTEGER,
+    win_rate FLOAT,
+    total_winnings FLOAT
+);
+ALTER TABLE leaderboard ADD COLUMN score BIGINT DEFAULT 0;
+ALTER TABLE leaderboard ADD COLUMN updated_at DATETIME;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_leaderboard_user_id ON leaderboard (user_id);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard (score);
@@ -0,0 +1,16 @@
+-- Keyset pagination over a player's ledger and periodic balance checkpoints
+-- (services/ledger.py).
+
+CREATE INDEX IF NOT EXISTS idx_transactions_player_created_id
+    ON transactions (player_id, created_at, id);
+
+CREATE TABLE IF NOT EXISTS balance_checkpoints (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    real_balance FLOAT NOT NULL DEFAULT 0.0,
+    fake_balance FLOAT NOT NULL DEFAULT 0.0,
+    last_transaction_id INTEGER,
+    taken_at DATETIME NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_balance_checkpoints_player_taken_at
+    ON balance_checkpoints (player_id, taken_at);
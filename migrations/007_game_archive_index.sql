@@ -0,0 +1,17 @@
+-- Index of finished games moved to cold storage (services/game_archive.py).
+
+CREATE TABLE IF NOT EXISTS game_archive_index (
+    id INTEGER PRIMARY KEY,
+    room_id INTEGER NOT NULL UNIQUE,
+    room_code VARCHAR(10) NOT NULL,
+    game_id VARCHAR(100),
+    bet_session_id INTEGER,
+    archive_file VARCHAR(100) NOT NULL,
+    "offset" BIGINT NOT NULL,
+    length INTEGER NOT NULL,
+    completed_at DATETIME,
+    archived_at DATETIME
+);
+CREATE INDEX IF NOT EXISTS ix_game_archive_index_room_code ON game_archive_index (room_code);
+CREATE INDEX IF NOT EXISTS ix_game_archive_index_game_id ON game_archive_index (game_id);
+CREATE INDEX IF NOT EXISTS ix_game_archive_index_bet_session_id ON game_archive_index (bet_session_id);
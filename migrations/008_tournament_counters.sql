@@ -0,0 +1,23 @@
+-- Denormalized participant counters on tournaments, kept in step per flush
+-- by services/tournament_counters.py. Backfilled here from the participants;
+-- python tools/check_tournament_counters.py verifies them later.
+
+ALTER TABLE tournaments ADD COLUMN registered_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tournaments ADD COLUMN lock_voter_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tournaments ADD COLUMN lock_vote_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE tournaments SET
+    registered_count = (
+        SELECT COUNT(*) FROM tournament_participants p
+        WHERE p.tournament_id = tournaments.id AND p.status = 'registered'
+    ),
+    lock_voter_count = (
+        SELECT COUNT(*) FROM tournament_participants p
+        WHERE p.tournament_id = tournaments.id AND p.status = 'registered'
+          AND p.user_id <> tournaments.creator_id
+    ),
+    lock_vote_count = (
+        SELECT COUNT(*) FROM tournament_participants p
+        WHERE p.tournament_id = tournaments.id AND p.status = 'registered'
+          AND p.user_id <> tournaments.creator_id AND p.lock_voted = TRUE
+    );
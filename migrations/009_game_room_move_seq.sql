@@ -0,0 +1,5 @@
+-- Version of a live room's game state, bumped by every accepted game_action.
+-- handle_game_action claims a move with a compare-and-set on it, so a worker
+-- acting on a stale room registry copy cannot apply the move.
+
+ALTER TABLE game_rooms ADD COLUMN move_seq INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,6 @@
+-- Leaderboard order is (score DESC, user_id ASC). Index both columns so the
+-- table fallback for "my rank" counts the players ahead of a row (higher
+-- score, or same score and lower user_id) as index range scans.
+
+DROP INDEX IF EXISTS idx_leaderboard_score;
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score_user_id ON leaderboard (score, user_id);
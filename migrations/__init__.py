@@ -0,0 +1,126 @@
+"""
+Versioned schema migrations.
+
+Every ``NNN_description.sql`` file in this directory is one migration,
+applied once, in version order, and recorded in ``schema_migrations``.
+``init_db`` used to run ``db.create_all()`` plus several PRAGMA column probes
+on every worker boot (racing each other on ALTER TABLE); now the schema is
+brought up to date by one explicit step before the workers start:
+
+    python -m migrations status     # applied / pending versions
+    python -m migrations upgrade    # apply what is pending
+
+``upgrade()`` first creates any table the models define that does not exist
+yet (a fresh database gets the full current schema that way), then runs the
+pending files. Files are plain SQL statements separated by ``;``:
+``BEGIN``/``COMMIT`` lines are ignored (each migration is recorded in its
+own transaction), and ``ALTER TABLE ... ADD COLUMN`` is skipped when the
+column already exists, since SQLite has no ``ADD COLUMN IF NOT EXISTS``.
+
+In development ``init_db`` calls ``upgrade()`` itself (``DB_AUTO_MIGRATE``);
+elsewhere it only warns about pending migrations.
+"""
+from datetime import datetime
+import re
+from pathlib import Path
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
+from database import db, SchemaMigration
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent
+
+_FILENAME = re.compile(r'^(\d+)_(\w+)\.sql$')
+_ADD_COLUMN = re.compile(r'^ALTER\s+TABLE\s+(\w+)\s+ADD\s+COLUMN\s+(\w+)', re.IGNORECASE)
+_TRANSACTION_CONTROL = re.compile(r'^(BEGIN(\s+TRANSACTION)?|COMMIT|END(\s+TRANSACTION)?)$', re.IGNORECASE)
+
+
+class Migration:
+    """One SQL file in migrations/."""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def statements(self):
+        lines = [line for line in self.path.read_text(encoding='utf-8').splitlines()
+                 if not line.strip().startswith('--')]
+        for statement in '\n'.join(lines).split(';'):
+            statement = statement.strip()
+            if statement and not _TRANSACTION_CONTROL.match(statement):
+                yield statement
+
+    def __repr__(self):
+        return f'<Migration {self.version:03d}_{self.name}>'
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Every migration file, in version order."""
+    migrations = []
+    for path in Path(directory).glob('*.sql'):
+        match = _FILENAME.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    versions = [m.version for m in migrations]
+    duplicates = {v for v in versions if versions.count(v) > 1}
+    if duplicates:
+        raise RuntimeError(f"Duplicate migration versions: {sorted(duplicates)}")
+    return sorted(migrations, key=lambda m: m.version)
+
+
+def applied_versions(connection=None):
+    """Versions recorded in ``schema_migrations`` (empty before the first run)."""
+    connection = connection or db.session.connection()
+    if not inspect(connection).has_table(SchemaMigration.__tablename__):
+        return set()
+    return {row[0] for row in connection.execute(db.select(SchemaMigration.version))}
+
+
+def pending(directory=MIGRATIONS_DIR):
+    done = applied_versions()
+    return [m for m in discover(directory) if m.version not in done]
+
+
+def _column_exists(connection, table, column):
+    inspector = inspect(connection)
+    if not inspector.has_table(table):
+        return False
+    return any(c['name'] == column for c in inspector.get_columns(table))
+
+
+def apply(migration, engine=None):
+    """Run one migration and record it. Returns False if another runner got there first."""
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        if migration.version in applied_versions(connection):
+            return False
+        for statement in migration.statements():
+            add_column = _ADD_COLUMN.match(statement)
+            if add_column and _column_exists(connection, *add_column.groups()):
+                continue
+            connection.exec_driver_sql(statement)
+        try:
+            connection.execute(db.insert(SchemaMigration).values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()))
+        except IntegrityError:
+            # A concurrent runner recorded it; every statement above is idempotent.
+            return False
+    return True
+
+
+def upgrade(directory=MIGRATIONS_DIR):
+    """Bring the schema up to date (call inside an app context).
+
+    Returns the migrations applied by this call.
+    """
+    db.create_all()
+    applied = []
+    for migration in pending(directory):
+        db.session.remove()
+        if apply(migration):
+            print(f"[MIGRATIONS] Applied {migration.version:03d}_{migration.name}")
+            applied.append(migration)
+    db.session.remove()
+    return applied
@@ -0,0 +1,46 @@
+"""Apply or inspect schema migrations: ``python -m migrations [status|upgrade]``.
+
+Run ``upgrade`` once per deploy, before starting the workers.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from flask import Flask
+
+from database import init_db
+from migrations import applied_versions, discover, upgrade
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _make_app():
+    """A bare app bound to the same database as the server (no auto-migrate)."""
+    # Same instance/ folder as app.py, so relative SQLite URLs hit the same file
+    app = Flask(__name__, instance_path=str(PROJECT_ROOT / 'instance'))
+    app.config['DB_AUTO_MIGRATE'] = False
+    init_db(app)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m migrations', description='Dealuxe schema migrations.')
+    parser.add_argument('command', nargs='?', choices=('status', 'upgrade'), default='status')
+    args = parser.parse_args(argv)
+
+    app = _make_app()
+    with app.app_context():
+        if args.command == 'upgrade':
+            applied = upgrade()
+            print(f"{len(applied)} migration(s) applied")
+            return 0
+
+        done = applied_versions()
+        for migration in discover():
+            state = 'applied' if migration.version in done else 'pending'
+            print(f"{migration.version:03d}  {state:8} {migration.name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
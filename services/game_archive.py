@@ -0,0 +1,250 @@
+"""
+Cold storage for finished games.
+
+``game_rooms``, ``bet_sessions`` and ``moves`` only ever grew, and every move
+row carries a full JSON engine snapshot, so the tables the live game paths
+read kept pushing their own indexes out of the page cache. ``archive()``
+moves completed / abandoned rooms older than ``GAME_ARCHIVE_AFTER_DAYS`` out
+of the database:
+
+  - each game (room + bet session + moves) becomes one JSON record,
+    gzip-compressed as its own gzip member and appended to the file for the
+    day it finished (``games-YYYY-MM-DD.jsonl.gz``). Files are append-only;
+    concatenated members are still one valid gzip stream, so
+    ``zcat games-2026-01-01.jsonl.gz`` prints one game per line;
+  - ``game_archive_index`` records the file, byte offset and length of every
+    game by room id, room code, game id and bet session id, so a single game
+    is one seek + one small decompress;
+  - the files are fsynced before the index rows are written and the hot rows
+    deleted in one transaction. A crash in between leaves an unreferenced
+    member in the file, never a game that exists in neither place.
+
+Ledger rows keep their ``game_id``; their ``session_id`` is cleared because
+the bet session row is gone (the archive index still maps it). Rooms of a
+tournament that is still running stay put -- the bracket views read them.
+
+``load()`` returns a game from the live tables or the archive in the same
+shape, which backs the replay endpoint (``GET /api/game/<game_id>/replay``).
+
+    from services.game_archive import game_archive
+    game_archive.archive()                    # scheduler, hourly, in batches
+    game_archive.load(game_id='...')          # {'room', 'bet_session', 'moves'}
+
+Run it by hand with ``python tools/archive_games.py [--days N]``.
+"""
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, or_
+
+from database import (
+    db, BetSession, GameArchiveEntry, GameHistory, GameRoom, Move, Tournament,
+    TournamentMatch, Transaction,
+)
+
+ARCHIVABLE_STATUSES = ('completed', 'abandoned')
+FINISHED_TOURNAMENT_STATUSES = ('completed', 'cancelled')
+DEFAULT_AFTER_DAYS = 30
+DEFAULT_BATCH_SIZE = 200
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _row(model):
+    return {column.name: _jsonable(getattr(model, column.name)) for column in model.__table__.columns}
+
+
+def _json_or_text(value):
+    if value is None:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+class GameArchive:
+    """Moves finished games into daily compressed files and reads them back."""
+
+    def __init__(self):
+        self._directory = None
+
+    def configure(self, directory=None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        directory = (self._directory or current_app.config.get('GAME_ARCHIVE_DIR')
+                     or os.path.join(current_app.instance_path, 'archive'))
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    # ---- Archiving -------------------------------------------------------
+
+    def archivable(self, cutoff, limit):
+        """Finished rooms older than ``cutoff`` that no running tournament still needs."""
+        finished_at = func.coalesce(GameRoom.completed_at, GameRoom.created_at)
+        running_match = db.session.query(TournamentMatch.id) \
+            .join(Tournament, Tournament.id == TournamentMatch.tournament_id) \
+            .filter(TournamentMatch.game_room_id == GameRoom.id,
+                    Tournament.status.notin_(FINISHED_TOURNAMENT_STATUSES))
+        return GameRoom.query.filter(
+            GameRoom.status.in_(ARCHIVABLE_STATUSES),
+            finished_at < cutoff,
+            ~running_match.exists(),
+        ).order_by(GameRoom.id).limit(limit).all()
+
+    def archive(self, cutoff=None, batch_size=None, max_batches=None):
+        """Archive finished games older than ``cutoff``. Returns the number archived."""
+        config = current_app.config
+        if cutoff is None:
+            days = config.get('GAME_ARCHIVE_AFTER_DAYS', DEFAULT_AFTER_DAYS)
+            cutoff = datetime.utcnow() - timedelta(days=days)
+        batch_size = batch_size or config.get('GAME_ARCHIVE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+
+        archived = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            rooms = self.archivable(cutoff, batch_size)
+            if not rooms:
+                break
+            archived += self._archive_batch(rooms)
+            batches += 1
+            if len(rooms) < batch_size:
+                break
+        if archived:
+            print(f"[ARCHIVE] Archived {archived} finished game(s) older than {cutoff:%Y-%m-%d}")
+        return archived
+
+    def _archive_batch(self, rooms):
+        session_ids = [room.bet_session_id for room in rooms if room.bet_session_id]
+        sessions = {s.id: s for s in BetSession.query.filter(BetSession.id.in_(session_ids))} if session_ids else {}
+        moves = {}
+        if session_ids:
+            for move in Move.query.filter(Move.bet_session_id.in_(session_ids)) \
+                    .order_by(Move.bet_session_id, Move.seq_num):
+                moves.setdefault(move.bet_session_id, []).append(move)
+
+        # 1. Append every game to its day's file and make it durable.
+        entries = []
+        handles = {}
+        try:
+            for room in rooms:
+                finished_at = room.completed_at or room.created_at
+                name = f"games-{finished_at:%Y-%m-%d}.jsonl.gz"
+                handle = handles.get(name)
+                if handle is None:
+                    handle = handles[name] = open(os.path.join(self.directory, name), 'ab')
+                record = {
+                    'room': _row(room),
+                    'bet_session': _row(sessions[room.bet_session_id]) if room.bet_session_id in sessions else None,
+                    'moves': [self._move(m) for m in moves.get(room.bet_session_id, [])],
+                    'archived_at': datetime.utcnow().isoformat(),
+                }
+                blob = gzip.compress(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+                offset = handle.seek(0, os.SEEK_END)
+                handle.write(blob)
+                entries.append({
+                    'room_id': room.id, 'room_code': room.room_code, 'game_id': room.game_id,
+                    'bet_session_id': room.bet_session_id, 'archive_file': name,
+                    'offset': offset, 'length': len(blob), 'completed_at': finished_at,
+                    'archived_at': datetime.utcnow(),
+                })
+            for handle in handles.values():
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+        # 2. Index them and drop the hot rows in one transaction.
+        room_ids = [room.id for room in rooms]
+        try:
+            db.session.query(GameArchiveEntry).filter(GameArchiveEntry.room_id.in_(room_ids)) \
+                .delete(synchronize_session=False)
+            db.session.execute(db.insert(GameArchiveEntry), entries)
+            if session_ids:
+                db.session.query(Move).filter(Move.bet_session_id.in_(session_ids)) \
+                    .delete(synchronize_session=False)
+                db.session.query(Transaction).filter(Transaction.session_id.in_(session_ids)) \
+                    .update({'session_id': None}, synchronize_session=False)
+                db.session.query(GameHistory).filter(GameHistory.session_id.in_(session_ids)) \
+                    .update({'session_id': None}, synchronize_session=False)
+            db.session.query(GameRoom).filter(GameRoom.id.in_(room_ids)).delete(synchronize_session=False)
+            if session_ids:
+                db.session.query(BetSession).filter(BetSession.id.in_(session_ids)) \
+                    .delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            # The appended members stay unreferenced; the rows are archived again next run.
+            db.session.rollback()
+            raise
+        return len(rooms)
+
+    # ---- Reading ---------------------------------------------------------
+
+    def load(self, game_id=None, room_code=None, bet_session_id=None):
+        """One game as ``{'room', 'bet_session', 'moves', 'archived'}`` (None if unknown)."""
+        filters = self._filters(GameRoom, game_id, room_code, bet_session_id)
+        room = GameRoom.query.filter(or_(*filters)).first() if filters else None
+        if room is not None:
+            bet_session = db.session.get(BetSession, room.bet_session_id) if room.bet_session_id else None
+            moves = Move.query.filter_by(bet_session_id=room.bet_session_id).order_by(Move.seq_num).all() \
+                if room.bet_session_id else []
+            return {
+                'room': _row(room),
+                'bet_session': _row(bet_session) if bet_session else None,
+                'moves': [self._move(m) for m in moves],
+                'archived': False,
+            }
+
+        filters = self._filters(GameArchiveEntry, game_id, room_code, bet_session_id)
+        # Room codes are recycled, so the newest archived game wins.
+        entry = GameArchiveEntry.query.filter(or_(*filters)) \
+            .order_by(GameArchiveEntry.id.desc()).first() if filters else None
+        if entry is None:
+            return None
+        record = self.read(entry)
+        record['archived'] = True
+        return record
+
+    def read(self, entry):
+        """Decompress the record ``entry`` points at."""
+        with open(os.path.join(self.directory, entry.archive_file), 'rb') as handle:
+            handle.seek(entry.offset)
+            blob = handle.read(entry.length)
+        return json.loads(gzip.decompress(blob))
+
+    # ---- Internals -------------------------------------------------------
+
+    @staticmethod
+    def _filters(model, game_id, room_code, bet_session_id):
+        filters = []
+        if game_id:
+            filters.append(model.game_id == game_id)
+        if room_code:
+            filters.append(model.room_code == room_code)
+        if bet_session_id:
+            filters.append(model.bet_session_id == bet_session_id)
+        return filters
+
+    @staticmethod
+    def _move(move):
+        return {
+            'seq_num': move.seq_num,
+            'player_id': move.player_id,
+            'action_type': move.action_type,
+            'action_payload': _json_or_text(move.action_payload),
+            'result_snapshot': _json_or_text(move.result_snapshot),
+            'created_at': _jsonable(move.created_at),
+        }
+
+
+game_archive = GameArchive()
@@ -0,0 +1,93 @@
+"""
+Request-scoped username / identity cache with a bulk loader.
+
+Serializers such as ``GameRoom.to_dict`` and the tournament/admin payload
+builders used to look users up one at a time, so a 20-room lobby or a
+64-player bracket cost dozens to hundreds of queries. List builders now call
+``preload_users()`` with every user id they are about to render (one
+``IN (...)`` query), and the per-item serializers read from the cache via
+``username_for()``. Ids that weren't preloaded still resolve, one query each,
+and are remembered for the rest of the request.
+
+The cache lives on ``flask.g``, i.e. for one app context: one HTTP request,
+one Socket.IO event, or one ``with app.app_context()`` block in a background
+task. Only plain values are cached (never ORM instances), so commits in the
+middle of a request can't expire them into extra queries.
+
+    preload_users(p.user_id for p in participants)
+    names = [username_for(p.user_id) for p in participants]
+"""
+from flask import g, has_app_context
+
+# Keep each IN (...) below SQLite's default bound-parameter limit.
+_CHUNK_SIZE = 500
+
+
+def _cache():
+    if not has_app_context():
+        return None
+    cache = g.get('_identity_cache')
+    if cache is None:
+        cache = g._identity_cache = {}
+    return cache
+
+
+def _normalise_ids(user_ids):
+    ids = set()
+    for user_id in user_ids:
+        if user_id:
+            try:
+                ids.add(int(user_id))
+            except (TypeError, ValueError):
+                continue
+    return ids
+
+
+def _load(user_ids):
+    from database import db, User
+
+    found = {}
+    ids = sorted(user_ids)
+    for start in range(0, len(ids), _CHUNK_SIZE):
+        chunk = ids[start:start + _CHUNK_SIZE]
+        rows = db.session.query(User.id, User.username).filter(User.id.in_(chunk)).all()
+        for user_id, username in rows:
+            found[user_id] = {'id': user_id, 'username': username}
+    return found
+
+
+def preload_users(user_ids):
+    """Bulk-load identities for ``user_ids`` (None/duplicates ignored) in one query."""
+    ids = _normalise_ids(user_ids)
+    cache = _cache()
+    missing = ids - cache.keys() if cache is not None else ids
+    if not missing:
+        return
+    found = _load(missing)
+    if cache is not None:
+        for user_id in missing:
+            # Remember misses too, so unknown ids aren't re-queried.
+            cache[user_id] = found.get(user_id)
+
+
+def identity_for(user_id):
+    """``{'id', 'username'}`` for a user, or None if the user doesn't exist."""
+    if not user_id:
+        return None
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    cache = _cache()
+    if cache is not None and user_id in cache:
+        return cache[user_id]
+    identity = _load({user_id}).get(user_id)
+    if cache is not None:
+        cache[user_id] = identity
+    return identity
+
+
+def username_for(user_id):
+    identity = identity_for(user_id)
+    return identity['username'] if identity else None
+
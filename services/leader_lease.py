@@ -0,0 +1,136 @@
+"""
+Leader election for the background scheduler.
+
+Every gunicorn worker imports app.py and starts its own scheduler thread, so
+without coordination N workers each run ``process_scheduled_events`` and the
+turn-timer reconciliation, duplicating DB scans and racing on roll
+resolution. Each worker instead tries to take a short, renewable lease every
+tick and only the holder runs the sweeps. A worker that dies simply stops
+renewing; another one takes over once the lease expires.
+
+The lease lives in Redis (``SET NX PX`` + compare-and-renew) when available,
+otherwise in the ``scheduler_leases`` table:
+
+    lease = LeaderLease('scheduler', ttl_seconds=60, redis_client=client)
+    if lease.acquire_or_renew():
+        run_sweeps()
+"""
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+
+# Renew / release only while we still hold the lease (compare-and-set).
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def default_holder_id():
+    """Identify this worker process: host, pid and a random suffix."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaderLease:
+    """A named, expiring lease held by at most one worker at a time."""
+
+    def __init__(self, name, ttl_seconds=60, redis_client=None, holder_id=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.redis = redis_client
+        self.holder_id = holder_id or default_holder_id()
+        self.is_leader = False
+
+    @property
+    def redis_key(self):
+        return f"leader-lease:{self.name}"
+
+    def acquire_or_renew(self):
+        """Take the lease if free, or extend it if we hold it. Returns True when leader."""
+        was_leader = self.is_leader
+        try:
+            if self.redis is not None:
+                self.is_leader = self._acquire_redis()
+            else:
+                self.is_leader = self._acquire_db()
+        except Exception as exc:
+            print(f"[LEASE] Could not acquire '{self.name}' lease: {exc}")
+            self.is_leader = False
+
+        if self.is_leader != was_leader:
+            state = 'acquired' if self.is_leader else 'lost'
+            print(f"[LEASE] {self.holder_id} {state} '{self.name}' lease")
+        return self.is_leader
+
+    def release(self):
+        """Give the lease up early (e.g. on shutdown) so another worker can take over."""
+        try:
+            if self.redis is not None:
+                self.redis.eval(_RELEASE_SCRIPT, 1, self.redis_key, self.holder_id)
+            else:
+                self._release_db()
+        except Exception as exc:
+            print(f"[LEASE] Could not release '{self.name}' lease: {exc}")
+        self.is_leader = False
+
+    # ---- Redis ---------------------------------------------------------
+
+    def _acquire_redis(self):
+        ttl_ms = int(self.ttl_seconds * 1000)
+        if self.redis.set(self.redis_key, self.holder_id, nx=True, px=ttl_ms):
+            return True
+        return bool(self.redis.eval(_RENEW_SCRIPT, 1, self.redis_key, self.holder_id, ttl_ms))
+
+    # ---- Database fallback ---------------------------------------------
+
+    def _acquire_db(self):
+        from database import db, SchedulerLease
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        try:
+            # Renew our own lease or steal an expired one in a single UPDATE.
+            updated = SchedulerLease.query.filter(
+                SchedulerLease.name == self.name,
+                db.or_(SchedulerLease.holder == self.holder_id,
+                       SchedulerLease.expires_at < now),
+            ).update({'holder': self.holder_id, 'expires_at': expires_at},
+                     synchronize_session=False)
+            if updated:
+                db.session.commit()
+                return True
+
+            if SchedulerLease.query.get(self.name) is not None:
+                db.session.rollback()
+                return False
+
+            db.session.add(SchedulerLease(name=self.name, holder=self.holder_id, expires_at=expires_at))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            # Another worker inserted the row first.
+            db.session.rollback()
+            return False
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _release_db(self):
+        from database import db, SchedulerLease
+
+        SchedulerLease.query.filter_by(name=self.name, holder=self.holder_id).delete(
+            synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,282 @@
+"""
+Incrementally maintained leaderboard.
+
+``Leaderboard.get_top_players`` used to compute every player's win rate over
+the whole ``players`` table (joined with ``users``) and sort it on every
+``/leaderboard`` request. The ranking is now maintained as results come in:
+
+  - ``Player.record_game_result`` calls ``leaderboard.record(player)``, which
+    upserts the player's ``leaderboard`` row in the same transaction. Each row
+    carries an integer ``score`` (win rate in basis points, then wins as the
+    tie-break) with an index on it, so top-N is an index walk;
+  - with Redis configured the scores are mirrored into the sorted set
+    ``leaderboard:scores`` after the transaction commits, and "my rank" /
+    "players around me" are ``ZREVRANK`` / ``ZREVRANGE`` -- O(log n). Without
+    Redis (or for a player the set does not have yet) the same queries run
+    against the table, counting the players ahead on the ``(score, user_id)``
+    index up to ``RANK_SCAN_LIMIT``; past that the rank reads as ``None``;
+  - equal scores rank by user_id ascending everywhere. Redis orders equal
+    scores by member, descending under ``ZREV*``, so members are the
+    zero-padded complement ``_ID_CAP - user_id`` (see ``_member``);
+  - ``rebuild()`` (``python tools/rebuild_leaderboard.py``) recomputes every
+    row and the sorted set from ``players``, for backfills and repairs.
+
+Players need ``MIN_GAMES`` finished games to appear, as before. Entries carry
+the public fields only (no ``user_id``).
+
+    from services.leaderboard import leaderboard
+    leaderboard.configure(redis_client=manager.redis_client)
+    leaderboard.top(10); leaderboard.rank(user_id); leaderboard.around(user_id, 5)
+"""
+from datetime import datetime
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+MIN_GAMES = 5
+RANK_SCAN_LIMIT = 10_000
+REDIS_KEY = 'leaderboard:scores'
+_WINS_CAP = 1_000_000
+_SESSION_KEY = 'leaderboard_scores'
+_ID_CAP = 10 ** 12
+_ID_WIDTH = 12
+
+
+def _member(user_id):
+    """Sorted-set member for ``user_id``: descending members are ascending ids."""
+    return f"{_ID_CAP - int(user_id):0{_ID_WIDTH}d}"
+
+
+def _user_id(member):
+    if isinstance(member, bytes):
+        member = member.decode()
+    return _ID_CAP - int(member)
+
+
+def score_for(wins, total_games):
+    """Sortable integer score: win rate (basis points), then wins."""
+    if not total_games:
+        return 0
+    basis_points = int(round(wins * 10000 / total_games))
+    return basis_points * _WINS_CAP + min(wins, _WINS_CAP - 1)
+
+
+class LeaderboardService:
+    """Maintains the ``leaderboard`` table (and optional Redis sorted set)."""
+
+    def __init__(self):
+        self._redis = None
+
+    def configure(self, redis_client=None):
+        self._redis = redis_client
+
+    # ---- Writes ----------------------------------------------------------
+
+    def record(self, player):
+        """Refresh ``player``'s row in the current session (committed by the caller)."""
+        from database import db, Leaderboard, User
+
+        row = Leaderboard.query.filter_by(user_id=player.user_id).first()
+        if (player.total_games or 0) < MIN_GAMES:
+            if row is not None:
+                db.session.delete(row)
+            self._queue_redis(db.session, player.user_id, None)
+            return None
+
+        if row is None:
+            row = Leaderboard(user_id=player.user_id, player_id=player.id)
+            db.session.add(row)
+        if not row.username:
+            user = db.session.get(User, player.user_id)
+            row.username = user.username if user else None
+        row.total_games = player.total_games
+        row.wins = player.wins
+        row.total_winnings = player.total_winnings
+        row.win_rate = player.get_win_rate()
+        row.score = score_for(player.wins, player.total_games)
+        row.updated_at = datetime.utcnow()
+        self._queue_redis(db.session, player.user_id, row.score)
+        return row
+
+    def rebuild(self, batch_size=1000):
+        """Recompute every row (and the Redis set) from ``players``. Returns the row count."""
+        from database import db, Leaderboard, Player, User
+
+        db.session.query(Leaderboard).delete(synchronize_session=False)
+        rows = db.session.query(
+            Player.id, Player.user_id, User.username, Player.total_games,
+            Player.wins, Player.total_winnings,
+        ).join(User, User.id == Player.user_id).filter(Player.total_games >= MIN_GAMES)
+
+        now = datetime.utcnow()
+        scores = {}
+        batch = []
+        for player_id, user_id, username, total_games, wins, winnings in rows.yield_per(batch_size):
+            score = score_for(wins, total_games)
+            scores[user_id] = score
+            batch.append({
+                'user_id': user_id, 'player_id': player_id, 'username': username,
+                'total_games': total_games, 'wins': wins, 'total_winnings': winnings,
+                'win_rate': wins * 100.0 / total_games, 'score': score, 'updated_at': now,
+            })
+            if len(batch) >= batch_size:
+                db.session.execute(db.insert(Leaderboard), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(Leaderboard), batch)
+        db.session.commit()
+
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline()
+                pipe.delete(REDIS_KEY)
+                items = list(scores.items())
+                for start in range(0, len(items), batch_size):
+                    pipe.zadd(REDIS_KEY, {_member(uid): score for uid, score in items[start:start + batch_size]})
+                pipe.execute()
+            except Exception as exc:
+                print(f"[LEADERBOARD] Redis rebuild failed: {exc}")
+        print(f"[LEADERBOARD] Rebuilt {len(scores)} row(s)")
+        return len(scores)
+
+    # ---- Reads -----------------------------------------------------------
+
+    def top(self, limit=10):
+        """The best ``limit`` rows, best first, as dicts with ``rank``."""
+        from database import Leaderboard
+
+        rows = Leaderboard.query.order_by(Leaderboard.score.desc(), Leaderboard.user_id) \
+            .limit(limit).all()
+        return [self._entry(row, rank) for rank, row in enumerate(rows, 1)]
+
+    def rank(self, user_id):
+        """1-based rank of ``user_id`` (``None`` when not on the board, or too
+        far down for the table fallback -- see ``RANK_SCAN_LIMIT``)."""
+        position = self._redis_rank(user_id)
+        if position is not None:
+            return position
+        row = self._row(user_id)
+        if row is None:
+            return None
+        return self._table_rank(row)
+
+    def around(self, user_id, radius=5):
+        """Up to ``radius`` rows either side of ``user_id``, with ranks."""
+        from database import Leaderboard
+
+        row = self._row(user_id)
+        if row is None:
+            return []
+
+        my_rank = self._redis_rank(user_id)
+        if my_rank is not None:
+            try:
+                start = max(0, my_rank - 1 - radius)
+                ids = [_user_id(m) for m in self._redis.zrevrange(REDIS_KEY, start, my_rank - 1 + radius)]
+                by_id = {r.user_id: r for r in Leaderboard.query.filter(Leaderboard.user_id.in_(ids))}
+                return [self._entry(by_id[uid], start + offset + 1)
+                        for offset, uid in enumerate(ids) if uid in by_id]
+            except Exception as exc:
+                print(f"[LEADERBOARD] Redis range failed, using table: {exc}")
+
+        above = self._ahead_of(row).order_by(Leaderboard.score.asc(), Leaderboard.user_id.desc()) \
+            .limit(radius).all()
+        below = Leaderboard.query.filter(
+            (Leaderboard.score < row.score)
+            | ((Leaderboard.score == row.score) & (Leaderboard.user_id > row.user_id))
+        ).order_by(Leaderboard.score.desc(), Leaderboard.user_id).limit(radius).all()
+        window = list(reversed(above)) + [row] + below
+        my_rank = self._table_rank(row)
+        if my_rank is None:
+            return [self._entry(r, None) for r in window]
+        first_rank = my_rank - len(above)
+        return [self._entry(r, first_rank + i) for i, r in enumerate(window)]
+
+    # ---- Internals -------------------------------------------------------
+
+    def _redis_rank(self, user_id):
+        """Rank from the sorted set; ``None`` without Redis or when the member is missing."""
+        if self._redis is None:
+            return None
+        try:
+            position = self._redis.zrevrank(REDIS_KEY, _member(user_id))
+        except Exception as exc:
+            print(f"[LEADERBOARD] Redis rank failed, using table: {exc}")
+            return None
+        # A missing member (commit not pushed yet, failed push, set not rebuilt)
+        # falls back to the table rather than reading as "not ranked".
+        return None if position is None else position + 1
+
+    @staticmethod
+    def _row(user_id):
+        from database import Leaderboard
+        return Leaderboard.query.filter_by(user_id=user_id).first()
+
+    @staticmethod
+    def _table_rank(row):
+        """Rank from the table, or ``None`` past ``RANK_SCAN_LIMIT`` players ahead."""
+        from database import db, Leaderboard
+
+        # Two range scans on (score, user_id), each stopped at the limit
+        higher = select(Leaderboard.score).where(Leaderboard.score > row.score) \
+            .limit(RANK_SCAN_LIMIT).subquery()
+        tied = select(Leaderboard.user_id).where(
+            Leaderboard.score == row.score, Leaderboard.user_id < row.user_id
+        ).limit(RANK_SCAN_LIMIT).subquery()
+        ahead = db.session.scalar(select(func.count()).select_from(higher))
+        if ahead < RANK_SCAN_LIMIT:
+            ahead += db.session.scalar(select(func.count()).select_from(tied))
+        if ahead >= RANK_SCAN_LIMIT:
+            return None
+        return ahead + 1
+
+    @staticmethod
+    def _ahead_of(row):
+        from database import Leaderboard
+        return Leaderboard.query.filter(
+            (Leaderboard.score > row.score)
+            | ((Leaderboard.score == row.score) & (Leaderboard.user_id < row.user_id))
+        )
+
+    @staticmethod
+    def _entry(row, rank):
+        return {
+            'rank': rank,
+            'username': row.username,
+            'total_games': row.total_games,
+            'wins': row.wins,
+            'total_winnings': row.total_winnings,
+            'win_rate': round(row.win_rate, 2) if row.win_rate else 0.0,
+        }
+
+    def _queue_redis(self, session, user_id, score):
+        if self._redis is not None:
+            session.info.setdefault(_SESSION_KEY, {})[user_id] = score
+
+    def _flush_redis(self, updates):
+        try:
+            pipe = self._redis.pipeline()
+            for user_id, score in updates.items():
+                if score is None:
+                    pipe.zrem(REDIS_KEY, _member(user_id))
+                else:
+                    pipe.zadd(REDIS_KEY, {_member(user_id): score})
+            pipe.execute()
+        except Exception as exc:
+            # The table is authoritative; rebuild() resyncs the set.
+            print(f"[LEADERBOARD] Redis update failed: {exc}")
+
+
+leaderboard = LeaderboardService()
+
+
+@event.listens_for(Session, 'after_commit')
+def _push_committed_scores(session):
+    updates = session.info.pop(_SESSION_KEY, None)
+    if updates and leaderboard._redis is not None:
+        leaderboard._flush_redis(updates)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_rolled_back_scores(session):
+    session.info.pop(_SESSION_KEY, None)
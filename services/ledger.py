@@ -0,0 +1,237 @@
+"""
+Wallet ledger reads: keyset pagination, balance history and statements.
+
+The account page and the admin activity view used to read a player's
+``transactions`` with ``ORDER BY id DESC LIMIT n`` and had no way to page
+further back; an OFFSET-based "next page" would re-read every skipped row.
+Pages are now keyset (cursor) based on ``(player_id, created_at, id)``,
+which the ``idx_transactions_player_created_id`` index serves directly: each
+page is one index seek no matter how deep the history is. The cursor is an
+opaque token for the last row of the previous page.
+
+"Balance at time T" does not re-sum the ledger either. ``checkpoint()``
+(hourly, from the background scheduler) snapshots the balances of players
+whose wallet changed since their last checkpoint into
+``balance_checkpoints``. ``balance_at()`` takes the newest checkpoint before
+T and the newest ledger row between it and T (every row records
+``balance_after``) -- two index seeks. Statements are the opening balance,
+the rows in the range (read in keyset batches) and the closing balance.
+
+    from services.ledger import ledger
+    rows, cursor = ledger.page(player.id, limit=50)
+    rows, cursor = ledger.page(player.id, limit=50, cursor=cursor)
+    ledger.balance_at(player.id, datetime(2026, 1, 1), 'real')
+"""
+import base64
+import binascii
+from datetime import datetime, timezone
+
+from sqlalchemy import func, or_
+
+from database import db, BalanceCheckpoint, Player, Transaction
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_BALANCE_COLUMNS = {'real': 'real_balance', 'fake': 'fake_balance'}
+
+
+def encode_cursor(transaction):
+    """Opaque cursor pointing just past ``transaction``."""
+    raw = f"{transaction.created_at.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """``(created_at, id)`` from a cursor; ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, _, tx_id = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii').partition('|')
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor') from None
+
+
+def _naive_utc(value):
+    """``created_at`` is naive UTC: convert an offset-aware timestamp to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_statement_range(args):
+    """``(start, end)`` from ``?start=&end=`` ISO timestamps (naive UTC); ``end`` defaults to now."""
+    try:
+        start = _naive_utc(datetime.fromisoformat(args['start']))
+        end = _naive_utc(datetime.fromisoformat(args['end'])) if args.get('end') else datetime.utcnow()
+    except KeyError:
+        raise ValueError('start is required') from None
+    except ValueError:
+        raise ValueError('start and end must be ISO timestamps') from None
+    if end < start:
+        raise ValueError('end must not be before start')
+    return start, end
+
+
+class LedgerService:
+    """Cursor-paged ledger reads and checkpointed balance history."""
+
+    # ---- Pages -----------------------------------------------------------
+
+    def page(self, player_id, limit=DEFAULT_PAGE_SIZE, cursor=None, balance_type=None):
+        """Newest-first page of ``player_id``'s ledger.
+
+        Returns ``(transactions, next_cursor)``; ``next_cursor`` is None on
+        the last page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        query = Transaction.query.filter(Transaction.player_id == player_id)
+        if balance_type:
+            query = query.filter(Transaction.balance_type == balance_type)
+        if cursor:
+            created_at, tx_id = decode_cursor(cursor)
+            query = query.filter(or_(
+                Transaction.created_at < created_at,
+                (Transaction.created_at == created_at) & (Transaction.id < tx_id),
+            ))
+        rows = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()) \
+            .limit(limit + 1).all()
+        if len(rows) > limit:
+            return rows[:limit], encode_cursor(rows[limit - 1])
+        return rows, None
+
+    def iter_range(self, player_id, start=None, end=None, balance_type=None, batch_size=500):
+        """Every ledger row in ``[start, end]``, oldest first, read in keyset batches."""
+        after = None
+        while True:
+            query = Transaction.query.filter(Transaction.player_id == player_id)
+            if balance_type:
+                query = query.filter(Transaction.balance_type == balance_type)
+            if start is not None:
+                query = query.filter(Transaction.created_at >= start)
+            if end is not None:
+                query = query.filter(Transaction.created_at <= end)
+            if after is not None:
+                query = query.filter(or_(
+                    Transaction.created_at > after.created_at,
+                    (Transaction.created_at == after.created_at) & (Transaction.id > after.id),
+                ))
+            batch = query.order_by(Transaction.created_at, Transaction.id).limit(batch_size).all()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            after = batch[-1]
+
+    # ---- Balance history -------------------------------------------------
+
+    def balance_at(self, player_id, at, balance_type='real', inclusive=True):
+        """``player_id``'s ``balance_type`` balance as of ``at``.
+
+        ``inclusive=False`` leaves out rows stamped exactly ``at`` (a
+        statement's opening balance precedes its first row).
+        """
+        column = self._balance_column(balance_type)
+        taken_by = BalanceCheckpoint.taken_at <= at if inclusive else BalanceCheckpoint.taken_at < at
+        created_by = Transaction.created_at <= at if inclusive else Transaction.created_at < at
+
+        checkpoint = BalanceCheckpoint.query.filter(
+            BalanceCheckpoint.player_id == player_id,
+            taken_by,
+        ).order_by(BalanceCheckpoint.taken_at.desc(), BalanceCheckpoint.id.desc()).first()
+
+        query = self._rows_with_balance(player_id, balance_type).filter(created_by)
+        if checkpoint is not None:
+            query = query.filter(Transaction.created_at > checkpoint.taken_at)
+        latest = query.order_by(Transaction.created_at.desc(), Transaction.id.desc()).first()
+        if latest is not None:
+            return latest.balance_after
+        if checkpoint is not None:
+            return getattr(checkpoint, column)
+
+        # Nothing recorded before ``at``: the earliest later snapshot still
+        # holds the balance from then (no recorded change in between).
+        first_row = self._rows_with_balance(player_id, balance_type) \
+            .filter(~created_by) \
+            .order_by(Transaction.created_at, Transaction.id).first()
+        first_checkpoint = BalanceCheckpoint.query.filter(
+            BalanceCheckpoint.player_id == player_id,
+            ~taken_by,
+        ).order_by(BalanceCheckpoint.taken_at, BalanceCheckpoint.id).first()
+        if first_row is not None and (first_checkpoint is None
+                                      or first_row.created_at <= first_checkpoint.taken_at):
+            return first_row.balance_before
+        if first_checkpoint is not None:
+            return getattr(first_checkpoint, column)
+        player = db.session.get(Player, player_id)
+        return getattr(player, column) if player else 0.0
+
+    def statement(self, player_id, start, end, balance_type='real'):
+        """Opening balance, ledger rows and closing balance for ``[start, end]``."""
+        return {
+            'player_id': player_id,
+            'balance_type': balance_type,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'opening_balance': self.balance_at(player_id, start, balance_type, inclusive=False),
+            'closing_balance': self.balance_at(player_id, end, balance_type),
+            'transactions': [tx.to_dict() for tx in
+                             self.iter_range(player_id, start, end, balance_type)],
+        }
+
+    # ---- Checkpoints -----------------------------------------------------
+
+    def checkpoint(self, batch_size=500):
+        """Snapshot every player whose wallet changed since their last checkpoint.
+
+        Returns the number of checkpoints written.
+        """
+        last_taken = db.select(func.max(BalanceCheckpoint.taken_at)) \
+            .where(BalanceCheckpoint.player_id == Player.id).scalar_subquery()
+        last_tx = db.select(func.max(Transaction.id)) \
+            .where(Transaction.player_id == Player.id).scalar_subquery()
+        changed = db.session.execute(
+            db.select(Player.id, Player.real_balance, Player.fake_balance, last_tx)
+            .where(or_(last_taken.is_(None), Player.updated_at > last_taken))
+            .order_by(Player.id)
+        )
+
+        now = datetime.utcnow()
+        written = 0
+        batch = []
+        for player_id, real_balance, fake_balance, last_transaction_id in changed:
+            batch.append({
+                'player_id': player_id,
+                'real_balance': real_balance or 0.0,
+                'fake_balance': fake_balance or 0.0,
+                'last_transaction_id': last_transaction_id,
+                'taken_at': now,
+            })
+            if len(batch) >= batch_size:
+                db.session.execute(db.insert(BalanceCheckpoint), batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(BalanceCheckpoint), batch)
+            written += len(batch)
+        db.session.commit()
+        return written
+
+    # ---- Internals -------------------------------------------------------
+
+    @staticmethod
+    def _balance_column(balance_type):
+        try:
+            return _BALANCE_COLUMNS[balance_type]
+        except KeyError:
+            raise ValueError(f"Unknown balance type: {balance_type!r}") from None
+
+    @staticmethod
+    def _rows_with_balance(player_id, balance_type):
+        return Transaction.query.filter(
+            Transaction.player_id == player_id,
+            Transaction.balance_type == balance_type,
+            Transaction.balance_after.isnot(None),
+        )
+
+
+ledger = LedgerService()
@@ -0,0 +1,307 @@
+"""
+Cached lobby snapshot with debounced add/remove deltas.
+
+``get_lobby`` used to query the waiting rooms (plus two user lookups per
+room) on every request, and every create/join broadcast an empty
+``lobby_updated`` so all lobby viewers re-requested at once. Instead the
+waiting rooms are kept as ready-to-send dicts:
+
+  - room changes call ``upsert()`` / ``remove()``, which update the snapshot
+    in place and queue a delta;
+  - queued deltas are flushed at most once per ``debounce_seconds`` as a
+    single ``lobby_delta`` {added, removed} broadcast (via the turn-timer
+    wheel, so nothing sleeps);
+  - ``rooms()`` serves the snapshot without touching the database.
+
+With Redis the snapshot lives in the ``lobby:rooms`` hash so every worker
+serves the same lobby; each worker reads it through a short-lived local copy.
+Without Redis it is a plain dict. Either way it is rebuilt from the database
+(``loader``) every ``refresh_seconds`` so a missed update can't linger.
+
+A rebuild must not drop a room upserted (or resurrect one removed) while the
+loader was reading. Every change is therefore also numbered in a short
+journal (``lobby:journal`` / ``lobby:seq`` in Redis, a dict in process): a
+rebuild notes the sequence before loading, and re-applies any later change
+on top of what it loaded. In Redis that happens in one script that fills a
+temporary key and ``RENAME``s it over the live snapshot. Journal entries are
+dropped after ``JOURNAL_SECONDS``.
+
+    from services.lobby_cache import lobby_cache
+    lobby_cache.configure(redis_client=..., loader=load_rooms, publisher=emit_delta)
+    lobby_cache.upsert(room.to_dict())
+"""
+import json
+import threading
+import time
+from datetime import datetime
+
+from services.turn_timers import turn_timers
+from services.read_replica import primary_reads
+
+# A change to the lobby: bump the sequence, apply it, journal it.
+# KEYS = rooms, journal, seq; ARGV = room code, room JSON ('' removes), now.
+_WRITE_LUA = """
+local seq = redis.call('INCR', KEYS[3])
+if ARGV[2] == '' then
+  redis.call('HDEL', KEYS[1], ARGV[1])
+else
+  redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call('HSET', KEYS[2], ARGV[1], cjson.encode({seq = seq, at = tonumber(ARGV[3]), room = ARGV[2]}))
+return seq
+"""
+
+# Swap in a rebuilt snapshot, keeping changes made after it was read.
+# KEYS = rooms, journal, warm, tmp; ARGV = since seq, now, journal seconds,
+# warm ttl, then room code / room JSON pairs.
+_REBUILD_LUA = """
+local since = tonumber(ARGV[1])
+local cutoff = tonumber(ARGV[2]) - tonumber(ARGV[3])
+redis.call('DEL', KEYS[4])
+for i = 5, #ARGV, 2 do
+  redis.call('HSET', KEYS[4], ARGV[i], ARGV[i + 1])
+end
+local journal = redis.call('HGETALL', KEYS[2])
+for i = 1, #journal, 2 do
+  local entry = cjson.decode(journal[i + 1])
+  if entry.seq > since then
+    if entry.room == '' then
+      redis.call('HDEL', KEYS[4], journal[i])
+    else
+      redis.call('HSET', KEYS[4], journal[i], entry.room)
+    end
+  elseif entry.at < cutoff then
+    redis.call('HDEL', KEYS[2], journal[i])
+  end
+end
+if redis.call('EXISTS', KEYS[4]) == 1 then
+  redis.call('RENAME', KEYS[4], KEYS[1])
+else
+  redis.call('DEL', KEYS[1])
+end
+redis.call('SET', KEYS[3], '1', 'EX', tonumber(ARGV[4]))
+return 1
+"""
+
+
+class LobbyCache:
+    """Snapshot of the rooms shown in the lobby, newest first."""
+
+    REDIS_ROOMS_KEY = 'lobby:rooms'
+    REDIS_WARM_KEY = 'lobby:warm'
+    REDIS_JOURNAL_KEY = 'lobby:journal'
+    REDIS_SEQ_KEY = 'lobby:seq'
+    REDIS_REBUILD_KEY = 'lobby:rooms:rebuild'
+    FLUSH_TIMER_KEY = 'lobby:flush'
+    JOURNAL_SECONDS = 60
+
+    def __init__(self, limit=20, max_age_hours=5, refresh_seconds=60,
+                 debounce_seconds=1.0, local_ttl_seconds=2.0):
+        self.limit = limit
+        self.max_age_hours = max_age_hours
+        self.refresh_seconds = refresh_seconds
+        self.debounce_seconds = debounce_seconds
+        self.local_ttl_seconds = local_ttl_seconds
+        self._redis = None
+        self._loader = None
+        self._publisher = None
+        self._rooms = {}
+        self._loaded_at = None
+        self._added = {}
+        self._removed = set()
+        self._seq = 0
+        self._journal = {}   # room_code -> (seq, epoch, room dict or None)
+        self._write_script = None
+        self._rebuild_script = None
+        self._lock = threading.Lock()
+
+    def configure(self, redis_client=None, loader=None, publisher=None):
+        """Set the storage backend, the DB loader and the delta publisher.
+
+        ``loader()`` returns the current lobby rooms as dicts;
+        ``publisher(added, removed)`` broadcasts one coalesced delta.
+        """
+        self._redis = redis_client
+        self._loader = loader
+        self._publisher = publisher
+        self._write_script = self._rebuild_script = None
+        if redis_client is not None:
+            try:
+                self._write_script = redis_client.register_script(_WRITE_LUA)
+                self._rebuild_script = redis_client.register_script(_REBUILD_LUA)
+            except Exception as exc:
+                print(f"[LOBBY] Redis scripts unavailable: {exc}")
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop the snapshot; the next read rebuilds it from the loader."""
+        with self._lock:
+            self._rooms = {}
+            self._loaded_at = None
+        if self._redis is not None:
+            try:
+                self._redis.delete(self.REDIS_WARM_KEY)
+            except Exception as exc:
+                print(f"[LOBBY] Failed to invalidate Redis snapshot: {exc}")
+
+    # ---- Reads ---------------------------------------------------------
+
+    def rooms(self):
+        """The lobby payload: newest waiting rooms, ages recomputed."""
+        self._ensure_fresh()
+        with self._lock:
+            rows = list(self._rooms.values())
+
+        now = datetime.utcnow()
+        visible = []
+        for row in rows:
+            age_hours = _age_hours(row, now)
+            if age_hours is None or age_hours > self.max_age_hours:
+                continue
+            row = dict(row)
+            row['room_age_hours'] = round(age_hours, 1)
+            row['is_expired'] = False
+            visible.append(row)
+        visible.sort(key=lambda r: r.get('created_at') or '', reverse=True)
+        return visible[:self.limit]
+
+    def _ensure_fresh(self):
+        now = time.time()
+        if self._redis is None:
+            if self._loaded_at is None or now - self._loaded_at > self.refresh_seconds:
+                self._rebuild(now)
+            return
+        if self._loaded_at is not None and now - self._loaded_at <= self.local_ttl_seconds:
+            return
+        try:
+            if not self._redis.exists(self.REDIS_WARM_KEY):
+                self._rebuild(now)
+                return
+            raw = self._redis.hgetall(self.REDIS_ROOMS_KEY)
+            rooms = {_text(code): json.loads(_text(blob)) for code, blob in raw.items()}
+            with self._lock:
+                self._rooms = rooms
+                self._loaded_at = now
+        except Exception as exc:
+            print(f"[LOBBY] Redis snapshot unavailable, rebuilding locally: {exc}")
+            self._rebuild(now, publish_to_redis=False)
+
+    def _rebuild(self, now, publish_to_redis=True):
+        if self._loader is None:
+            return
+        publish = self._redis is not None and publish_to_redis and self._rebuild_script is not None
+        since = None
+        if publish:
+            try:
+                since = int(self._redis.get(self.REDIS_SEQ_KEY) or 0)
+            except Exception as exc:
+                print(f"[LOBBY] Redis snapshot unavailable, rebuilding locally: {exc}")
+                publish = False
+        with self._lock:
+            local_since = self._seq
+        # Shared by every viewer (and worker), so never from a lagging replica
+        with primary_reads():
+            rows = self._loader()
+        rooms = {row['room_code']: row for row in rows}
+        with self._lock:
+            # Changes made while the loader ran win over what it read
+            for code, (seq, _at, room) in self._journal.items():
+                if seq > local_since:
+                    if room is None:
+                        rooms.pop(code, None)
+                    else:
+                        rooms[code] = room
+            self._rooms = rooms
+            self._loaded_at = now
+        if publish:
+            try:
+                args = [since, time.time(), self.JOURNAL_SECONDS, self.refresh_seconds]
+                for code, row in rooms.items():
+                    args += [code, json.dumps(row)]
+                self._rebuild_script(
+                    keys=[self.REDIS_ROOMS_KEY, self.REDIS_JOURNAL_KEY,
+                          self.REDIS_WARM_KEY, self.REDIS_REBUILD_KEY],
+                    args=args)
+            except Exception as exc:
+                print(f"[LOBBY] Failed to store Redis snapshot: {exc}")
+
+    # ---- Writes --------------------------------------------------------
+
+    def upsert(self, room):
+        """Add or refresh one waiting room (a ``GameRoom.to_dict()``)."""
+        code = room['room_code']
+        with self._lock:
+            self._rooms[code] = room
+            self._added[code] = room
+            self._removed.discard(code)
+            self._note(code, room)
+        self._write_redis(code, json.dumps(room))
+        self._schedule_flush()
+
+    def remove(self, room_code):
+        """Drop a room that stopped waiting (joined, started, expired)."""
+        with self._lock:
+            self._rooms.pop(room_code, None)
+            self._added.pop(room_code, None)
+            self._removed.add(room_code)
+            self._note(room_code, None)
+        self._write_redis(room_code, '')
+        self._schedule_flush()
+
+    def _note(self, code, room):
+        """Journal a change for rebuilds in flight (caller holds the lock)."""
+        now = time.time()
+        self._seq += 1
+        self._journal[code] = (self._seq, now, room)
+        cutoff = now - self.JOURNAL_SECONDS
+        for stale in [c for c, (_, at, _) in self._journal.items() if at < cutoff]:
+            del self._journal[stale]
+
+    def _write_redis(self, code, blob):
+        if self._redis is None:
+            return
+        try:
+            if self._write_script is not None:
+                self._write_script(keys=[self.REDIS_ROOMS_KEY, self.REDIS_JOURNAL_KEY, self.REDIS_SEQ_KEY],
+                                   args=[code, blob, time.time()])
+            elif blob:
+                self._redis.hset(self.REDIS_ROOMS_KEY, code, blob)
+            else:
+                self._redis.hdel(self.REDIS_ROOMS_KEY, code)
+        except Exception as exc:
+            print(f"[LOBBY] Failed to update room {code}: {exc}")
+
+    def _schedule_flush(self):
+        # Only the first change in a window arms the timer; later ones ride along.
+        if not turn_timers.is_armed(self.FLUSH_TIMER_KEY):
+            turn_timers.schedule(self.FLUSH_TIMER_KEY, time.time() + self.debounce_seconds,
+                                 lambda _key: self.flush())
+
+    def flush(self):
+        """Publish the queued changes as one delta. Returns (added, removed)."""
+        with self._lock:
+            added = list(self._added.values())
+            removed = sorted(self._removed)
+            self._added = {}
+            self._removed = set()
+        if (added or removed) and self._publisher is not None:
+            try:
+                self._publisher(added, removed)
+            except Exception as exc:
+                print(f"[LOBBY] Failed to publish lobby delta: {exc}")
+        return added, removed
+
+
+def _age_hours(row, now):
+    try:
+        created_at = datetime.fromisoformat(row['created_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (now - created_at).total_seconds() / 3600
+
+
+def _text(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+lobby_cache = LobbyCache()
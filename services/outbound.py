@@ -0,0 +1,166 @@
+"""
+Per-client backpressure for server-initiated Socket.IO broadcasts.
+
+``socketio.emit`` hands every frame straight to engine.io, which queues it
+per connection without any bound. A client on a bad connection (or a polling
+client that stopped polling) therefore accumulates every game_update and
+tournament_updated the server produces, in server memory, until it catches
+up or times out.
+
+Broadcasts that go through ``outbound.send()`` check each local recipient's
+engine.io queue first:
+
+  - clients keeping up (backlog below ``max_backlog`` packets) get the frame
+    in the normal single ``socketio.emit`` to the room;
+  - slow clients are skipped in that emit (``skip_sid``) and the frame is
+    parked for them instead. Parked frames are keyed by ``(event, topic)``:
+    newer state for the same topic (the same room's game_update, the same
+    tournament's summary) replaces the unsent older one, and at most
+    ``max_pending`` frames are kept per client, oldest dropped first;
+  - a turn-timer wheel entry retries each slow client until its backlog
+    drains, then sends what is parked, in order.
+
+Frames sent without a ``topic`` are never coalesced (each is distinct), but
+are still bounded. Only this worker's connections are inspected; with a
+message queue, other workers deliver to their own clients as before.
+
+    from services.outbound import outbound
+    outbound.configure(socketio=socketio)
+    outbound.send('tournament_updated', summary, topic=f"tournament:{tid}")
+"""
+from collections import OrderedDict
+import itertools
+import threading
+import time
+
+from services.turn_timers import turn_timers
+
+
+class OutboundQueue:
+    """Bounded, coalescing outbound frames for clients that fall behind."""
+
+    def __init__(self, max_pending=32, max_backlog=64, retry_seconds=0.25):
+        self.max_pending = max_pending
+        self.max_backlog = max_backlog
+        self.retry_seconds = retry_seconds
+        self._socketio = None
+        self._parked = {}   # sid -> OrderedDict[(event, topic)] = payload
+        self._unique = itertools.count()
+        self._counts = {'direct': 0, 'parked': 0, 'coalesced': 0, 'dropped': 0, 'delivered_late': 0}
+        self._lock = threading.Lock()
+
+    def configure(self, socketio=None, max_pending=None, max_backlog=None):
+        self._socketio = socketio
+        if max_pending is not None:
+            self.max_pending = max_pending
+        if max_backlog is not None:
+            self.max_backlog = max_backlog
+
+    def send(self, event, payload, room=None, topic=None, namespace='/', socketio=None):
+        """Broadcast ``event`` to ``room`` (everyone when ``None``), parking it
+        for recipients that are behind.
+
+        ``socketio`` defaults to the configured server.
+        """
+        socketio = socketio or self._socketio
+        if socketio is None:
+            return
+        slow = []
+        for sid, eio_sid in self._participants(socketio, namespace, room):
+            if sid in self._parked or self._backlog(eio_sid) >= self.max_backlog:
+                slow.append(sid)
+        for sid in slow:
+            self._park(sid, event, payload, topic)
+        options = {'skip_sid': slow} if slow else {}
+        if namespace != '/':
+            options['namespace'] = namespace
+        socketio.emit(event, payload, to=room, **options)
+        with self._lock:
+            self._counts['direct'] += 1
+
+    def drain(self, sid, namespace='/'):
+        """Send a slow client's parked frames once its backlog has cleared.
+
+        Returns the number of frames sent (0 while it is still behind).
+        """
+        if self._socketio is None:
+            return 0
+        manager = self._socketio.server.manager
+        if not manager.is_connected(sid, namespace):
+            self.forget(sid)
+            return 0
+        if self._backlog(manager.eio_sid_from_sid(sid, namespace)) >= self.max_backlog:
+            self._schedule_retry(sid)
+            return 0
+        with self._lock:
+            frames = self._parked.pop(sid, None) or {}
+            self._counts['delivered_late'] += len(frames)
+        for (event, _topic), payload in frames.items():
+            self._socketio.emit(event, payload, to=sid, namespace=namespace)
+        return len(frames)
+
+    def forget(self, sid):
+        """Drop everything parked for a disconnected client."""
+        turn_timers.cancel(self._timer_key(sid))
+        with self._lock:
+            frames = self._parked.pop(sid, None)
+            if frames:
+                self._counts['dropped'] += len(frames)
+
+    def pending(self, sid):
+        with self._lock:
+            return list(self._parked.get(sid, {}).items())
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts,
+                        parked_clients=len(self._parked),
+                        parked_frames=sum(len(f) for f in self._parked.values()))
+
+    # ---- Internals -------------------------------------------------------
+
+    def _park(self, sid, event, payload, topic):
+        key = (event, topic if topic is not None else f"#{next(self._unique)}")
+        with self._lock:
+            frames = self._parked.setdefault(sid, OrderedDict())
+            if key in frames:
+                del frames[key]
+                self._counts['coalesced'] += 1
+            frames[key] = payload
+            self._counts['parked'] += 1
+            while len(frames) > self.max_pending:
+                frames.popitem(last=False)
+                self._counts['dropped'] += 1
+        self._schedule_retry(sid)
+
+    def _schedule_retry(self, sid):
+        key = self._timer_key(sid)
+        if not turn_timers.is_armed(key):
+            turn_timers.schedule(key, time.time() + self.retry_seconds, self._on_retry)
+
+    def _on_retry(self, key):
+        try:
+            self.drain(key.split(':', 1)[1])
+        except Exception as exc:
+            print(f"[OUTBOUND] Failed to drain {key}: {exc}")
+
+    def _participants(self, socketio, namespace, room):
+        try:
+            return list(socketio.server.manager.get_participants(namespace, room))
+        except Exception:
+            return []
+
+    def _backlog(self, eio_sid):
+        """Packets engine.io has queued for this connection but not yet sent."""
+        try:
+            socket = self._socketio.server.eio.sockets.get(eio_sid)
+            return socket.queue.qsize() if socket is not None else 0
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _timer_key(sid):
+        return f"outbound:{sid}"
+
+
+outbound = OutboundQueue()
@@ -0,0 +1,211 @@
+"""
+Presence tracking (who is online, and in which rooms) outside the database.
+
+Every Socket.IO connect/disconnect used to write ``player*_connected`` /
+``player*_last_seen`` on each of the user's rooms and commit, so mobile
+clients dropping and re-establishing connections turned into steady DB write
+load. Presence now lives here:
+
+  - each live connection (sid) of a user is an entry with an expiry, renewed
+    by the client's ``presence_heartbeat``; a user is online while any entry
+    is unexpired, so a crashed worker's connections simply age out;
+  - per-room sets record which users belong to which room, and
+    ``online_in_room()`` filters them by liveness;
+  - the last-seen time is kept per user.
+
+``connect()`` / ``disconnect()`` report real online/offline transitions, so
+callers only touch the database when a user's state actually changed (see
+controllers/multiplayer_controller.py).
+
+Backed by Redis (sorted set of sid -> expiry per user, plain sets per room)
+when available, otherwise by in-process dicts:
+
+    from services.presence import presence
+    presence.configure(redis_client=manager.redis_client)
+    came_online = presence.connect(user_id, sid)
+"""
+import threading
+import time
+from datetime import datetime
+
+
+class PresenceTracker:
+    """Online state per user and per room."""
+
+    def __init__(self, ttl_seconds=120, room_ttl_seconds=86400, seen_ttl_seconds=7 * 86400):
+        self.ttl_seconds = ttl_seconds
+        self.room_ttl_seconds = room_ttl_seconds
+        self.seen_ttl_seconds = seen_ttl_seconds
+        self._redis = None
+        self._sids = {}      # user_id -> {sid: expires_at}
+        self._seen = {}      # user_id -> epoch seconds
+        self._rooms = {}     # room_code -> {user_id}
+        self._lock = threading.Lock()
+
+    def configure(self, redis_client=None):
+        """Use Redis for presence (``None`` keeps it in process memory)."""
+        self._redis = redis_client
+
+    # ---- Connections ---------------------------------------------------
+
+    def connect(self, user_id, sid):
+        """Register a live connection. Returns True if the user just came online."""
+        if not user_id:
+            return False
+        was_online = self.is_online(user_id)
+        self._touch(user_id, sid)
+        return not was_online
+
+    def heartbeat(self, user_id, sid):
+        """Keep a connection alive for another ``ttl_seconds``."""
+        if user_id:
+            self._touch(user_id, sid)
+
+    def disconnect(self, user_id, sid):
+        """Drop a connection. Returns True if it was the user's last one."""
+        if not user_id:
+            return False
+        now = time.time()
+        if self._redis is not None:
+            try:
+                key = self._sids_key(user_id)
+                pipe = self._redis.pipeline()
+                pipe.zrem(key, sid)
+                pipe.zremrangebyscore(key, '-inf', now)
+                pipe.zcard(key)
+                pipe.set(self._seen_key(user_id), now, ex=self.seen_ttl_seconds)
+                remaining = pipe.execute()[2]
+                return remaining == 0
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on disconnect: {exc}")
+                return True
+        with self._lock:
+            sids = self._sids.get(user_id, {})
+            sids.pop(sid, None)
+            live = {s: exp for s, exp in sids.items() if exp > now}
+            if live:
+                self._sids[user_id] = live
+            else:
+                self._sids.pop(user_id, None)
+            self._seen[user_id] = now
+            return not live
+
+    def _touch(self, user_id, sid):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        if self._redis is not None:
+            try:
+                key = self._sids_key(user_id)
+                pipe = self._redis.pipeline()
+                pipe.zadd(key, {sid: expires_at})
+                pipe.expire(key, self.ttl_seconds)
+                pipe.set(self._seen_key(user_id), now, ex=self.seen_ttl_seconds)
+                pipe.execute()
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on heartbeat: {exc}")
+            return
+        with self._lock:
+            self._sids.setdefault(user_id, {})[sid] = expires_at
+            self._seen[user_id] = now
+
+    # ---- Queries -------------------------------------------------------
+
+    def is_online(self, user_id):
+        if not user_id:
+            return False
+        return user_id in self.online_users([user_id])
+
+    def online_users(self, user_ids):
+        """The subset of ``user_ids`` that is online (one round trip)."""
+        ids = [uid for uid in dict.fromkeys(user_ids) if uid]
+        if not ids:
+            return set()
+        now = time.time()
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline()
+                for uid in ids:
+                    pipe.zcount(self._sids_key(uid), now, '+inf')
+                counts = pipe.execute()
+                return {uid for uid, count in zip(ids, counts) if count}
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on lookup: {exc}")
+                return set()
+        with self._lock:
+            return {
+                uid for uid in ids
+                if any(exp > now for exp in self._sids.get(uid, {}).values())
+            }
+
+    def last_seen(self, user_id):
+        """When the user last connected, heartbeated or disconnected (UTC), or None."""
+        if not user_id:
+            return None
+        seen = None
+        if self._redis is not None:
+            try:
+                seen = self._redis.get(self._seen_key(user_id))
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on last_seen: {exc}")
+        else:
+            seen = self._seen.get(user_id)
+        return datetime.utcfromtimestamp(float(seen)) if seen is not None else None
+
+    # ---- Rooms ---------------------------------------------------------
+
+    def enter_room(self, room_code, user_id):
+        if not (room_code and user_id):
+            return
+        if self._redis is not None:
+            try:
+                key = self._room_key(room_code)
+                pipe = self._redis.pipeline()
+                pipe.sadd(key, user_id)
+                pipe.expire(key, self.room_ttl_seconds)
+                pipe.execute()
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on enter_room: {exc}")
+            return
+        with self._lock:
+            self._rooms.setdefault(room_code, set()).add(user_id)
+
+    def clear_room(self, room_code):
+        """Forget a finished room's membership."""
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._room_key(room_code))
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on clear_room: {exc}")
+            return
+        with self._lock:
+            self._rooms.pop(room_code, None)
+
+    def online_in_room(self, room_code):
+        """User ids of the room's members that are online right now."""
+        if self._redis is not None:
+            try:
+                members = {int(m) for m in self._redis.smembers(self._room_key(room_code))}
+            except Exception as exc:
+                print(f"[PRESENCE] Redis unavailable on online_in_room: {exc}")
+                return set()
+        else:
+            with self._lock:
+                members = set(self._rooms.get(room_code, ()))
+        return self.online_users(members)
+
+    # ---- Keys ----------------------------------------------------------
+
+    @staticmethod
+    def _sids_key(user_id):
+        return f"presence:sids:{user_id}"
+
+    @staticmethod
+    def _seen_key(user_id):
+        return f"presence:seen:{user_id}"
+
+    @staticmethod
+    def _room_key(room_code):
+        return f"presence:room:{room_code}"
+
+
+presence = PresenceTracker()
@@ -0,0 +1,247 @@
+"""
+Per-request SQL query counting and slow-query logging.
+
+Nothing told us how many queries a route or socket event issued, so N+1
+patterns (one query per tournament / room / player in a loop) went unnoticed
+until the database was busy. ``query_stats`` hooks the engine's
+``before_cursor_execute`` / ``after_cursor_execute`` events and attributes
+every statement to the current *scope*:
+
+  - HTTP requests (``GET /api/tournaments``), opened in ``before_request``;
+  - Socket.IO events (``socket:game_action``) -- every registered handler is
+    wrapped once at startup by ``instrument_socketio``;
+  - anything else (scheduler, timers) is simply not counted.
+
+Per scope it counts queries and DB time. At the end of the scope it:
+
+  - folds the numbers into per-scope totals (``stats()``, served at
+    ``GET /api/admin/query-stats``);
+  - logs ``[QUERIES]`` when a scope issues more than ``QUERY_COUNT_WARN``
+    statements -- the usual sign of a query inside a loop;
+  - adds ``X-DB-Queries: <count>; time=<ms>`` to HTTP responses when
+    ``QUERY_STATS_HEADER`` is on (development by default).
+
+Any statement slower than ``SLOW_QUERY_MS`` is logged as ``[SLOW SQL]`` with
+its duration, scope and the innermost application frame that issued it.
+
+The current scope lives in a ``ContextVar``, so concurrent requests on
+threads or green threads never mix their counts.
+
+    from services.query_stats import query_stats
+    with query_stats.scope('job:rebuild') as scope:
+        ...
+    scope.queries, scope.db_ms
+"""
+import os
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from sqlalchemy import event
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SLOW_QUERY_MS = 100.0
+DEFAULT_QUERY_COUNT_WARN = 50
+UNMATCHED_ROUTE = '<unmatched>'
+_SQL_PREVIEW = 300
+
+_current = ContextVar('query_stats_scope', default=None)
+
+
+class QueryScope:
+    """Counters for one request or socket event."""
+
+    __slots__ = ('name', 'queries', 'db_ms', 'slow')
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slow = 0
+
+
+def call_site():
+    """``file:line (function)`` of the innermost application frame on the stack."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if not filename.startswith(PROJECT_ROOT) or filename == os.path.abspath(__file__):
+            continue
+        if f'{os.sep}site-packages{os.sep}' in filename:
+            continue
+        return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.lineno} ({frame.name})"
+    return 'unknown'
+
+
+class QueryStats:
+    """Engine-event query counter with per-scope aggregation."""
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, query_count_warn=DEFAULT_QUERY_COUNT_WARN,
+                 enabled=True):
+        self.slow_query_ms = slow_query_ms
+        self.query_count_warn = query_count_warn
+        self.enabled = enabled
+        self.add_header = False
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._engines = set()
+
+    def configure(self, slow_query_ms=None, query_count_warn=None, enabled=None, add_header=None):
+        if slow_query_ms is not None:
+            self.slow_query_ms = float(slow_query_ms)
+        if query_count_warn is not None:
+            self.query_count_warn = int(query_count_warn)
+        if enabled is not None:
+            self.enabled = bool(enabled)
+        if add_header is not None:
+            self.add_header = bool(add_header)
+
+    # ---- Wiring ----------------------------------------------------------
+
+    def install(self, engine):
+        """Listen to ``engine``'s cursor events (idempotent)."""
+        if id(engine) in self._engines:
+            return
+        self._engines.add(id(engine))
+        event.listen(engine, 'before_cursor_execute', self._before_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+    def init_app(self, app):
+        """Open a scope per HTTP request and report it on the response."""
+
+        @app.before_request
+        def _open_request_scope():
+            from flask import g, request
+            if self.enabled:
+                # The rule, not the path: unmatched URLs (404 probes) share one
+                # scope instead of each adding a row to the totals
+                route = request.url_rule.rule if request.url_rule is not None else UNMATCHED_ROUTE
+                g.query_scope_token = _current.set(QueryScope(f"{request.method} {route}"))
+
+        @app.after_request
+        def _report_request_scope(response):
+            from flask import g
+            token = g.pop('query_scope_token', None)
+            if token is None:
+                return response
+            scope = _current.get()
+            _current.reset(token)
+            self._close(scope)
+            if self.add_header:
+                response.headers['X-DB-Queries'] = f"{scope.queries}; time={scope.db_ms:.1f}ms"
+            return response
+
+        @app.teardown_request
+        def _drop_request_scope(_exc):
+            # after_request is skipped when the view raised
+            from flask import g
+            token = g.pop('query_scope_token', None)
+            if token is not None:
+                scope = _current.get()
+                _current.reset(token)
+                self._close(scope)
+
+    def instrument_socketio(self, socketio):
+        """Wrap every registered Socket.IO handler in a scope. Returns how many were wrapped."""
+        wrapped = 0
+        for namespace, handlers in socketio.server.handlers.items():
+            for event_name, handler in list(handlers.items()):
+                if getattr(handler, '_query_scoped', False):
+                    continue
+                handlers[event_name] = self._scoped_handler(f"socket:{event_name}", handler)
+                wrapped += 1
+        return wrapped
+
+    def _scoped_handler(self, name, handler):
+        @wraps(handler)
+        def scoped(*args, **kwargs):
+            with self.scope(name):
+                return handler(*args, **kwargs)
+        scoped._query_scoped = True
+        return scoped
+
+    @contextmanager
+    def scope(self, name):
+        """Count the queries issued inside the block under ``name``."""
+        if not self.enabled:
+            yield QueryScope(name)
+            return
+        scope = QueryScope(name)
+        token = _current.set(scope)
+        try:
+            yield scope
+        finally:
+            _current.reset(token)
+            self._close(scope)
+
+    # ---- Reporting -------------------------------------------------------
+
+    def current(self):
+        return _current.get()
+
+    def stats(self):
+        """Per-scope totals, busiest first."""
+        with self._lock:
+            rows = [
+                {
+                    'scope': name,
+                    'calls': t['calls'],
+                    'queries': t['queries'],
+                    'avg_queries': round(t['queries'] / t['calls'], 1),
+                    'max_queries': t['max_queries'],
+                    'db_ms': round(t['db_ms'], 1),
+                    'avg_db_ms': round(t['db_ms'] / t['calls'], 2),
+                    'slow_queries': t['slow'],
+                }
+                for name, t in self._totals.items()
+            ]
+        return sorted(rows, key=lambda r: r['queries'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+    # ---- Internals -------------------------------------------------------
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled and context is not None:
+            # Per execution, so a statement that raises leaves nothing behind
+            context._query_stats_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_stats_start', None)
+        if started is None:
+            return
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        scope = _current.get()
+        if scope is not None:
+            scope.queries += 1
+            scope.db_ms += elapsed_ms
+        if elapsed_ms >= self.slow_query_ms:
+            if scope is not None:
+                scope.slow += 1
+            sql = ' '.join(statement.split())
+            if len(sql) > _SQL_PREVIEW:
+                sql = sql[:_SQL_PREVIEW] + '...'
+            print(f"[SLOW SQL] {elapsed_ms:.1f}ms in {scope.name if scope else 'background'} "
+                  f"at {call_site()}: {sql}")
+
+    def _close(self, scope):
+        if scope is None:
+            return
+        with self._lock:
+            totals = self._totals.setdefault(
+                scope.name, {'calls': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'slow': 0})
+            totals['calls'] += 1
+            totals['queries'] += scope.queries
+            totals['max_queries'] = max(totals['max_queries'], scope.queries)
+            totals['db_ms'] += scope.db_ms
+            totals['slow'] += scope.slow
+        if scope.queries > self.query_count_warn:
+            print(f"[QUERIES] {scope.name} issued {scope.queries} queries "
+                  f"({scope.db_ms:.1f}ms) - look for a query inside a loop")
+
+
+query_stats = QueryStats()
@@ -0,0 +1,247 @@
+"""
+Per-user token-bucket rate limiting for Socket.IO events.
+
+Nothing used to stop a client from spamming ``game_action``, ``get_lobby``
+or ``get_tournaments``, each of which costs several queries. Every handler
+registered in ``init_multiplayer_events`` / ``init_tournament_events`` now
+goes through ``@rate_limited(event)``:
+
+  - each (user, event) pair owns a bucket of ``capacity`` tokens that refills
+    continuously over ``per_seconds``; an event spends one token and is
+    dropped (the client gets ``rate_limited`` with a retry hint) when the
+    bucket is empty, so short bursts pass and sustained floods do not;
+  - guests are keyed by their connection sid instead of a user id;
+  - rejections are counted per event for the admin dashboard
+    (``/api/admin/rate-limits``).
+
+Buckets live in Redis (one hash per bucket, updated atomically by a Lua
+script, so every worker shares them) when available, otherwise in process
+memory. Either way an idle bucket goes away once it has refilled: Redis
+expires the hash, and the local map is swept every ``PRUNE_INTERVAL``
+seconds (guest sids would otherwise pile up for the life of the worker):
+
+    from services.rate_limits import rate_limiter
+    rate_limiter.configure(redis_client=manager.redis_client,
+                           limits={'game_action': (8, 2)})
+    allowed, retry_after = rate_limiter.hit(user_id, 'game_action')
+"""
+from functools import wraps
+import threading
+import time
+
+from flask import request, session
+from flask_socketio import emit
+
+# event -> (capacity, per_seconds): ``capacity`` events per ``per_seconds``,
+# with bursts of up to ``capacity``. Events not listed use DEFAULT_LIMIT.
+DEFAULT_LIMITS = {
+    'game_action': (8, 2),
+    'get_lobby': (5, 5),
+    'get_tournaments': (5, 5),
+    'get_tournament_participants': (5, 5),
+    'create_room': (3, 10),
+    'join_room': (5, 10),
+    'spectate_room': (5, 10),
+    'presence_heartbeat': (3, 30),
+}
+DEFAULT_LIMIT = (20, 10)
+PRUNE_INTERVAL = 60
+# Rejection log lines are rate limited per (identity, event) to one per window
+LOG_WINDOW = 60
+
+# KEYS[1] = bucket hash; ARGV = capacity, refill per second, now, ttl.
+# Returns {allowed (0/1), seconds until the next token (as a string)}.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return {allowed, tostring(retry)}
+"""
+
+
+def parse_limits(spec):
+    """Parse ``"game_action=8/2,get_lobby=5/5"`` into ``{event: (8, 2.0)}``."""
+    limits = {}
+    for part in (spec or '').split(','):
+        if '=' not in part:
+            continue
+        event, _, rate = part.partition('=')
+        try:
+            capacity, _, per = rate.partition('/')
+            limits[event.strip()] = (int(capacity), float(per or 1))
+        except ValueError:
+            print(f"[RATE LIMIT] Ignoring malformed limit {part.strip()!r}")
+    return limits
+
+
+class TokenBucketLimiter:
+    """Token buckets per (identity, event) with rejection counters."""
+
+    def __init__(self, limits=None, default_limit=DEFAULT_LIMIT, enabled=True):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self.enabled = enabled
+        self._redis = None
+        self._script = None
+        self._buckets = {}   # (identity, event) -> [tokens, last_refill]
+        self._allowed = {}   # event -> count
+        self._rejected = {}  # event -> count
+        self._logged = {}    # (identity, event) -> epoch of last log line
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def configure(self, redis_client=None, limits=None, enabled=None):
+        """Use Redis for the buckets and/or override per-event limits."""
+        self._redis = redis_client
+        self._script = None
+        if redis_client is not None:
+            try:
+                self._script = redis_client.register_script(_TOKEN_BUCKET_LUA)
+            except Exception as exc:
+                print(f"[RATE LIMIT] Redis script unavailable, using local buckets: {exc}")
+        if limits:
+            self.limits.update(limits)
+        if enabled is not None:
+            self.enabled = enabled
+
+    def limit_for(self, event):
+        return self.limits.get(event, self.default_limit)
+
+    def hit(self, identity, event, now=None):
+        """Spend one token. Returns ``(allowed, retry_after_seconds)``."""
+        if not self.enabled:
+            return True, 0.0
+        now = time.time() if now is None else now
+        capacity, per_seconds = self.limit_for(event)
+        rate = capacity / per_seconds
+
+        result = None
+        if self._script is not None:
+            result = self._hit_redis(identity, event, capacity, rate, per_seconds, now)
+        if result is None:
+            result = self._hit_local(identity, event, capacity, rate, now)
+
+        allowed, retry_after = result
+        with self._lock:
+            counter = self._allowed if allowed else self._rejected
+            counter[event] = counter.get(event, 0) + 1
+            if now >= self._next_prune:
+                self._prune(now)
+        if not allowed:
+            self._log_rejection(identity, event, now)
+        return allowed, retry_after
+
+    def stats(self):
+        """Per-event allowed/rejected counts since start-up, plus the limits."""
+        with self._lock:
+            events = set(self._allowed) | set(self._rejected)
+            return {
+                'enabled': self.enabled,
+                'events': {
+                    event: {
+                        'allowed': self._allowed.get(event, 0),
+                        'rejected': self._rejected.get(event, 0),
+                        'limit': list(self.limit_for(event)),
+                    }
+                    for event in sorted(events)
+                },
+                'rejected_total': sum(self._rejected.values()),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._allowed.clear()
+            self._rejected.clear()
+            self._logged.clear()
+            self._next_prune = 0.0
+
+    # ---- Backends -------------------------------------------------------
+
+    def _hit_redis(self, identity, event, capacity, rate, per_seconds, now):
+        try:
+            allowed, retry = self._script(
+                keys=[f"ratelimit:{event}:{identity}"],
+                args=[capacity, rate, now, int(per_seconds * 2) + 1],
+            )
+            return bool(int(allowed)), float(retry)
+        except Exception as exc:
+            print(f"[RATE LIMIT] Redis unavailable, using local bucket: {exc}")
+            return None
+
+    def _hit_local(self, identity, event, capacity, rate, now):
+        key = (identity, event)
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / rate
+
+    def _prune(self, now):
+        """Drop full, idle buckets and old log marks (caller holds the lock)."""
+        self._next_prune = now + PRUNE_INTERVAL
+        for key, (_, last) in list(self._buckets.items()):
+            # Same lifetime as the Redis hash: refilled and then some
+            if now - last > self.limit_for(key[1])[1] * 2 + 1:
+                del self._buckets[key]
+        for key, logged_at in list(self._logged.items()):
+            if now - logged_at >= LOG_WINDOW:
+                del self._logged[key]
+
+    def _log_rejection(self, identity, event, now):
+        # One line per (identity, event) per minute keeps a flood out of the log.
+        key = (identity, event)
+        with self._lock:
+            if now - self._logged.get(key, 0) < LOG_WINDOW:
+                return
+            self._logged[key] = now
+        print(f"[RATE LIMIT] Throttling {event} for {identity}")
+
+
+rate_limiter = TokenBucketLimiter()
+
+
+def _identity():
+    user_id = session.get('user_id')
+    return f"user:{user_id}" if user_id else f"sid:{request.sid}"
+
+
+def rate_limited(event):
+    """Decorator: drop a Socket.IO event once the caller's bucket is empty.
+
+    Rejected calls never reach the handler; the caller gets ``rate_limited``
+    ``{'event', 'retry_after'}`` instead.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            allowed, retry_after = rate_limiter.hit(_identity(), event)
+            if not allowed:
+                emit('rate_limited', {'event': event, 'retry_after': round(retry_after, 2)})
+                return None
+            return handler(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
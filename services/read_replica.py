@@ -0,0 +1,165 @@
+"""
+Read-replica routing for read-only routes and socket events.
+
+Spectator pages, the leaderboard, tournament overviews / listings and the
+admin listings only read, yet they shared the primary with the hot write
+paths (moves, wallet settlements). With ``DATABASE_REPLICA_URL`` set, the
+session sends their SELECTs to a replica engine instead:
+
+  - a view or socket handler opts in with ``@replica_reads``; everything
+    else, and every flush / UPDATE / DELETE, stays on the primary;
+  - once the session has written anything, the rest of that request or event
+    reads from the primary too;
+  - read-your-writes: after a user's request commits a write, that user's
+    replica-marked reads go to the primary for ``REPLICA_STICKY_SECONDS``
+    (longer than the replica lag), so nobody sees their own join or bet
+    disappear. With Redis the marker is shared by every worker; without it
+    it is per process.
+
+Anything that fills a process-wide or Redis-shared cache (the lobby
+snapshot, the room registry) loads inside ``primary_reads()``: a replica row
+that lags by a second would otherwise be served to every viewer until the
+cache refreshes.
+
+No replica configured means no routing at all -- the decorator is a no-op.
+
+    from services.read_replica import replica_reads
+    @bp.route('/leaderboard')
+    @replica_reads
+    def leaderboard(): ...
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+DEFAULT_STICKY_SECONDS = 5.0
+_KEY_PREFIX = 'replica:wrote:'
+_WROTE = 'replica_wrote'
+
+# The active @replica_reads scope: {'wrote': bool}, or None outside one
+_scope = ContextVar('replica_scope', default=None)
+
+
+class ReadReplicaRouter:
+    """Decides, per statement, whether the session may use the replica."""
+
+    def __init__(self, sticky_seconds=DEFAULT_STICKY_SECONDS):
+        self.sticky_seconds = sticky_seconds
+        self._engine = None
+        self._redis = None
+        self._recent_writes = {}
+        self._lock = threading.Lock()
+
+    def configure(self, engine=None, redis_client=None, sticky_seconds=None):
+        if engine is not None:
+            self._engine = engine
+        if redis_client is not None:
+            self._redis = redis_client
+        if sticky_seconds is not None:
+            self.sticky_seconds = float(sticky_seconds)
+
+    def disable(self):
+        """Route everything to the primary again."""
+        self._engine = None
+
+    @property
+    def engine(self):
+        return self._engine
+
+    # ---- Routing ---------------------------------------------------------
+
+    def engine_for(self, session, clause=None):
+        """The replica engine when this read may use it, otherwise None."""
+        scope = _scope.get()
+        if self._engine is None or scope is None or scope['wrote']:
+            return None
+        if clause is None or not getattr(clause, 'is_select', False):
+            return None
+        user_id = _acting_user_id()
+        if user_id is not None and self.recently_wrote(user_id):
+            return None
+        return self._engine
+
+    # ---- Read-your-writes ------------------------------------------------
+
+    def note_write(self, user_id):
+        if self._engine is None or user_id is None:
+            return
+        if self._redis is not None:
+            try:
+                self._redis.set(f"{_KEY_PREFIX}{user_id}", 1, px=int(self.sticky_seconds * 1000))
+                return
+            except Exception as exc:
+                print(f"[REPLICA] Redis write marker failed, using local: {exc}")
+        with self._lock:
+            self._recent_writes[user_id] = time.monotonic() + self.sticky_seconds
+
+    def recently_wrote(self, user_id):
+        if self._redis is not None:
+            try:
+                return bool(self._redis.exists(f"{_KEY_PREFIX}{user_id}"))
+            except Exception as exc:
+                print(f"[REPLICA] Redis marker lookup failed, using local: {exc}")
+        with self._lock:
+            until = self._recent_writes.get(user_id)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._recent_writes[user_id]
+                return False
+            return True
+
+    def reset(self):
+        with self._lock:
+            self._recent_writes.clear()
+
+    # ---- Session hooks (wired in database.py) ----------------------------
+
+    @staticmethod
+    def session_flushed(session):
+        session.info[_WROTE] = True
+        scope = _scope.get()
+        if scope is not None:
+            scope['wrote'] = True
+
+    def session_committed(self, session):
+        if session.info.pop(_WROTE, False):
+            self.note_write(_acting_user_id())
+
+    @staticmethod
+    def session_rolled_back(session):
+        session.info.pop(_WROTE, None)
+
+
+def _acting_user_id():
+    from flask import has_request_context, session as flask_session
+    if not has_request_context():
+        return None
+    return flask_session.get('user_id')
+
+
+def replica_reads(f):
+    """Let ``f`` (a view or socket handler) read from the replica."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        token = _scope.set({'wrote': False})
+        try:
+            return f(*args, **kwargs)
+        finally:
+            _scope.reset(token)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, even within ``@replica_reads``."""
+    token = _scope.set(None)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+read_replica = ReadReplicaRouter()
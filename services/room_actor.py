@@ -0,0 +1,219 @@
+"""
+Per-room single-writer actors.
+
+Socket.IO handlers run on arbitrary worker threads (or greenlets under
+gevent), so two events for the same room could interleave on the game engine
+and on the ``GameRoom`` row. Every mutation of a room -- player actions, AFK
+timeouts, pause/resume, reconnect recreation -- is funnelled through that
+room's actor: commands queue in the actor's mailbox and run strictly one at a
+time, in arrival order. Rooms never share a lock, so different rooms still run
+fully in parallel.
+
+The thread that submits a command also executes it once it reaches the head
+of the mailbox. That keeps Flask-SocketIO's request context (``emit()`` back to
+the caller's sid, ``session``) intact, which a dedicated worker thread would
+lose.
+
+In a multi-worker deployment the registry can additionally hold a short Redis
+lock per room while a command runs, so two processes never mutate the same
+room at once either. If another worker holds the lock past
+``lock_blocking_timeout`` the command is not run: ``run()`` raises
+``RoomBusy`` (``@serialized_by_room`` answers the client with an error to
+retry). Only when Redis itself is unreachable does a command fall back to
+in-process serialisation:
+
+    from services.room_actor import room_actors
+    room_actors.configure(redis_client=manager.redis_client)
+    result = room_actors.run(room_code, handler, *args)
+"""
+from functools import wraps
+import itertools
+import threading
+from collections import deque
+
+from flask_socketio import emit
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+
+class _ActorRetired(Exception):
+    """Raised when a command is submitted to an actor that was just retired."""
+
+
+class RoomBusy(Exception):
+    """Another worker held the room's lock for longer than ``lock_blocking_timeout``."""
+
+
+class RoomActor:
+    """Mailbox that serialises every command for one room."""
+
+    def __init__(self, room_code, registry=None):
+        self.room_code = room_code
+        self._registry = registry
+        self._mailbox = deque()
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._owner = None
+        self._retiring = False
+        self.retired = False
+        self.processed = 0
+
+    @property
+    def pending(self):
+        """Number of commands queued or running."""
+        return len(self._mailbox)
+
+    def run(self, command, *args, **kwargs):
+        """Queue ``command`` and run it once every earlier command finished.
+
+        Re-entrant: a command that (directly or indirectly) submits more work
+        for the same room runs it inline instead of deadlocking on itself.
+        """
+        me = threading.get_ident()
+        if self._owner == me:
+            return command(*args, **kwargs)
+
+        with self._cond:
+            if self.retired:
+                raise _ActorRetired(self.room_code)
+            ticket = next(self._tickets)
+            self._mailbox.append(ticket)
+            while self._mailbox[0] != ticket:
+                self._cond.wait()
+            self._owner = me
+
+        lock = self._registry._distributed_lock(self.room_code) if self._registry else None
+        try:
+            if lock is not None:
+                lock.acquire()
+            return command(*args, **kwargs)
+        finally:
+            if lock is not None:
+                try:
+                    lock.release()
+                except Exception as exc:
+                    print(f"[ROOM ACTOR] Failed to release lock for room {self.room_code}: {exc}")
+            with self._cond:
+                self._owner = None
+                self._mailbox.popleft()
+                self.processed += 1
+                if not self._mailbox and self._retiring:
+                    self.retired = True
+                    if self._registry is not None:
+                        self._registry._forget(self)
+                self._cond.notify_all()
+
+    def retire(self):
+        """Drop this actor from its registry once the mailbox drains."""
+        with self._cond:
+            self._retiring = True
+            if not self._mailbox:
+                self.retired = True
+                if self._registry is not None:
+                    self._registry._forget(self)
+
+
+class _RedisRoomLock:
+    """Cross-process lock around one command (thin wrapper over redis-py's Lock)."""
+
+    def __init__(self, redis_client, room_code, timeout, blocking_timeout):
+        self._lock = redis_client.lock(
+            f"room-actor:{room_code}",
+            timeout=timeout,
+            blocking_timeout=blocking_timeout,
+        )
+        self._acquired = False
+
+    def acquire(self):
+        try:
+            self._acquired = bool(self._lock.acquire())
+        except (RedisConnectionError, RedisTimeoutError) as exc:
+            # Redis unreachable: the in-process mailbox still serialises this worker.
+            print(f"[ROOM ACTOR] Redis lock unavailable, continuing in-process only: {exc}")
+            self._acquired = False
+            return
+        if not self._acquired:
+            # Another worker is still running a command for this room
+            raise RoomBusy(self._lock.name)
+
+    def release(self):
+        if self._acquired:
+            self._lock.release()
+
+
+class RoomActorRegistry:
+    """Lazily creates one ``RoomActor`` per room code.
+
+    Lookups use ``dict.setdefault`` (atomic in CPython) rather than a global
+    lock, so creating or finding an actor never blocks other rooms.
+    """
+
+    def __init__(self):
+        self._actors = {}
+        self._redis = None
+        self.lock_timeout = 30
+        self.lock_blocking_timeout = 10
+
+    def configure(self, redis_client=None, lock_timeout=30, lock_blocking_timeout=10):
+        """Enable the optional cross-worker Redis lock (``None`` disables it)."""
+        self._redis = redis_client
+        self.lock_timeout = lock_timeout
+        self.lock_blocking_timeout = lock_blocking_timeout
+
+    def get(self, room_code):
+        actor = self._actors.get(room_code)
+        if actor is None:
+            actor = self._actors.setdefault(room_code, RoomActor(room_code, registry=self))
+        return actor
+
+    def run(self, room_code, command, *args, **kwargs):
+        """Run ``command(*args, **kwargs)`` serialised with every other command for the room."""
+        while True:
+            actor = self.get(room_code)
+            try:
+                return actor.run(command, *args, **kwargs)
+            except _ActorRetired:
+                continue
+
+    def discard(self, room_code):
+        """Retire a finished room's actor (after any queued commands drain)."""
+        actor = self._actors.get(room_code)
+        if actor is not None:
+            actor.retire()
+
+    def active_count(self):
+        return len(self._actors)
+
+    def _forget(self, actor):
+        if self._actors.get(actor.room_code) is actor:
+            self._actors.pop(actor.room_code, None)
+
+    def _distributed_lock(self, room_code):
+        if self._redis is None:
+            return None
+        return _RedisRoomLock(self._redis, room_code, self.lock_timeout, self.lock_blocking_timeout)
+
+
+# Process-wide registry shared by the Socket.IO handlers and the background
+# AFK sweep (see controllers/multiplayer_controller.py).
+room_actors = RoomActorRegistry()
+
+
+def serialized_by_room(handler):
+    """Decorator: run a Socket.IO handler inside the actor of ``data['room_code']``.
+
+    Payloads without a room code fall straight through to the handler, which
+    reports the missing code itself.
+    """
+    @wraps(handler)
+    def wrapper(data=None, *args, **kwargs):
+        room_code = data.get('room_code') if isinstance(data, dict) else None
+        if not room_code:
+            return handler(data, *args, **kwargs)
+        try:
+            return room_actors.run(room_code, handler, data, *args, **kwargs)
+        except RoomBusy:
+            print(f"[ROOM ACTOR] Room {room_code} busy on another worker, {handler.__name__} not run")
+            emit('error', {'message': 'The room is busy - please retry', 'room_code': room_code})
+            return None
+
+    return wrapper
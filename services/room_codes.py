@@ -0,0 +1,90 @@
+"""
+Room code allocation without read-before-write.
+
+``generate_room_code`` used to ``SELECT`` each random candidate until one was
+free. Codes are now handed out optimistically and the unique index on
+``game_rooms.room_code`` is the arbiter:
+
+  - with Redis, candidates come from a shared counter (``INCR``) run through
+    an affine permutation of the 36^6 code space, so workers never hand out
+    the same candidate and consecutive rooms don't get guessable neighbours;
+  - without Redis, candidates are random;
+  - ``insert_room()`` inserts inside a SAVEPOINT and, if the code is taken,
+    rolls back just that savepoint and retries with the next candidate.
+
+Codes are reused only once the room holding them is gone (the counter wraps
+after ~2.2 billion rooms; random codes may land on old rooms and simply
+retry), so a finished room's code can never point at two rooms at once.
+
+    from services.room_codes import room_codes
+    room = GameRoom(player1_id=user_id, ...)
+    room_codes.insert_room(room)   # sets room.room_code, flushes; caller commits
+"""
+import random
+import string
+
+from sqlalchemy.exc import IntegrityError
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH
+
+# Any multiplier coprime with 36^6 (= 2^12 * 3^12) makes the mapping a
+# bijection over the code space.
+_MULTIPLIER = 1640531527
+_OFFSET = 811816853
+
+
+def _encode(number):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        number, digit = divmod(number, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+class RoomCodeAllocator:
+    """Hands out candidate room codes; see module docstring."""
+
+    COUNTER_KEY = 'room_codes:counter'
+
+    def __init__(self, max_attempts=8):
+        self.max_attempts = max_attempts
+        self._redis = None
+
+    def configure(self, redis_client=None):
+        self._redis = redis_client
+
+    def candidate(self):
+        """The next code to try (not guaranteed free - see ``insert_room``)."""
+        if self._redis is not None:
+            try:
+                n = self._redis.incr(self.COUNTER_KEY)
+                return _encode((n * _MULTIPLIER + _OFFSET) % CODE_SPACE)
+            except Exception as exc:
+                print(f"[ROOMS] Room code counter unavailable, using random codes: {exc}")
+        return ''.join(random.choices(ALPHABET, k=CODE_LENGTH))
+
+    def insert_room(self, room):
+        """Assign ``room`` a free code and flush it, retrying on collisions.
+
+        Only the room insert is rolled back on a collision; other pending
+        changes in the session are kept. The caller commits.
+        """
+        from database import db
+
+        for attempt in range(self.max_attempts):
+            room.room_code = self.candidate()
+            try:
+                with db.session.begin_nested():
+                    db.session.add(room)
+                return room
+            except IntegrityError as exc:
+                # The savepoint rollback expunged the room; only retry code clashes
+                if 'room_code' not in str(exc.orig):
+                    raise
+                print(f"[ROOMS] Room code {room.room_code} taken, retrying ({attempt + 1})")
+        raise RuntimeError(f"Could not allocate a room code after {self.max_attempts} attempts")
+
+
+room_codes = RoomCodeAllocator()
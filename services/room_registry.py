@@ -0,0 +1,222 @@
+"""
+Shared registry of live game rooms (room -> game, seats, status).
+
+``active_rooms`` used to be a per-process dict: in a multi-worker deployment
+each worker only knew the rooms it had started, and ``handle_game_over``
+cleared just its own copy. The registry keeps one entry per live room:
+
+  - in Redis (one ``rooms:{code}`` hash per room) when available, so every
+    worker sees the same mapping, and a room finished on one worker is gone
+    for all of them;
+  - behind a short-lived per-process read cache, so hot-path handlers
+    (``game_action`` fires several times a second per room) usually answer
+    "which game, which seat, is it running?" without any round trip;
+  - in process memory only when Redis is unavailable, where entries are
+    dropped after ``local_max_age_seconds`` and reloaded from the database on
+    the next ``lookup()`` -- a bound on any change that skipped the registry.
+
+Entries mirror the ``GameRoom`` columns the socket handlers read and are
+returned as ``RoomEntry`` objects, which offer the same attributes and
+seat helpers as a ``GameRoom`` row. Rooms missing from the registry (e.g.
+after a restart) are loaded from the database on first use. Every code path
+that changes a room's status, turn or game re-registers it after its commit.
+A worker's cached copy can still be up to ``local_ttl_seconds`` behind a
+change made on another worker, so ``game_action`` claims each move with an
+UPDATE conditional on the entry's status and ``move_seq`` (bumped by every
+claim) before touching the engine, and ``refresh()``es the entry on a miss.
+
+    from services.room_registry import room_registry
+    room_registry.register(room)                  # after committing changes
+    entry = room_registry.lookup(room_code)       # registry, then GameRoom
+"""
+import json
+import threading
+import time
+from datetime import datetime
+
+from services.read_replica import primary_reads
+
+FIELDS = (
+    'room_code', 'game_id', 'player1_id', 'player2_id', 'status',
+    'bet_session_id', 'bet_amount', 'bet_type', 'turn_duration_seconds',
+    'turn_deadline', 'current_turn_player', 'match_id', 'tournament_id', 'move_seq',
+)
+_DATETIME_FIELDS = ('turn_deadline',)
+LIVE_STATUSES = ('waiting', 'in_progress', 'paused')
+
+
+class RoomEntry:
+    """Read-only snapshot of a live room (duck-types the ``GameRoom`` reads)."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, **values):
+        for field in FIELDS:
+            setattr(self, field, values.get(field))
+
+    def is_player_in_room(self, user_id):
+        return user_id in (self.player1_id, self.player2_id)
+
+    def get_opponent_id(self, user_id):
+        if user_id == self.player1_id:
+            return self.player2_id
+        if user_id == self.player2_id:
+            return self.player1_id
+        return None
+
+    def seat_of(self, user_id):
+        """0 for player 1, 1 for player 2, None for anyone else."""
+        if user_id == self.player1_id:
+            return 0
+        if user_id == self.player2_id:
+            return 1
+        return None
+
+    def to_fields(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def replace(self, **changes):
+        """A copy with ``changes`` applied (entries themselves are not mutated)."""
+        return RoomEntry(**{**self.to_fields(), **changes})
+
+
+class RoomRegistry:
+    """room_code -> RoomEntry, shared through Redis when available."""
+
+    def __init__(self, local_ttl_seconds=1.0, local_max_age_seconds=30.0, redis_ttl_seconds=86400):
+        self.local_ttl_seconds = local_ttl_seconds
+        self.local_max_age_seconds = local_max_age_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._redis = None
+        self._local = {}   # room_code -> (RoomEntry, cached_at)
+        self._lock = threading.Lock()
+
+    def configure(self, redis_client=None):
+        self._redis = redis_client
+        with self._lock:
+            self._local = {}
+
+    # ---- Writes --------------------------------------------------------
+
+    def register(self, room):
+        """Store the current state of ``room`` (a GameRoom or RoomEntry)."""
+        entry = RoomEntry(**{field: getattr(room, field, None) for field in FIELDS})
+        if self._redis is not None:
+            try:
+                key = self._key(entry.room_code)
+                pipe = self._redis.pipeline()
+                pipe.delete(key)
+                pipe.hset(key, mapping=_encode(entry))
+                pipe.expire(key, self.redis_ttl_seconds)
+                pipe.execute()
+            except Exception as exc:
+                print(f"[ROOMS] Failed to register room {entry.room_code}: {exc}")
+        with self._lock:
+            self._local[entry.room_code] = (entry, time.monotonic())
+        return entry
+
+    def discard(self, room_code):
+        """Forget a room that finished or was abandoned (on every worker)."""
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._key(room_code))
+            except Exception as exc:
+                print(f"[ROOMS] Failed to discard room {room_code}: {exc}")
+        with self._lock:
+            self._local.pop(room_code, None)
+
+    # ---- Reads ---------------------------------------------------------
+
+    def get(self, room_code):
+        """The registered entry for ``room_code``, or None."""
+        if not room_code:
+            return None
+        with self._lock:
+            cached = self._local.get(room_code)
+        age = None
+        if cached is not None:
+            entry, cached_at = cached
+            age = time.monotonic() - cached_at
+            if age <= self.local_ttl_seconds:
+                return entry
+        if self._redis is None:
+            # The local copy is the registry itself, up to a maximum age
+            if age is not None and age <= self.local_max_age_seconds:
+                return entry
+            with self._lock:
+                if self._local.get(room_code) is cached:
+                    self._local.pop(room_code, None)
+            return None
+        try:
+            raw = self._redis.hgetall(self._key(room_code))
+        except Exception as exc:
+            print(f"[ROOMS] Registry unavailable for room {room_code}: {exc}")
+            return None
+        if not raw:
+            with self._lock:
+                self._local.pop(room_code, None)
+            return None
+        entry = _decode(raw)
+        with self._lock:
+            self._local[room_code] = (entry, time.monotonic())
+        return entry
+
+    def lookup(self, room_code):
+        """Registry first, then the ``GameRoom`` row (registered on the way)."""
+        entry = self.get(room_code)
+        if entry is not None:
+            return entry
+        return self._load(room_code)
+
+    def refresh(self, room_code):
+        """Replace a registered copy found to be stale with the ``GameRoom`` row."""
+        entry = self._load(room_code)
+        if entry is None or entry.status not in LIVE_STATUSES:
+            self.discard(room_code)
+        return entry
+
+    def _load(self, room_code):
+        from database import GameRoom
+
+        # Registered entries are trusted by the game paths: read the primary
+        with primary_reads():
+            room = GameRoom.query.filter_by(room_code=room_code).populate_existing().first() \
+                if room_code else None
+        if room is None:
+            return None
+        if room.status not in LIVE_STATUSES:
+            # Finished rooms are answered but not kept
+            return RoomEntry(**{field: getattr(room, field, None) for field in FIELDS})
+        return self.register(room)
+
+    def __contains__(self, room_code):
+        return self.get(room_code) is not None
+
+    @staticmethod
+    def _key(room_code):
+        return f"rooms:{room_code}"
+
+
+def _encode(entry):
+    fields = {}
+    for field, value in entry.to_fields().items():
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        fields[field] = json.dumps(value)
+    return fields
+
+
+def _decode(raw):
+    values = {}
+    for field, blob in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        if field not in FIELDS:
+            continue
+        value = json.loads(blob)
+        if field in _DATETIME_FIELDS and value:
+            value = datetime.fromisoformat(value)
+        values[field] = value
+    return RoomEntry(**values)
+
+
+room_registry = RoomRegistry()
@@ -0,0 +1,122 @@
+"""
+Spectator fan-out for live rooms.
+
+Spectators of a room join the Socket.IO room ``spectate:{room_code}`` and
+receive ``spectator_update`` snapshots of the game's *public* state (hand
+sizes, never cards in hand, no engine log). Game handlers only call
+``publish()``, which stores the latest snapshot for the room and returns:
+
+  - at most ``max_per_second`` updates go out per room; moves arriving faster
+    are coalesced, so only the newest snapshot is sent when the window opens
+    (the pending send is a turn-timer wheel entry, nothing sleeps);
+  - each send is ONE ``socketio.emit`` to the spectator room. With a message
+    queue configured that single emit is fanned out by every worker to its
+    own viewers, so a final watched by thousands costs ``handle_game_action``
+    the same as one watched by nobody.
+
+    from services.spectators import spectator_feed, public_state
+    spectator_feed.publish(room_code, public_state(state, room))
+"""
+import threading
+import time
+
+from services.turn_timers import turn_timers
+
+
+def spectator_room(room_code):
+    return f"spectate:{room_code}"
+
+
+def public_state(state, room):
+    """The parts of an engine state anyone may see (no hands, no engine log)."""
+    hands = state.get('hands', {}) or {}
+    return {
+        'room_code': room.room_code,
+        'player1_id': room.player1_id,
+        'player2_id': room.player2_id,
+        'phase': state.get('phase'),
+        'attacker': state.get('attacker'),
+        'defender': state.get('defender'),
+        'attack_card': state.get('attack_card'),
+        'attack_card_value': state.get('attack_card_value'),
+        'hand_counts': [len(hands.get(0, [])), len(hands.get(1, []))],
+        'game_over': bool(state.get('game_over')),
+        'winner': state.get('winner'),
+        'turn_deadline': room.turn_deadline.isoformat() if getattr(room, 'turn_deadline', None) else None,
+    }
+
+
+class SpectatorFeed:
+    """Rate-limited, coalescing ``spectator_update`` broadcaster."""
+
+    def __init__(self, max_per_second=2.0):
+        self.max_per_second = max_per_second
+        self._emit = None
+        self._latest = {}     # room_code -> newest unsent snapshot
+        self._snapshots = {}  # room_code -> last sent snapshot (for new viewers)
+        self._last_sent = {}  # room_code -> epoch seconds
+        self._lock = threading.Lock()
+
+    def configure(self, emit=None, max_per_second=None):
+        """``emit(event, payload, room)`` is normally ``socketio.emit``."""
+        self._emit = emit
+        if max_per_second is not None:
+            self.max_per_second = max_per_second
+
+    @property
+    def interval(self):
+        return 1.0 / self.max_per_second if self.max_per_second > 0 else 0.0
+
+    def publish(self, room_code, snapshot, final=False):
+        """Queue ``snapshot`` for the room's spectators.
+
+        ``final`` (game over) bypasses the rate limit so viewers always see
+        the result.
+        """
+        now = time.time()
+        with self._lock:
+            self._latest[room_code] = snapshot
+            due = self._last_sent.get(room_code, 0.0) + self.interval
+        if final or due <= now:
+            turn_timers.cancel(self._timer_key(room_code))
+            self.flush(room_code)
+        elif not turn_timers.is_armed(self._timer_key(room_code)):
+            turn_timers.schedule(self._timer_key(room_code), due, self._on_window_open)
+
+    def _on_window_open(self, key):
+        self.flush(key.split(':', 1)[1])
+
+    def flush(self, room_code):
+        """Send the newest pending snapshot, if any. Returns it."""
+        with self._lock:
+            snapshot = self._latest.pop(room_code, None)
+            if snapshot is None:
+                return None
+            self._snapshots[room_code] = snapshot
+            self._last_sent[room_code] = time.time()
+        if self._emit is not None:
+            try:
+                self._emit('spectator_update', snapshot, room=spectator_room(room_code))
+            except Exception as exc:
+                print(f"[SPECTATE] Failed to publish room {room_code}: {exc}")
+        return snapshot
+
+    def snapshot(self, room_code):
+        """The last snapshot sent for the room (what a new viewer starts from)."""
+        with self._lock:
+            return self._latest.get(room_code) or self._snapshots.get(room_code)
+
+    def close(self, room_code):
+        """Forget a finished room."""
+        turn_timers.cancel(self._timer_key(room_code))
+        with self._lock:
+            self._latest.pop(room_code, None)
+            self._snapshots.pop(room_code, None)
+            self._last_sent.pop(room_code, None)
+
+    @staticmethod
+    def _timer_key(room_code):
+        return f"spectate:{room_code}"
+
+
+spectator_feed = SpectatorFeed()
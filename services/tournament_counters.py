@@ -0,0 +1,205 @@
+"""
+Denormalized tournament counters.
+
+Every serialized tournament ran a ``COUNT`` of its registered participants,
+``_lock_consensus_info`` loaded every participant to count lock votes, and
+the scheduler recounted per due schedule -- so a tournament list cost
+several queries per tournament. ``tournaments`` now carries three counters:
+
+  - ``registered_count``   participants with status ``registered``;
+  - ``lock_voter_count``   of those, the ones who are not the creator (they
+    vote on a manual lock);
+  - ``lock_vote_count``    of those, the ones who have voted.
+
+They are kept in step by the session, not by each call site: an
+``after_flush`` hook looks at every TournamentParticipant inserted, changed
+or deleted in the flush (join, payment callback, leave, vote, bracket
+build, cancel ...), works out how each one's contribution changed, and
+applies the difference with one ``UPDATE tournaments SET x = x + :delta``
+per tournament. The increment runs in the same transaction as the
+participant change, so the two commit or roll back together, and adding in
+SQL means two workers registering players at once cannot lose an update.
+Tournament objects already loaded get the new values written back.
+
+``counts()`` flushes first, so values read right after changing a
+participant include that change.
+
+``check()`` recounts from ``tournament_participants`` and reports drift
+(e.g. rows edited by hand); ``check(repair=True)`` resets the counters with
+a conditional UPDATE that only applies while the stored value is still the
+one that was checked. The scheduler runs it hourly for running tournaments;
+``python tools/check_tournament_counters.py [--repair]`` runs it by hand.
+
+    from services.tournament_counters import tournament_counters
+    registered, voters, votes = tournament_counters.counts(tournament)
+"""
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database import db, Tournament, TournamentParticipant
+
+COUNTERS = ('registered_count', 'lock_voter_count', 'lock_vote_count')
+ACTIVE_STATUSES = ('open', 'locked', 'in_progress')
+
+
+def contribution(status, lock_voted, is_creator):
+    """What one participant adds to ``COUNTERS``."""
+    registered = status == 'registered'
+    voter = registered and not is_creator
+    return (int(registered), int(voter), int(voter and bool(lock_voted)))
+
+
+def _previous(state, key):
+    """The attribute's value before this flush (its current value if unchanged)."""
+    history = state.attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(state.obj(), key)
+
+
+class TournamentCounters:
+    """Maintains and verifies the participant counters on ``tournaments``."""
+
+    def __init__(self):
+        self._installed = False
+
+    def install(self):
+        """Hook every session's flushes (idempotent)."""
+        if self._installed:
+            return
+        self._installed = True
+        event.listen(Session, 'after_flush', self._after_flush)
+
+    # ---- Reading ---------------------------------------------------------
+
+    @staticmethod
+    def counts(tournament):
+        """``(registered, lock voters, lock votes)``, pending changes included."""
+        db.session.flush()
+        return tuple(getattr(tournament, name) or 0 for name in COUNTERS)
+
+    # ---- Maintenance (session hook) --------------------------------------
+
+    def _after_flush(self, session, _flush_context):
+        deltas = {}
+
+        def add(tournament_id, before, after):
+            if before == after or tournament_id is None:
+                return
+            current = deltas.setdefault(tournament_id, [0, 0, 0])
+            for index, (old, new) in enumerate(zip(before, after)):
+                current[index] += new - old
+
+        def is_creator(tournament_id, user_id):
+            tournament = session.get(Tournament, tournament_id)
+            return tournament is not None and tournament.creator_id == user_id
+
+        for obj in session.new:
+            if isinstance(obj, TournamentParticipant):
+                add(obj.tournament_id, (0, 0, 0),
+                    contribution(obj.status, obj.lock_voted, is_creator(obj.tournament_id, obj.user_id)))
+        for obj in session.dirty:
+            if not isinstance(obj, TournamentParticipant):
+                continue
+            state = inspect(obj)
+            before = contribution(_previous(state, 'status'), _previous(state, 'lock_voted'),
+                                  is_creator(obj.tournament_id, obj.user_id))
+            after = contribution(obj.status, obj.lock_voted, is_creator(obj.tournament_id, obj.user_id))
+            add(obj.tournament_id, before, after)
+        for obj in session.deleted:
+            if isinstance(obj, TournamentParticipant):
+                state = inspect(obj)
+                add(obj.tournament_id,
+                    contribution(_previous(state, 'status'), _previous(state, 'lock_voted'),
+                                 is_creator(obj.tournament_id, obj.user_id)),
+                    (0, 0, 0))
+
+        # Tournament-id order, so concurrent flushes lock rows in the same order
+        for tournament_id in sorted(deltas):
+            delta = deltas[tournament_id]
+            if any(delta):
+                self._increment(session, tournament_id, delta)
+
+    @staticmethod
+    def _increment(session, tournament_id, delta):
+        values = {name: getattr(Tournament, name) + step for name, step in zip(COUNTERS, delta) if step}
+        stmt = db.update(Tournament).where(Tournament.id == tournament_id).values(**values) \
+            .execution_options(synchronize_session=False)
+        columns = [getattr(Tournament, name) for name in COUNTERS]
+        if session.get_bind(mapper=Tournament).dialect.update_returning:
+            row = session.execute(stmt.returning(*columns)).first()
+        else:
+            session.execute(stmt)
+            row = session.execute(db.select(*columns).where(Tournament.id == tournament_id)).first()
+        tournament = session.identity_map.get(session.identity_key(Tournament, tournament_id))
+        if row is not None and tournament is not None:
+            for name, value in zip(COUNTERS, row):
+                set_committed_value(tournament, name, value)
+
+    # ---- Consistency check -----------------------------------------------
+
+    @staticmethod
+    def actual(tournament_ids=None):
+        """``{tournament_id: (registered, voters, votes)}`` recounted from the participants."""
+        registered = TournamentParticipant.status == 'registered'
+        voter = registered & (TournamentParticipant.user_id != Tournament.creator_id)
+        query = db.session.query(
+            TournamentParticipant.tournament_id,
+            func.sum(case((registered, 1), else_=0)),
+            func.sum(case((voter, 1), else_=0)),
+            func.sum(case((voter & (TournamentParticipant.lock_voted == True), 1), else_=0)),  # noqa: E712
+        ).join(Tournament, Tournament.id == TournamentParticipant.tournament_id) \
+            .group_by(TournamentParticipant.tournament_id)
+        if tournament_ids is not None:
+            query = query.filter(TournamentParticipant.tournament_id.in_(tournament_ids))
+        return {row[0]: tuple(int(v or 0) for v in row[1:]) for row in query}
+
+    def check(self, repair=False, statuses=None):
+        """Compare stored counters with a recount.
+
+        Returns one ``{'tournament_id', 'stored', 'actual', 'repaired'}`` dict
+        per tournament that has drifted. ``statuses`` limits the check (all
+        tournaments when None).
+        """
+        query = db.session.query(Tournament.id, *[getattr(Tournament, name) for name in COUNTERS])
+        if statuses:
+            query = query.filter(Tournament.status.in_(statuses))
+        stored = {row[0]: tuple(int(v or 0) for v in row[1:]) for row in query}
+        if not stored:
+            return []
+        actual = self.actual(list(stored))
+
+        drift = []
+        for tournament_id in sorted(stored):
+            expected = actual.get(tournament_id, (0, 0, 0))
+            if stored[tournament_id] == expected:
+                continue
+            repaired = False
+            if repair:
+                matched = db.session.execute(
+                    db.update(Tournament)
+                    .where(Tournament.id == tournament_id,
+                           *[getattr(Tournament, name) == value
+                             for name, value in zip(COUNTERS, stored[tournament_id])])
+                    .values(**dict(zip(COUNTERS, expected)))
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                repaired = bool(matched)
+            drift.append({
+                'tournament_id': tournament_id,
+                'stored': dict(zip(COUNTERS, stored[tournament_id])),
+                'actual': dict(zip(COUNTERS, expected)),
+                'repaired': repaired,
+            })
+        if repair:
+            db.session.commit()
+        if drift:
+            print(f"[TOURNAMENTS] {len(drift)} tournament counter(s) out of step"
+                  f"{' (repaired)' if repair else ''}: {[d['tournament_id'] for d in drift]}")
+        return drift
+
+
+tournament_counters = TournamentCounters()
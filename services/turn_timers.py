@@ -0,0 +1,190 @@
+"""
+Hierarchical timer wheel for per-room turn deadlines.
+
+The old AFK handling polled every in-progress room every 20 seconds. Instead,
+each room arms one timer keyed by its room code; arming again (every move)
+replaces the previous timer and game over cancels it. Timers sit in a
+hierarchy of wheels (``slots`` buckets per level, each level ``slots`` times
+coarser than the one below) so scheduling, re-arming and cancelling are O(1)
+and a tick only touches the bucket that is due -- tens of thousands of live
+rooms cost nothing between deadlines.
+
+With the defaults (100 ms tick, 64 slots, 4 levels) the wheel covers ~19 days
+at 100 ms precision; anything further out parks in the top level and is
+re-placed as time advances.
+
+    from services.turn_timers import turn_timers
+    turn_timers.schedule(room_code, deadline_datetime, callback)
+    turn_timers.cancel(room_code)
+"""
+import math
+import threading
+import time
+from datetime import datetime
+
+
+class _Timer:
+    __slots__ = ('key', 'expires_tick', 'callback', 'level', 'slot')
+
+    def __init__(self, key, expires_tick, callback):
+        self.key = key
+        self.expires_tick = expires_tick
+        self.callback = callback
+        self.level = None
+        self.slot = None
+
+
+class HierarchicalTimerWheel:
+    """Keyed timers on a hierarchy of wheels. Not tied to any clock.
+
+    ``advance(now)`` moves the wheel forward to ``now`` (seconds, same epoch
+    as the scheduled deadlines) and fires every timer that became due, so the
+    wheel can be driven by a real thread or stepped by hand in tests.
+    """
+
+    def __init__(self, tick_seconds=0.1, slots=64, levels=4, now=None):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._timers = {}
+        self._lock = threading.Lock()
+        self._current_tick = self._to_tick(time.time() if now is None else now, math.floor)
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def _to_tick(self, seconds, rounding=math.ceil):
+        return int(rounding(seconds / self.tick_seconds))
+
+    def schedule(self, key, when, callback):
+        """Arm (or re-arm) ``key`` to call ``callback(key)`` at ``when`` (epoch seconds)."""
+        with self._lock:
+            self._remove(key)
+            timer = _Timer(key, self._to_tick(when), callback)
+            self._timers[key] = timer
+            self._place(timer)
+
+    def cancel(self, key):
+        """Disarm ``key``. Returns True when a timer was pending."""
+        with self._lock:
+            return self._remove(key)
+
+    def deadline(self, key):
+        """Epoch seconds the timer for ``key`` fires at, or None."""
+        timer = self._timers.get(key)
+        return timer.expires_tick * self.tick_seconds if timer else None
+
+    def advance(self, now):
+        """Advance to ``now`` and fire due timers. Returns the number fired."""
+        target = self._to_tick(now, math.floor)
+        due = []
+        with self._lock:
+            while self._current_tick < target:
+                self._current_tick += 1
+                self._cascade()
+                bucket = self._wheels[0][self._current_tick % self.slots]
+                for key, timer in list(bucket.items()):
+                    if timer.expires_tick <= self._current_tick:
+                        del bucket[key]
+                        del self._timers[key]
+                        due.append(timer)
+
+        for timer in due:
+            try:
+                timer.callback(timer.key)
+            except Exception as exc:
+                print(f"[TIMERS] Callback for {timer.key} failed: {exc}")
+        return len(due)
+
+    def _place(self, timer, cascading=False):
+        # A cascade runs before the current tick's level-0 bucket is fired, so
+        # a timer due right now still makes it; a fresh schedule() cannot.
+        earliest = self._current_tick if cascading else self._current_tick + 1
+        delta = timer.expires_tick - self._current_tick
+        if timer.expires_tick < earliest:
+            # Already due: fire as soon as possible.
+            level, expires = 0, earliest
+        else:
+            level, expires = 0, timer.expires_tick
+            span = self.slots
+            while delta >= span and level < self.levels - 1:
+                level += 1
+                span *= self.slots
+            if delta >= span:
+                # Beyond the top wheel: park at its far edge and re-place later.
+                expires = self._current_tick + span - 1
+        slot = (expires // (self.slots ** level)) % self.slots
+        timer.level, timer.slot = level, slot
+        self._wheels[level][slot][timer.key] = timer
+
+    def _cascade(self):
+        """Re-place the coarser buckets whose span starts at the current tick."""
+        for level in range(1, self.levels):
+            span = self.slots ** level
+            if self._current_tick % span:
+                break
+            slot = (self._current_tick // span) % self.slots
+            bucket = self._wheels[level][slot]
+            self._wheels[level][slot] = {}
+            for timer in bucket.values():
+                self._place(timer, cascading=True)
+
+    def _remove(self, key):
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        self._wheels[timer.level][timer.slot].pop(key, None)
+        return True
+
+
+class TurnTimerService:
+    """Process-wide wheel plus the background task that drives it."""
+
+    def __init__(self, tick_seconds=0.1, slots=64, levels=4):
+        self.wheel = HierarchicalTimerWheel(tick_seconds=tick_seconds, slots=slots, levels=levels)
+        self._started = False
+
+    def schedule(self, key, deadline, callback):
+        """Arm ``key`` for ``deadline`` (naive UTC datetime or epoch seconds)."""
+        if isinstance(deadline, datetime):
+            deadline = _utc_timestamp(deadline)
+        self.wheel.schedule(key, deadline, callback)
+
+    def cancel(self, key):
+        return self.wheel.cancel(key)
+
+    def is_armed(self, key):
+        return key in self.wheel
+
+    def pending(self):
+        return len(self.wheel)
+
+    def start(self, start_background_task=None, sleep=None):
+        """Start ticking (idempotent). Defaults to a daemon thread + time.sleep."""
+        if self._started:
+            return
+        self._started = True
+        sleep = sleep or time.sleep
+
+        def _run():
+            while True:
+                self.wheel.advance(time.time())
+                sleep(self.wheel.tick_seconds)
+
+        if start_background_task is not None:
+            start_background_task(_run)
+        else:
+            threading.Thread(target=_run, daemon=True).start()
+        print('[TIMERS] Turn timer wheel started')
+
+
+def _utc_timestamp(value):
+    """Epoch seconds for a naive UTC datetime (the convention used by the models)."""
+    return (value - datetime(1970, 1, 1)).total_seconds()
+
+
+turn_timers = TurnTimerService()
@@ -0,0 +1,203 @@
+"""
+Atomic wallet updates.
+
+``Player.deduct_bet`` / ``award_winnings`` / ``record_game_result`` used to
+load the row, change the floats in Python and commit, so two games settling
+for the same player at once could overwrite each other's balance (lost
+update), and the row stayed locked for the whole read-modify-write. Every
+balance change is now a single conditional ``UPDATE ... RETURNING``:
+
+  - ``debit()`` only matches when the balance covers the amount (and, for
+    free cash, when it has not expired) -- "deduct only if balance >= amount"
+    is checked by the database, not by a stale Python copy;
+  - ``credit()`` adds in SQL (``balance = balance + :amount``);
+  - ``record_results()`` increments games / wins / losses in SQL.
+
+The matching ``Transaction`` ledger row is added to the same session, so it
+commits (or rolls back) with the balance change. Nothing here commits: the
+caller owns the transaction. ``settle()`` applies several players' credits
+and results in one transaction, touching rows in player-id order so
+concurrent settlements lock them in the same order.
+
+Player objects already loaded in the session get the new committed values
+written back, so code that reads ``player.real_balance`` afterwards sees the
+database's value without another SELECT.
+
+    from services.wallet import wallet
+    balance = wallet.debit(player.id, 10.0, 'real', transaction_type=TX_BET)
+    if balance is None: ...  # insufficient (or expired) funds
+    wallet.settle(credits=[{...}], results={winner.id: True, loser.id: False})
+    db.session.commit()
+"""
+from datetime import datetime
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database import db, Player, Transaction, TX_BET, TX_WIN
+
+BALANCE_REAL = 'real'
+BALANCE_FAKE = 'fake'
+
+_BALANCE_COLUMNS = {
+    BALANCE_REAL: 'real_balance',
+    BALANCE_FAKE: 'fake_balance',
+}
+
+
+class WalletService:
+    """Applies balance and statistics changes as single SQL statements."""
+
+    # ---- Balances --------------------------------------------------------
+
+    def debit(self, player_id, amount, balance_type, transaction_type=TX_BET,
+              wagered=True, **ledger):
+        """Take ``amount`` if the balance covers it. Returns the new balance, or None."""
+        column = self._balance_column(balance_type)
+        balance = getattr(Player, column)
+        amount = self._amount(amount)
+
+        values = {column: balance - amount}
+        if wagered:
+            values['total_wagered'] = Player.total_wagered + amount
+        conditions = [Player.id == player_id, balance >= amount]
+        if balance_type == BALANCE_FAKE:
+            conditions.append(Player.fake_balance_expires_at > datetime.utcnow())
+
+        row = self._update(player_id, conditions, values, column)
+        if row is None:
+            return None
+        balance_after = row[column]
+        self._ledger(player_id, transaction_type, amount, balance_type,
+                     balance_after + amount, balance_after, ledger)
+        return balance_after
+
+    def credit(self, player_id, amount, balance_type, transaction_type=TX_WIN,
+               winnings=True, **ledger):
+        """Add ``amount``. Returns the new balance (None if the player does not exist)."""
+        column = self._balance_column(balance_type)
+        amount = self._amount(amount)
+
+        values = {column: getattr(Player, column) + amount}
+        if winnings:
+            values['total_winnings'] = Player.total_winnings + amount
+
+        row = self._update(player_id, [Player.id == player_id], values, column)
+        if row is None:
+            return None
+        balance_after = row[column]
+        self._ledger(player_id, transaction_type, amount, balance_type,
+                     balance_after - amount, balance_after, ledger)
+        return balance_after
+
+    # ---- Statistics ------------------------------------------------------
+
+    def record_results(self, results):
+        """Count one finished game per player: ``{player_id: won}``.
+
+        Refreshes each player's leaderboard row with the new totals.
+        """
+        from services.leaderboard import leaderboard
+
+        for player_id in sorted(results):
+            won = results[player_id]
+            values = {
+                'total_games': Player.total_games + 1,
+                'wins': Player.wins + (1 if won else 0),
+                'losses': Player.losses + (0 if won else 1),
+            }
+            row = self._update(player_id, [Player.id == player_id], values,
+                               'total_games', 'wins', 'losses')
+            if row is None:
+                continue
+            player = db.session.get(Player, player_id)
+            if player is not None:
+                leaderboard.record(player)
+
+    # ---- Settlements -----------------------------------------------------
+
+    def settle(self, credits=(), results=None):
+        """Apply several players' credits (and game results) in one transaction.
+
+        ``credits`` is a list of dicts with ``player_id``, ``amount``,
+        ``balance_type`` and optionally ``transaction_type``, ``winnings`` and
+        ledger fields (``description``, ``session_id``, ``game_id``,
+        ``tournament_id``). Returns ``{player_id: balance_after}``.
+        """
+        balances = {}
+        for entry in sorted(credits, key=lambda e: e['player_id']):
+            entry = dict(entry)
+            player_id = entry.pop('player_id')
+            amount = entry.pop('amount')
+            balance_type = entry.pop('balance_type')
+            balance = self.credit(player_id, amount, balance_type, **entry)
+            if balance is not None:
+                balances[player_id] = balance
+        if results:
+            self.record_results(results)
+        return balances
+
+    # ---- Internals -------------------------------------------------------
+
+    @staticmethod
+    def _balance_column(balance_type):
+        try:
+            return _BALANCE_COLUMNS[balance_type]
+        except KeyError:
+            raise ValueError(f"Unknown balance type: {balance_type!r}") from None
+
+    @staticmethod
+    def _amount(amount):
+        amount = float(amount or 0)
+        if amount < 0:
+            raise ValueError("Wallet amounts must not be negative")
+        return amount
+
+    @staticmethod
+    def _update(player_id, conditions, values, *returned):
+        """Run one conditional UPDATE; return the new values of ``returned`` (None if no row matched)."""
+        stmt = db.update(Player).where(*conditions).values(**values) \
+            .execution_options(synchronize_session=False)
+        columns = [getattr(Player, name) for name in returned]
+
+        if db.engine.dialect.update_returning:
+            row = db.session.execute(stmt.returning(*columns)).first()
+            if row is None:
+                return None
+            fresh = dict(zip(returned, row))
+        else:
+            if db.session.execute(stmt).rowcount == 0:
+                return None
+            # Same transaction, so this reads our own write.
+            fresh = dict(zip(returned, db.session.execute(
+                db.select(*columns).where(Player.id == player_id)).one()))
+
+        # Keep an already-loaded Player in step without re-selecting it.
+        player = db.session.identity_map.get(db.session.identity_key(Player, player_id))
+        if player is not None:
+            for name, value in fresh.items():
+                set_committed_value(player, name, value)
+            for name in values:
+                if name not in fresh:
+                    db.session.expire(player, [name])
+        return fresh
+
+    @staticmethod
+    def _ledger(player_id, transaction_type, amount, balance_type, before, after, ledger):
+        if not amount:
+            return
+        db.session.add(Transaction(
+            player_id=player_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            balance_type=balance_type,
+            balance_before=before,
+            balance_after=after,
+            status='completed',
+            session_id=ledger.get('session_id'),
+            game_id=ledger.get('game_id'),
+            description=ledger.get('description'),
+            tournament_id=ledger.get('tournament_id'),
+        ))
+
+
+wallet = WalletService()
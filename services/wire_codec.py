@@ -0,0 +1,178 @@
+"""
+Compact wire encoding for the chattiest Socket.IO events.
+
+Every ``game_update`` used to go out as verbose JSON: long repeated keys and
+cards as strings such as ``"10♥"`` (UTF-8, up to 5 bytes each). Clients on
+metered mobile data can opt into a compact form instead:
+
+  - keys are shortened through ``KEYS`` (``game_state`` -> ``s`` ...);
+  - cards become integers ``suit * 13 + value - 1`` (0..51);
+  - the result is packed with msgpack when the ``msgpack`` package is
+    installed (a binary Socket.IO frame), otherwise sent as the shortened
+    JSON object.
+
+Negotiation is per connection: the client emits ``set_encoding``
+``{'encoding': 'compact'}`` and gets ``encoding_set`` back with the key and
+card tables, so the browser decoder never hard-codes them. Every socket sits
+in exactly one of ``{room}#json`` / ``{room}#c`` for each encoded room it
+joins (``join_encoded``), and ``emit_encoded`` sends each variant once - JSON
+as the usual event, compact as ``c:{event}`` - so old clients keep working
+untouched and nobody receives both.
+"""
+import json
+
+from flask import session
+from flask_socketio import emit, join_room, leave_room, rooms
+
+from services.outbound import outbound
+
+try:
+    import msgpack
+except ImportError:  # optional: compact JSON is used instead
+    msgpack = None
+
+ENCODING_JSON = 'json'
+ENCODING_COMPACT = 'compact'
+
+KEYS = {
+    # game_update / game_started envelope
+    'game_state': 's', 'player_index': 'p', 'actor_index': 'a',
+    'is_my_turn': 't', 'action': 'x', 'result': 'r',
+    'turn_deadline': 'd', 'bet_total': 'b', 'room_code': 'rc',
+    'game_id': 'g', 'state': 'gs', 'your_player_index': 'yp', 'your_turn': 'yt',
+    # engine state
+    'phase': 'ph', 'attacker': 'at', 'defender': 'df',
+    'attack_card': 'ac', 'attack_card_value': 'av', 'game_over': 'go',
+    'winner': 'w', 'ui_log': 'l', 'attack_pile': 'ap', 'players': 'pl',
+    'hand': 'h', 'hand_count': 'hc', 'hand_counts': 'hs',
+    # lobby rooms (GameRoom.to_dict)
+    'available_rooms': 'ar', 'my_active_rooms': 'mr',
+    'player1_id': 'p1', 'player2_id': 'p2',
+    'player1_username': 'u1', 'player2_username': 'u2',
+    'created_by_username': 'cu', 'creator_online': 'co', 'status': 'st',
+    'card_count': 'cc', 'bet_amount': 'ba', 'bet_type': 'bt',
+    'current_turn_player': 'ct', 'turn_duration_seconds': 'td',
+    'tournament_id': 'ti', 'match_id': 'mi', 'is_tournament_game': 'it',
+    'is_paused': 'ip', 'pause_requested_by': 'pr', 'created_at': 'ca',
+    'started_at': 'sa', 'room_age_hours': 'ra', 'is_expired': 'ie',
+}
+# Values under these keys are a card or a list of cards.
+CARD_KEYS = ('attack_card', 'hand', 'attack_pile')
+
+# Events that compact clients only ever receive as ``c:<event>``. Sent with
+# the tables so the browser can flag a plain listener that would never fire.
+ENCODED_EVENTS = ('game_started', 'game_update', 'lobby_data', 'spectator_update')
+
+SUITS = ('♥', '♦', '♣', '♠')
+RANKS = ('A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K')
+_CARD_CODES = {f"{rank}{suit}": s * 13 + r
+               for s, suit in enumerate(SUITS) for r, rank in enumerate(RANKS)}
+CARDS = [f"{rank}{suit}" for suit in SUITS for rank in RANKS]
+
+
+def packet_format():
+    return 'msgpack' if msgpack is not None else 'json'
+
+
+def tables():
+    """What a compact client needs to expand payloads (sent once on negotiation)."""
+    return {'encoding': ENCODING_COMPACT, 'format': packet_format(),
+            'keys': KEYS, 'card_keys': list(CARD_KEYS), 'cards': CARDS,
+            'events': list(ENCODED_EVENTS)}
+
+
+def _card(value):
+    if isinstance(value, str):
+        return _CARD_CODES.get(value, value)
+    if isinstance(value, list):
+        return [_card(v) for v in value]
+    return value
+
+
+def compact(value):
+    """Shorten keys and encode cards, recursively."""
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            if key in CARD_KEYS:
+                item = _card(item)
+            else:
+                item = compact(item)
+            out[KEYS.get(key, key)] = item
+        return out
+    if isinstance(value, list):
+        return [compact(v) for v in value]
+    return value
+
+
+def encode(payload):
+    """The compact wire form of ``payload`` (bytes with msgpack, else a dict)."""
+    body = compact(payload)
+    if msgpack is not None:
+        return msgpack.packb(body, use_bin_type=True)
+    return body
+
+
+def json_size(payload):
+    """Bytes the payload costs as plain JSON (for comparisons/logging)."""
+    return len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+
+# ---- Per-connection negotiation (call inside Socket.IO handlers) ---------
+
+def current_encoding():
+    return session.get('wire_encoding', ENCODING_JSON)
+
+
+def _suffix(encoding):
+    return '#c' if encoding == ENCODING_COMPACT else '#json'
+
+
+def join_encoded(room):
+    """Join ``room``'s variant matching this connection's encoding."""
+    join_room(f"{room}{_suffix(current_encoding())}")
+
+
+def leave_encoded(room):
+    for suffix in ('#json', '#c'):
+        leave_room(f"{room}{suffix}")
+
+
+def set_encoding(encoding):
+    """Switch this connection's encoding, moving it between room variants."""
+    if encoding not in (ENCODING_JSON, ENCODING_COMPACT):
+        encoding = ENCODING_JSON
+    old_suffix = _suffix(current_encoding())
+    session['wire_encoding'] = encoding
+    new_suffix = _suffix(encoding)
+    if old_suffix != new_suffix:
+        for room in rooms():
+            if room.endswith(old_suffix):
+                leave_room(room)
+                join_room(room[:-len(old_suffix)] + new_suffix)
+    return encoding
+
+
+def _check_event(event):
+    if event not in ENCODED_EVENTS:
+        raise ValueError(f"{event!r} is not in wire_codec.ENCODED_EVENTS")
+
+
+def reply_encoded(event, payload):
+    """``emit`` to the requesting connection in its own encoding."""
+    _check_event(event)
+    if current_encoding() == ENCODING_COMPACT:
+        emit(f"c:{event}", encode(payload))
+    else:
+        emit(event, payload)
+
+
+def emit_encoded(socketio, event, payload, room, topic=None):
+    """Send ``event`` to everyone in ``room``, each in their encoding.
+
+    Goes through the outbound queue (services/outbound.py), so slow clients
+    get frames coalesced by ``topic`` instead of queued without bound.
+    """
+    _check_event(event)
+    outbound.send(event, payload, room=f"{room}#json", topic=topic, socketio=socketio)
+    outbound.send(f"c:{event}", encode(payload), room=f"{room}#c", topic=topic, socketio=socketio)
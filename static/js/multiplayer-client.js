@@ -6,8 +6,16 @@
 var socket = window.socket || (window.io ? io({ transports: window.socketTransports || ['polling', 'websocket'] }) : null);
 if (!socket) {
     console.warn('Socket.IO not available for multiplayer-client.js');
+} else if (socket !== window.socket && window.WireCodec) {
+    WireCodec.negotiate(socket);
 };
 
+// game_started / game_update may arrive compact-encoded (see wire-codec.js)
+function onEncoded(event, handler) {
+    if (window.WireCodec) WireCodec.on(socket, event, handler);
+    else socket.on(event, handler);
+}
+
 // Track max observed hand counts for progress bars
 window.currentMultiplayerProgress = window.currentMultiplayerProgress || { meMax: 0, oppMax: 0 };
 
@@ -196,7 +204,7 @@ if (socket) {
         }
     });
 
-    socket.on('game_started', function(data) {
+    onEncoded('game_started', function(data) {
         console.debug('[multiplayer-client] game_started', data);
         // If the server intends to redirect to /game/<room_code> we will instead initialize in-page
         if (isGamePage()) {
@@ -278,7 +286,7 @@ if (socket) {
         }
     });
 
-    socket.on('game_update', function(payload) {
+    onEncoded('game_update', function(payload) {
         // payload: { game_state, player_index, is_my_turn, action, result, turn_deadline }
         console.debug('[multiplayer-client] game_update', payload);
         if (isGamePage()) {
@@ -21,6 +21,13 @@ if (typeof io === 'function') {
 // expose socket to page-level scripts so multiplayer-client.js can reuse it
 window.socket = socket;
 
+// Ask for the compact wire encoding when the decoder is loaded (wire-codec.js)
+if (window.WireCodec) WireCodec.negotiate(socket);
+function onEncoded(event, handler) {
+    if (window.WireCodec) WireCodec.on(socket, event, handler);
+    else socket.on(event, handler);
+}
+
 // Debounce frequent lobby requests so we don't spam the server
 let __lastGetLobbyAt = 0;
 function debouncedEmitGetLobby(minIntervalMs = 5000) {
@@ -63,29 +70,52 @@ socket.on('error', (data) => {
     }
 });
 
+// The server dropped an event because this client sent it too often.
+socket.on('rate_limited', (data) => {
+    console.warn(`⏳ ${data.event} throttled, retry in ${data.retry_after}s`);
+});
+
 // ==============================================
 // LOBBY EVENTS
 // ==============================================
 
-socket.on('lobby_data', (data) => {
+// Client-side copy of the lobby: seeded by lobby_data, then kept current by
+// the server's debounced lobby_delta pushes (no re-request per change).
+const LOBBY_MAX_ROOMS = 20;
+const lobbyRooms = new Map();
+
+function renderLobby() {
+    const rooms = Array.from(lobbyRooms.values())
+        .sort((a, b) => (b.created_at || '').localeCompare(a.created_at || ''))
+        .slice(0, LOBBY_MAX_ROOMS);
+    updateAvailableRooms(rooms);
+}
+
+onEncoded('lobby_data', (data) => {
     console.debug('📋 Lobby data received:', data);
-    updateAvailableRooms(data.available_rooms);
+    lobbyRooms.clear();
+    (data.available_rooms || []).forEach(room => lobbyRooms.set(room.room_code, room));
+    renderLobby();
     // updateMyGames is not used in current lobby.html layout
 });
 
+socket.on('lobby_delta', (data) => {
+    console.debug('📋 Lobby delta received:', data);
+    (data.removed || []).forEach(code => lobbyRooms.delete(code));
+    (data.added || []).forEach(room => lobbyRooms.set(room.room_code, room));
+    renderLobby();
+});
+
 socket.on('room_created', (data) => {
     console.debug('🎉 Room created:', data);
     const roomCode = data.room ? data.room.room_code : data.room_code;
     alert(`Room ${roomCode} created! Waiting for opponent...`);
-    // Refresh lobby
-    debouncedEmitGetLobby();
+    // The new room arrives with the next lobby_delta
 });
 
 socket.on('opponent_joined', (data) => {
     console.debug('👥 Opponent joined:', data);
     alert(`Opponent ${data.opponent_username} joined! Game starting soon...`);
-    // Refresh lobby
-    debouncedEmitGetLobby();
 });
 
 socket.on('game_starting', (data) => {
@@ -93,7 +123,7 @@ socket.on('game_starting', (data) => {
     // Could show a countdown UI here
 });
 
-socket.on('game_started', (data) => {
+onEncoded('game_started', (data) => {
     console.debug('🎮 Game started:', data);
     // If we're already on the in-page game UI, do not redirect — the in-page
     // multiplayer client will handle applying the state. Otherwise redirect.
@@ -114,7 +144,6 @@ socket.on('room_joined', (data) => {
         window.location.href = `/game/${data.room_code}`;
     } else {
         alert(`Joined room ${data.room_code}! Waiting for game to start...`);
-        debouncedEmitGetLobby();
     }
 });
 
@@ -316,11 +345,26 @@ function rejoinRoom(roomCode) {
 // AUTO-REFRESH LOBBY
 // ==============================================
 
-// Refresh lobby periodically, but only while page is visible and debounced
-const LOBBY_REFRESH_MS = 15000;
+// Live changes arrive as lobby_delta; this slow, visibility-gated refresh
+// only resyncs after missed pushes (e.g. a dropped connection) and updates
+// the room ages.
+const LOBBY_REFRESH_MS = 60000;
 setInterval(() => {
     try {
         if (typeof document !== 'undefined' && document.visibilityState && document.visibilityState !== 'visible') return;
         debouncedEmitGetLobby(LOBBY_REFRESH_MS);
     } catch (e) {}
 }, LOBBY_REFRESH_MS);
+
+// ==============================================
+// PRESENCE HEARTBEAT
+// ==============================================
+
+// The server counts a connection as online for two minutes after its last
+// heartbeat, so a half-dead socket ages out instead of looking connected.
+const PRESENCE_HEARTBEAT_MS = 45000;
+setInterval(() => {
+    try {
+        if (socket.connected && currentUserId) socket.emit('presence_heartbeat');
+    } catch (e) {}
+}, PRESENCE_HEARTBEAT_MS);
@@ -0,0 +1,154 @@
+// ==============================================
+// WIRE-CODEC.JS - Compact Socket.IO payload decoding
+// ==============================================
+//
+// Clients opt into the compact encoding with WireCodec.negotiate(socket).
+// The server answers with its key/card tables (encoding_set) and from then
+// on sends the chatty events as "c:<event>": short keys, integer cards, and
+// msgpack-packed when the server has msgpack installed. WireCodec.on()
+// registers a handler for both variants and always hands it the usual
+// verbose object, so page code doesn't change.
+//
+// A plain socket.on() for one of the encoded events (the server lists them in
+// encoding_set.events) never fires for a compact client, so negotiate() logs
+// an error for any such listener instead of letting it fail silently.
+
+(function () {
+    let tables = null;
+    let longKeys = null;
+    let cardKeys = null;
+
+    // ---- Minimal msgpack decoder (the subset the server emits) ----
+    function unpack(buffer) {
+        const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        const utf8 = new TextDecoder('utf-8');
+        let pos = 0;
+
+        function str(len) { const s = utf8.decode(bytes.subarray(pos, pos + len)); pos += len; return s; }
+        function arr(len) { const out = []; for (let i = 0; i < len; i++) out.push(read()); return out; }
+        function map(len) { const out = {}; for (let i = 0; i < len; i++) { const k = read(); out[k] = read(); } return out; }
+        function bin(len) { const b = bytes.slice(pos, pos + len); pos += len; return b; }
+
+        function read() {
+            const b = bytes[pos++];
+            if (b <= 0x7f) return b;
+            if (b >= 0xe0) return b - 0x100;
+            if ((b & 0xf0) === 0x80) return map(b & 0x0f);
+            if ((b & 0xf0) === 0x90) return arr(b & 0x0f);
+            if ((b & 0xe0) === 0xa0) return str(b & 0x1f);
+            let v;
+            switch (b) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: v = view.getUint8(pos); pos += 1; return bin(v);
+                case 0xc5: v = view.getUint16(pos); pos += 2; return bin(v);
+                case 0xc6: v = view.getUint32(pos); pos += 4; return bin(v);
+                case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+                case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+                case 0xcc: v = view.getUint8(pos); pos += 1; return v;
+                case 0xcd: v = view.getUint16(pos); pos += 2; return v;
+                case 0xce: v = view.getUint32(pos); pos += 4; return v;
+                case 0xcf: v = Number(view.getBigUint64(pos)); pos += 8; return v;
+                case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+                case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+                case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+                case 0xd3: v = Number(view.getBigInt64(pos)); pos += 8; return v;
+                case 0xd9: v = view.getUint8(pos); pos += 1; return str(v);
+                case 0xda: v = view.getUint16(pos); pos += 2; return str(v);
+                case 0xdb: v = view.getUint32(pos); pos += 4; return str(v);
+                case 0xdc: v = view.getUint16(pos); pos += 2; return arr(v);
+                case 0xdd: v = view.getUint32(pos); pos += 4; return arr(v);
+                case 0xde: v = view.getUint16(pos); pos += 2; return map(v);
+                case 0xdf: v = view.getUint32(pos); pos += 4; return map(v);
+            }
+            throw new Error('Unsupported msgpack type 0x' + b.toString(16));
+        }
+        return read();
+    }
+
+    // ---- Expand short keys and integer cards back to the verbose form ----
+    function card(value) {
+        if (typeof value === 'number') return tables.cards[value];
+        if (Array.isArray(value)) return value.map(card);
+        return value;
+    }
+
+    function expand(value) {
+        if (Array.isArray(value)) return value.map(expand);
+        if (value && typeof value === 'object' && !(value instanceof Uint8Array)) {
+            const out = {};
+            Object.keys(value).forEach(k => {
+                const key = longKeys[k] || k;
+                out[key] = cardKeys.has(key) ? card(value[k]) : expand(value[k]);
+            });
+            return out;
+        }
+        return value;
+    }
+
+    function decode(payload) {
+        if (!tables) return payload;
+        const body = (payload instanceof ArrayBuffer || payload instanceof Uint8Array) ? unpack(payload) : payload;
+        return expand(body);
+    }
+
+    // ---- Guard against plain listeners on encoded events ----
+    function watchListeners(socket) {
+        if (socket.__wireRaw) return;
+        socket.__wireRaw = new Set();      // events with a plain socket.on()
+        socket.__wireEncoded = new Set();  // events registered via WireCodec.on()
+        const plainOn = socket.on.bind(socket);
+        socket.on = function (event, handler) {
+            if (!socket.__wireRegistering) {
+                socket.__wireRaw.add(event);
+                checkListeners(socket);
+            }
+            return plainOn(event, handler);
+        };
+    }
+
+    function checkListeners(socket) {
+        if (!tables || !Array.isArray(tables.events) || !socket.__wireRaw) return;
+        tables.events.forEach(event => {
+            if (socket.__wireRaw.has(event) && !socket.__wireEncoded.has(event)) {
+                console.error(`WireCodec: socket.on('${event}') never fires on a compact connection; ` +
+                              `register it with WireCodec.on(socket, '${event}', handler)`);
+                socket.__wireEncoded.add(event);  // report once
+            }
+        });
+    }
+
+    window.WireCodec = {
+        negotiate(socket) {
+            if (!socket || typeof socket.on !== 'function') return;
+            watchListeners(socket);
+            socket.on('encoding_set', data => {
+                if (data && data.encoding === 'compact') {
+                    tables = data;
+                    longKeys = {};
+                    Object.keys(data.keys).forEach(k => { longKeys[data.keys[k]] = k; });
+                    cardKeys = new Set(data.card_keys);
+                    checkListeners(socket);
+                } else {
+                    tables = null;
+                }
+            });
+            // Re-negotiate after every (re)connect: the server forgets per connection.
+            socket.on('connect', () => socket.emit('set_encoding', { encoding: 'compact' }));
+            if (socket.connected) socket.emit('set_encoding', { encoding: 'compact' });
+        },
+        on(socket, event, handler) {
+            if (socket.__wireEncoded) socket.__wireEncoded.add(event);
+            socket.__wireRegistering = true;
+            try {
+                socket.on(event, handler);
+                socket.on('c:' + event, payload => handler(decode(payload)));
+            } finally {
+                socket.__wireRegistering = false;
+            }
+        },
+        decode,
+    };
+})();
@@ -0,0 +1,58 @@
+"""
+Tests for the configurable database engine (database.engine_options /
+sqlite_pragmas) and the pragmas applied to each SQLite connection.
+"""
+
+import os
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import text
+
+from app import app
+from database import db, engine_options, sqlite_pragmas
+
+
+class TestEngineOptions(unittest.TestCase):
+    def test_server_databases_get_a_pool(self):
+        options = engine_options('postgresql://dealuxe@db/dealuxe')
+        self.assertGreater(options['pool_size'], 1)
+        self.assertIn('pool_recycle', options)
+        self.assertTrue(options['pool_pre_ping'])
+
+    def test_sqlite_gets_a_driver_lock_timeout_instead(self):
+        options = engine_options('sqlite:///dealuxe_game.db')
+        self.assertNotIn('pool_size', options)
+        self.assertGreater(options['connect_args']['timeout'], 0)
+
+    def test_memory_databases_skip_wal_and_mmap(self):
+        pragmas = ' '.join(sqlite_pragmas('sqlite:///:memory:'))
+        self.assertNotIn('journal_mode', pragmas)
+        self.assertNotIn('mmap_size', pragmas)
+        self.assertIn('busy_timeout', pragmas)
+
+
+class TestSqlitePragmas(unittest.TestCase):
+    def setUp(self):
+        self.app_context = app.app_context()
+        self.app_context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+
+    def _pragma(self, name):
+        return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+    def test_every_connection_is_tuned(self):
+        if db.engine.name != 'sqlite':
+            self.skipTest('SQLite profile only')
+        self.assertEqual(self._pragma('journal_mode').lower(), 'wal')
+        self.assertEqual(self._pragma('synchronous'), 1)  # NORMAL
+        self.assertGreaterEqual(self._pragma('busy_timeout'), 1000)
+        self.assertLess(self._pragma('cache_size'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests for cold-storage archival of finished games (services/game_archive.py).
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app
+from database import (
+    db, User, Player, GameRoom, BetSession, Move, Transaction, GameArchiveEntry, TX_WIN,
+)
+from services.game_archive import game_archive
+
+
+class TestGameArchive(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.tmp = tempfile.TemporaryDirectory()
+        game_archive.configure(directory=self.tmp.name)
+
+        self.users = []
+        for name in ('arch_p1', 'arch_p2', 'arch_other'):
+            user = User(username=name, email=f'{name}@test.com')
+            user.set_password('pw')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, real_balance=100.0))
+            self.users.append(user)
+        db.session.flush()
+        self.p1, self.p2, self.other = self.users
+
+        old = datetime.utcnow() - timedelta(days=40)
+        self.old_game = self._game('OLD001', 'g-old', 'completed', old)
+        self._game('OLD002', 'g-old-2', 'abandoned', old - timedelta(days=1))
+        self._game('NEW001', 'g-new', 'completed', datetime.utcnow())
+        self._game('RUN001', 'g-run', 'in_progress', old)
+        db.session.commit()
+
+    def tearDown(self):
+        game_archive.configure(directory=None)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def _game(self, code, game_id, status, finished_at):
+        player1 = Player.query.filter_by(user_id=self.p1.id).first()
+        bet_session = BetSession(game_id=game_id, player_id=player1.id, opponent_type='human',
+                                 bet_type='real', bet_amount=5.0, prize_pool=10.0, status='completed')
+        db.session.add(bet_session)
+        db.session.flush()
+        room = GameRoom(room_code=code, game_id=game_id, player1_id=self.p1.id, player2_id=self.p2.id,
+                        bet_session_id=bet_session.id, status=status, created_at=finished_at,
+                        completed_at=finished_at if status == 'completed' else None)
+        db.session.add(room)
+        for seq in (1, 2, 3):
+            db.session.add(Move(bet_session_id=bet_session.id, seq_num=seq, action_type='attack',
+                                action_payload=json.dumps({'card': seq}),
+                                result_snapshot=json.dumps({'turn': seq})))
+        db.session.add(Transaction(player_id=player1.id, transaction_type=TX_WIN, amount=10.0,
+                                   balance_type='real', session_id=bet_session.id, game_id=game_id))
+        return bet_session.id
+
+    def test_archives_only_old_finished_games(self):
+        self.assertEqual(game_archive.archive(), 2)
+
+        self.assertEqual(sorted(r.room_code for r in GameRoom.query), ['NEW001', 'RUN001'])
+        self.assertEqual(BetSession.query.count(), 2)
+        self.assertEqual(Move.query.count(), 6)
+        self.assertEqual(GameArchiveEntry.query.count(), 2)
+        # Ledger keeps the row and its game id; the session link is gone with the session
+        tx = Transaction.query.filter_by(game_id='g-old').one()
+        self.assertIsNone(tx.session_id)
+
+        # Nothing left to do on the next run
+        self.assertEqual(game_archive.archive(), 0)
+
+    def test_archived_game_loads_like_a_live_one(self):
+        live = game_archive.load(game_id='g-old')
+        self.assertFalse(live['archived'])
+        game_archive.archive()
+
+        for key in ({'game_id': 'g-old'}, {'room_code': 'OLD001'}, {'bet_session_id': self.old_game}):
+            archived = game_archive.load(**key)
+            self.assertTrue(archived['archived'])
+            self.assertEqual(archived['room'], live['room'])
+            self.assertEqual(archived['bet_session'], live['bet_session'])
+            self.assertEqual(archived['moves'], live['moves'])
+        self.assertIsNone(game_archive.load(game_id='missing'))
+
+    def test_daily_files_are_plain_gzip_streams(self):
+        game_archive.archive()
+        files = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(len(files), 2)  # one per finishing day
+        with gzip.open(os.path.join(self.tmp.name, files[0]), 'rt') as handle:
+            records = [json.loads(line) for line in handle]
+        self.assertEqual(len(records[0]['moves']), 3)
+
+    def test_replay_route(self):
+        game_archive.archive()
+        http = app.test_client()
+        self.assertEqual(http.get('/api/game/g-old/replay').status_code, 401)
+
+        http.post('/api/auth/login', json={'username': 'arch_p2', 'password': 'pw'})
+        body = http.get('/api/game/g-old/replay').get_json()
+        self.assertEqual([m['seq_num'] for m in body['moves']], [1, 2, 3])
+        self.assertEqual(http.get('/api/game/g-run/replay').status_code, 409)
+
+        other = app.test_client()
+        other.post('/api/auth/login', json={'username': 'arch_other', 'password': 'pw'})
+        self.assertEqual(other.get('/api/game/g-old/replay').status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
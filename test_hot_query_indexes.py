@@ -0,0 +1,41 @@
+"""
+Tests for the hot-query index audit (tools/explain_hot_queries.py).
+"""
+
+import os
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import select
+
+from app import app
+from database import db, GameRoom
+from tools.explain_hot_queries import HOT_QUERIES, audit, explain, full_scans
+
+
+class TestHotQueryIndexes(unittest.TestCase):
+    def setUp(self):
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_every_hot_query_uses_an_index(self):
+        results = audit()
+        self.assertEqual(set(results), set(HOT_QUERIES))
+        offenders = {name: scans for name, (_, scans) in results.items() if scans}
+        self.assertEqual(offenders, {})
+
+    def test_unindexed_filters_are_reported(self):
+        plan = explain(select(GameRoom).where(GameRoom.bet_type == 'real'))
+        self.assertTrue(full_scans(plan, db.engine.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
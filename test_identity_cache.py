@@ -0,0 +1,99 @@
+"""
+Tests for the request-scoped username cache (services/identity_cache.py):
+list payloads must cost a constant number of user queries.
+"""
+
+import os
+import unittest
+from contextlib import contextmanager
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import event
+
+from app import app
+from database import db, User, GameRoom
+from services.identity_cache import preload_users, username_for, identity_for
+from controllers.multiplayer_controller import _load_lobby_rooms
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _record)
+
+
+class TestIdentityCache(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.users = []
+        for i in range(40):
+            # No login needed here; skip the (slow) password hashing.
+            u = User(username=f'ident{i}', email=f'ident{i}@test.com', password_hash='x')
+            db.session.add(u)
+            self.users.append(u)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _rooms(self, count):
+        for i in range(count):
+            db.session.add(GameRoom(
+                room_code=f'ID{i:04d}',
+                player1_id=self.users[2 * i].id,
+                player2_id=self.users[2 * i + 1].id,
+                status='waiting',
+            ))
+        db.session.commit()
+
+    def test_preload_then_lookups_hit_the_cache(self):
+        ids = [u.id for u in self.users]
+        with count_queries() as statements:
+            preload_users(ids + [None, ids[0]])
+            names = [username_for(uid) for uid in ids]
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(names, [f'ident{i}' for i in range(40)])
+
+    def test_unknown_ids_are_remembered(self):
+        with count_queries() as statements:
+            self.assertIsNone(identity_for(99999))
+            self.assertIsNone(username_for(99999))
+        self.assertEqual(len(statements), 1)
+        self.assertIsNone(username_for(None))
+
+    def test_lobby_rooms_cost_constant_queries(self):
+        self._rooms(2)
+        with app.app_context(), count_queries() as small:
+            _load_lobby_rooms()
+
+        db.session.query(GameRoom).delete()
+        db.session.commit()
+        self._rooms(20)
+        with app.app_context(), count_queries() as large:
+            rooms = _load_lobby_rooms()
+
+        self.assertEqual(len(rooms), 20)
+        self.assertEqual(len(small), len(large))
+        room = next(r for r in rooms if r['room_code'] == 'ID0005')
+        self.assertEqual(room['player1_username'], 'ident10')
+        self.assertEqual(room['player2_username'], 'ident11')
+
+
+if __name__ == '__main__':
+    unittest.main()
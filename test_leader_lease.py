@@ -0,0 +1,98 @@
+"""
+Tests for the scheduler leader lease (services/leader_lease.py).
+
+Only one worker may hold a lease at a time; the holder keeps it by renewing
+and another worker takes over once it expires or is released.
+"""
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app
+from database import db, SchedulerLease
+from services.leader_lease import LeaderLease
+
+
+def _redis_or_none():
+    try:
+        import redis
+        client = redis.Redis(host='127.0.0.1', port=6379, db=15, socket_connect_timeout=0.5)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+class TestDatabaseLeaderLease(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.worker_a = LeaderLease('test-sweep', ttl_seconds=60, holder_id='worker-a')
+        self.worker_b = LeaderLease('test-sweep', ttl_seconds=60, holder_id='worker-b')
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_only_one_worker_holds_the_lease(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.assertFalse(self.worker_b.acquire_or_renew())
+        # Renewing keeps it with the holder.
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.assertFalse(self.worker_b.acquire_or_renew())
+        self.assertEqual(SchedulerLease.query.get('test-sweep').holder, 'worker-a')
+
+    def test_expired_lease_is_taken_over(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        row = SchedulerLease.query.get('test-sweep')
+        row.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+        self.assertTrue(self.worker_b.acquire_or_renew())
+        self.assertFalse(self.worker_a.acquire_or_renew())
+        self.assertFalse(self.worker_a.is_leader)
+
+    def test_release_hands_over_immediately(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.worker_a.release()
+        self.assertTrue(self.worker_b.acquire_or_renew())
+
+    def test_release_by_non_holder_is_a_no_op(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.worker_b.release()
+        self.assertFalse(self.worker_b.acquire_or_renew())
+
+
+@unittest.skipIf(_redis_or_none() is None, 'Redis server not available')
+class TestRedisLeaderLease(unittest.TestCase):
+    def setUp(self):
+        self.redis = _redis_or_none()
+        self.redis.delete('leader-lease:test-sweep')
+        self.worker_a = LeaderLease('test-sweep', ttl_seconds=60, redis_client=self.redis, holder_id='worker-a')
+        self.worker_b = LeaderLease('test-sweep', ttl_seconds=60, redis_client=self.redis, holder_id='worker-b')
+
+    def tearDown(self):
+        self.redis.delete('leader-lease:test-sweep')
+
+    def test_only_one_worker_holds_the_lease(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.assertFalse(self.worker_b.acquire_or_renew())
+        self.assertTrue(self.worker_a.acquire_or_renew())
+
+    def test_release_hands_over_immediately(self):
+        self.assertTrue(self.worker_a.acquire_or_renew())
+        self.worker_b.release()
+        self.assertFalse(self.worker_b.acquire_or_renew())
+        self.worker_a.release()
+        self.assertTrue(self.worker_b.acquire_or_renew())
+
+
+if __name__ == '__main__':
+    unittest.main()
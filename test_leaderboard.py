@@ -0,0 +1,145 @@
+"""
+Tests for the incrementally maintained leaderboard (services/leaderboard.py).
+"""
+
+import os
+import unittest
+from unittest import mock
+
+os.environ['ENV'] = 'development'
+
+from app import app
+from database import db, User, Player, Leaderboard
+import services.leaderboard as leaderboard_module
+from services.leaderboard import MIN_GAMES, REDIS_KEY, leaderboard, score_for, _member
+
+
+def _redis_or_none():
+    try:
+        import redis
+        client = redis.Redis(host='127.0.0.1', port=6379, db=15, socket_connect_timeout=0.5)
+        client.ping()
+        return client
+    except Exception:
+        return None
+
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.players = {}
+        # name -> (wins, losses)
+        for name, (wins, losses) in {
+            'lb_ace': (9, 1), 'lb_good': (7, 3), 'lb_mid': (5, 5),
+            'lb_low': (2, 8), 'lb_new': (1, 0),
+        }.items():
+            user = User(username=name, email=f'{name}@test.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            player = Player(user_id=user.id, total_games=0, wins=0, losses=0, total_winnings=0.0)
+            db.session.add(player)
+            db.session.commit()
+            for _ in range(wins):
+                player.record_game_result(won=True)
+            for _ in range(losses):
+                player.record_game_result(won=False)
+            self.players[name] = player
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _uid(self, name):
+        return self.players[name].user_id
+
+    def test_results_keep_the_board_current(self):
+        top = leaderboard.top(10)
+        self.assertEqual([e['username'] for e in top], ['lb_ace', 'lb_good', 'lb_mid', 'lb_low'])
+        self.assertEqual(top[0]['win_rate'], 90.0)
+        # Below MIN_GAMES finished games: not ranked yet
+        self.assertLess(self.players['lb_new'].total_games, MIN_GAMES)
+        self.assertIsNone(leaderboard.rank(self._uid('lb_new')))
+
+        for _ in range(6):
+            self.players['lb_low'].record_game_result(won=True)
+        self.assertEqual(leaderboard.rank(self._uid('lb_low')), 3)
+
+    def test_rank_and_neighbors(self):
+        self.assertEqual(leaderboard.rank(self._uid('lb_mid')), 3)
+        around = leaderboard.around(self._uid('lb_mid'), radius=1)
+        self.assertEqual([(e['rank'], e['username']) for e in around],
+                         [(2, 'lb_good'), (3, 'lb_mid'), (4, 'lb_low')])
+
+    def test_rebuild_matches_incremental_state(self):
+        before = leaderboard.top(10)
+        Leaderboard.query.delete()
+        db.session.commit()
+        self.assertEqual(leaderboard.top(10), [])
+        self.assertEqual(leaderboard.rebuild(), 4)
+        self.assertEqual(leaderboard.top(10), before)
+
+    def test_score_orders_by_win_rate_then_wins(self):
+        self.assertGreater(score_for(9, 10), score_for(8, 10))
+        self.assertGreater(score_for(10, 20), score_for(5, 10))
+
+    def test_sorted_set_members_break_ties_by_user_id(self):
+        # ZREVRANGE lists equal scores by member, highest first
+        members = sorted((_member(uid) for uid in (3, 12, 7, 250)), reverse=True)
+        self.assertEqual(members, [_member(uid) for uid in (3, 7, 12, 250)])
+
+    def test_equal_scores_rank_by_user_id(self):
+        # Both end on 7 wins from 12 games
+        for _ in range(2):
+            self.players['lb_mid'].record_game_result(won=True)
+            self.players['lb_good'].record_game_result(won=False)
+        self.assertLess(self._uid('lb_good'), self._uid('lb_mid'))
+        self.assertEqual([e['username'] for e in leaderboard.top(3)], ['lb_ace', 'lb_good', 'lb_mid'])
+        self.assertEqual(leaderboard.rank(self._uid('lb_good')), 2)
+        self.assertEqual(leaderboard.rank(self._uid('lb_mid')), 3)
+
+    def test_leaderboard_route(self):
+        http = app.test_client()
+        body = http.get('/leaderboard?limit=2').get_json()
+        self.assertEqual([e['rank'] for e in body['leaderboard']], [1, 2])
+        self.assertEqual(body['leaderboard'][0]['username'], 'lb_ace')
+        self.assertNotIn('user_id', body['leaderboard'][0])
+
+    def test_table_rank_stops_at_the_scan_limit(self):
+        leaderboard.configure(redis_client=None)
+        with mock.patch.object(leaderboard_module, 'RANK_SCAN_LIMIT', 3):
+            self.assertEqual(leaderboard.rank(self._uid('lb_mid')), 3)
+            self.assertIsNone(leaderboard.rank(self._uid('lb_low')))
+            around = leaderboard.around(self._uid('lb_low'), radius=1)
+        self.assertEqual([(e['rank'], e['username']) for e in around],
+                         [(None, 'lb_mid'), (None, 'lb_low')])
+
+
+
+@unittest.skipIf(_redis_or_none() is None, 'Redis server not available')
+class TestRedisLeaderboard(TestLeaderboard):
+    """The same behaviour with the scores mirrored into a sorted set."""
+
+    def setUp(self):
+        self.redis = _redis_or_none()
+        self.redis.delete(REDIS_KEY)
+        leaderboard.configure(redis_client=self.redis)
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        leaderboard.configure(redis_client=None)
+        self.redis.delete(REDIS_KEY)
+
+    def test_player_missing_from_the_set_is_ranked_from_the_table(self):
+        self.redis.zrem(REDIS_KEY, _member(self._uid('lb_mid')))
+        self.assertEqual(leaderboard.rank(self._uid('lb_mid')), 3)
+        around = leaderboard.around(self._uid('lb_mid'), radius=1)
+        self.assertEqual([e['rank'] for e in around], [2, 3, 4])
+
+if __name__ == '__main__':
+    unittest.main()
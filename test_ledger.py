@@ -0,0 +1,127 @@
+"""
+Tests for keyset ledger pagination and balance checkpoints (services/ledger.py).
+"""
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app
+from database import db, User, Player, Transaction, BalanceCheckpoint, TX_BET, TX_WIN
+from services.ledger import ledger, decode_cursor, parse_statement_range
+from services.wallet import wallet
+
+
+class TestLedger(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.user = User(username='ledger_user', email='ledger@test.com')
+        self.user.set_password('pw')
+        db.session.add(self.user)
+        db.session.flush()
+        self.player = Player(user_id=self.user.id, real_balance=100.0,
+                             total_wagered=0.0, total_winnings=0.0)
+        db.session.add(self.player)
+        db.session.commit()
+
+        # 12 rows an hour apart: bet 5, win 8, bet 5, ...
+        self.t0 = datetime(2026, 3, 1, 12, 0, 0)
+        balance = 100.0
+        for i in range(12):
+            amount, tx_type = (5.0, TX_BET) if i % 2 == 0 else (8.0, TX_WIN)
+            after = balance - amount if tx_type == TX_BET else balance + amount
+            db.session.add(Transaction(
+                player_id=self.player.id, transaction_type=tx_type, amount=amount,
+                balance_type='real', balance_before=balance, balance_after=after,
+                created_at=self.t0 + timedelta(hours=i),
+            ))
+            balance = after
+        self.player.real_balance = balance
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_pages_walk_the_whole_history_once(self):
+        seen = []
+        cursor = None
+        while True:
+            rows, cursor = ledger.page(self.player.id, limit=5, cursor=cursor)
+            seen.extend(tx.id for tx in rows)
+            if cursor is None:
+                break
+        ordered = [tx.id for tx in Transaction.query.order_by(Transaction.created_at.desc()).all()]
+        self.assertEqual(seen, ordered)
+
+    def test_bad_cursor_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor')
+
+    def test_balance_at_uses_checkpoint_and_ledger(self):
+        # After rows 0..4 (three bets, two wins): 100 - 15 + 16
+        at = self.t0 + timedelta(hours=4, minutes=30)
+        self.assertEqual(ledger.balance_at(self.player.id, at), 101.0)
+        self.assertEqual(ledger.balance_at(self.player.id, self.t0 - timedelta(days=1)), 100.0)
+
+        # A checkpoint after the last ledger row wins over older rows
+        db.session.add(BalanceCheckpoint(player_id=self.player.id, real_balance=250.0,
+                                         fake_balance=0.0, taken_at=self.t0 + timedelta(hours=20)))
+        db.session.commit()
+        self.assertEqual(ledger.balance_at(self.player.id, self.t0 + timedelta(hours=21)), 250.0)
+        self.assertEqual(ledger.balance_at(self.player.id, at), 101.0)
+
+    def test_checkpoint_only_snapshots_changed_wallets(self):
+        self.assertEqual(ledger.checkpoint(), 1)
+        self.assertEqual(ledger.checkpoint(), 0)
+
+        db.session.expire_all()
+        wallet.credit(self.player.id, 10.0, 'real')
+        db.session.commit()
+        self.assertEqual(ledger.checkpoint(), 1)
+        latest = BalanceCheckpoint.query.order_by(BalanceCheckpoint.id.desc()).first()
+        self.assertEqual(latest.real_balance, 128.0)
+        self.assertEqual(latest.last_transaction_id, Transaction.query.count())
+
+    def test_statement(self):
+        start, end = self.t0 + timedelta(hours=2), self.t0 + timedelta(hours=5)
+        statement = ledger.statement(self.player.id, start, end)
+        self.assertEqual(len(statement['transactions']), 4)
+        self.assertEqual(statement['opening_balance'], 103.0)
+        self.assertEqual(statement['closing_balance'], 109.0)
+
+    def test_account_routes(self):
+        http = app.test_client()
+        http.post('/api/auth/login', json={'username': 'ledger_user', 'password': 'pw'})
+        first = http.get('/account/transactions?limit=10').get_json()
+        self.assertEqual(len(first['transactions']), 10)
+        rest = http.get(f"/account/transactions?limit=10&cursor={first['next_cursor']}").get_json()
+        self.assertEqual(len(rest['transactions']), 2)
+        self.assertIsNone(rest['next_cursor'])
+        self.assertEqual(http.get('/account/transactions?cursor=zzz').status_code, 400)
+
+        statement = http.get(f'/account/statement?start={self.t0.isoformat()}').get_json()
+        self.assertEqual(len(statement['transactions']), 12)
+
+        # An offset-aware start is read as UTC, not compared with a naive now()
+        response = http.get(f"/account/statement?start={self.t0.isoformat()}Z")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['transactions']), 12)
+
+    def test_statement_range_is_naive_utc(self):
+        start, end = parse_statement_range({'start': '2026-01-01T02:00:00+02:00',
+                                            'end': '2026-01-02T00:00:00Z'})
+        self.assertEqual((start, end), (datetime(2026, 1, 1), datetime(2026, 1, 2)))
+        with self.assertRaises(ValueError):
+            parse_statement_range({'start': '2026-01-02T00:00:00Z', 'end': '2026-01-01T00:00:00'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+"""
+Tests for the cached lobby snapshot (services/lobby_cache.py) and the
+lobby_delta broadcasts that replace the empty lobby_updated pings.
+"""
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, Player, GameRoom
+from services.lobby_cache import LobbyCache, lobby_cache
+from services.turn_timers import turn_timers
+from controllers.multiplayer_controller import sweep_stale_rooms, _timer_context
+
+
+def _room(code, minutes_old=0):
+    created = datetime.utcnow() - timedelta(minutes=minutes_old)
+    return {'room_code': code, 'status': 'waiting', 'created_at': created.isoformat()}
+
+
+class TestLobbyCache(unittest.TestCase):
+    def setUp(self):
+        self.loads = 0
+        self.db_rooms = [_room('OLDER1', minutes_old=10), _room('NEWER1', minutes_old=1)]
+        self.published = []
+
+        def loader():
+            self.loads += 1
+            return list(self.db_rooms)
+
+        self.cache = LobbyCache(limit=2, debounce_seconds=60)
+        self.cache.FLUSH_TIMER_KEY = f'lobby:flush:test:{id(self)}'
+        self.cache.configure(loader=loader, publisher=lambda a, r: self.published.append((a, r)))
+
+    def tearDown(self):
+        turn_timers.cancel(self.cache.FLUSH_TIMER_KEY)
+
+    def test_reads_are_served_from_the_snapshot(self):
+        codes = [r['room_code'] for r in self.cache.rooms()]
+        self.assertEqual(codes, ['NEWER1', 'OLDER1'])
+        for _ in range(5):
+            self.cache.rooms()
+        self.assertEqual(self.loads, 1)
+
+    def test_changes_update_snapshot_and_coalesce_into_one_delta(self):
+        self.cache.rooms()
+        self.cache.upsert(_room('FRESH1'))
+        self.cache.upsert(_room('FRESH2'))
+        self.cache.remove('FRESH2')
+        self.cache.remove('OLDER1')
+
+        self.assertEqual([r['room_code'] for r in self.cache.rooms()], ['FRESH1', 'NEWER1'])
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(turn_timers.is_armed(self.cache.FLUSH_TIMER_KEY))
+
+        added, removed = self.cache.flush()
+        self.assertEqual([r['room_code'] for r in added], ['FRESH1'])
+        self.assertEqual(removed, ['FRESH2', 'OLDER1'])
+        self.assertEqual(len(self.published), 1)
+        # Nothing queued: nothing published.
+        self.cache.flush()
+        self.assertEqual(len(self.published), 1)
+
+    def test_expired_rooms_are_hidden_and_ages_recomputed(self):
+        self.db_rooms.append(_room('STALE1', minutes_old=6 * 60))
+        rooms = {r['room_code']: r for r in self.cache.rooms()}
+        self.assertNotIn('STALE1', rooms)
+        self.assertEqual(rooms['OLDER1']['room_age_hours'], round(10 / 60, 1))
+
+    def test_snapshot_is_rebuilt_after_refresh_interval(self):
+        self.cache.rooms()
+        self.cache.refresh_seconds = 0
+        time.sleep(0.01)
+        self.cache.rooms()
+        self.assertEqual(self.loads, 2)
+
+    def test_rebuild_keeps_changes_made_while_loading(self):
+        self.cache.rooms()
+        self.cache.refresh_seconds = 0
+        original = self.cache._loader
+
+        def racing_loader():
+            rows = original()
+            # Another request lands after the database was read
+            self.cache.upsert(_room('RACED1'))
+            self.cache.remove('OLDER1')
+            return rows
+
+        self.cache._loader = racing_loader
+        time.sleep(0.01)
+        self.cache.rooms()
+        self.cache._loader = original
+        self.cache.refresh_seconds = 3600
+
+        codes = {r['room_code'] for r in self.cache.rooms()}
+        self.assertIn('RACED1', codes)
+        self.assertNotIn('OLDER1', codes)
+
+
+class TestLobbyDeltaBroadcast(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        lobby_cache.invalidate()
+        user = User(username='lobby_host', email='lobby_host@test.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Player(user_id=user.id, fake_balance=1000.0,
+                              fake_balance_expires_at=datetime.utcnow() + timedelta(hours=1)))
+        db.session.commit()
+        self.http = app.test_client()
+        self.http.post('/api/auth/login', json={'username': 'lobby_host', 'password': 'password123'})
+
+    def tearDown(self):
+        lobby_cache.invalidate()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_create_room_reaches_viewers_as_delta(self):
+        viewer = socketio.test_client(app)
+        viewer.emit('get_lobby')
+        self.assertEqual(viewer.get_received()[-1]['args'][0]['available_rooms'], [])
+
+        host = socketio.test_client(app, flask_test_client=self.http)
+        host.emit('create_room', {'card_count': 6, 'bet_amount': 0, 'bet_type': 'fake'})
+        room_code = [m for m in host.get_received() if m['name'] == 'room_created'][0]['args'][0]['room']['room_code']
+
+        deltas = []
+        for _ in range(50):
+            deltas = [m for m in viewer.get_received() if m['name'] == 'lobby_delta']
+            if deltas:
+                break
+            time.sleep(0.1)
+        self.assertEqual([r['room_code'] for r in deltas[0]['args'][0]['added']], [room_code])
+
+        viewer.emit('get_lobby')
+        lobby = [m for m in viewer.get_received() if m['name'] == 'lobby_data'][-1]['args'][0]
+        self.assertEqual([r['room_code'] for r in lobby['available_rooms']], [room_code])
+        host.disconnect()
+        viewer.disconnect()
+
+
+class TestStaleRoomSweep(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        lobby_cache.invalidate()
+        user = User(username='sweep_host', email='sweep_host@test.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        lobby_cache.invalidate()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _room(self, code, status, age_hours, **extra):
+        stamp = datetime.utcnow() - timedelta(hours=age_hours)
+        db.session.add(GameRoom(room_code=code, player1_id=self.user_id, status=status,
+                                created_at=stamp,
+                                paused_at=stamp if status == 'paused' else None, **extra))
+
+    def test_one_update_abandons_only_stale_rooms(self):
+        self._check_sweep()
+
+    def test_sweep_without_update_returning(self):
+        dialect = db.engine.dialect
+        supported = dialect.update_returning
+        dialect.update_returning = False
+        try:
+            self._check_sweep()
+        finally:
+            dialect.update_returning = supported
+
+    def _check_sweep(self):
+        game_manager = _timer_context['game_manager']
+        game_id, _ = game_manager.create_game(mode='local', card_count=6)
+        self._room('WOLD01', 'waiting', 6)
+        self._room('WNEW01', 'waiting', 1)
+        self._room('POLD01', 'paused', 30, game_id=game_id)
+        self._room('PNEW01', 'paused', 2)
+        self._room('PBET01', 'paused', 30, bet_session_id=99)
+        db.session.commit()
+
+        self.assertEqual(sweep_stale_rooms(), 2)
+        statuses = dict(db.session.query(GameRoom.room_code, GameRoom.status).all())
+        self.assertEqual(statuses, {'WOLD01': 'abandoned', 'WNEW01': 'waiting',
+                                    'POLD01': 'abandoned', 'PNEW01': 'paused',
+                                    'PBET01': 'paused'})
+        with self.assertRaises(KeyError):
+            game_manager.get_game(game_id)
+        self.assertEqual(sweep_stale_rooms(), 0)
+
+    def test_get_lobby_does_not_write(self):
+        self._room('WOLD02', 'waiting', 6)
+        db.session.commit()
+        viewer = socketio.test_client(app)
+        viewer.emit('get_lobby')
+        self.assertEqual(viewer.get_received()[-1]['args'][0]['available_rooms'], [])
+        self.assertEqual(GameRoom.query.filter_by(room_code='WOLD02').one().status, 'waiting')
+        viewer.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
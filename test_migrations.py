@@ -0,0 +1,66 @@
+"""
+Tests for the versioned migration runner (migrations/__init__.py).
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import inspect
+
+from app import app
+from database import db, SchemaMigration
+import migrations
+
+
+class TestMigrationRunner(unittest.TestCase):
+    def setUp(self):
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.tmp.cleanup()
+
+    def _columns(self, table):
+        return {c['name'] for c in inspect(db.engine).get_columns(table)}
+
+    def test_shipped_migrations_apply_once(self):
+        applied = migrations.upgrade()
+        self.assertEqual([m.version for m in applied], [m.version for m in migrations.discover()])
+        self.assertEqual(migrations.pending(), [])
+        self.assertEqual(migrations.upgrade(), [])
+        self.assertEqual(SchemaMigration.query.count(), len(applied))
+
+    def test_existing_columns_are_skipped_and_new_ones_added(self):
+        (self.dir / '901_profile_columns.sql').write_text(
+            "-- country already exists on users\n"
+            "BEGIN TRANSACTION;\n"
+            "ALTER TABLE users ADD COLUMN country VARCHAR(50);\n"
+            "ALTER TABLE users ADD COLUMN nickname VARCHAR(20);\n"
+            "CREATE INDEX IF NOT EXISTS idx_users_nickname ON users (nickname);\n"
+            "COMMIT;\n",
+            encoding='utf-8',
+        )
+        applied = migrations.upgrade(self.dir)
+        self.assertEqual([m.version for m in applied], [901])
+        self.assertIn('nickname', self._columns('users'))
+        self.assertEqual(migrations.pending(self.dir), [])
+
+    def test_duplicate_versions_are_rejected(self):
+        (self.dir / '901_a.sql').write_text('SELECT 1;', encoding='utf-8')
+        (self.dir / '901_b.sql').write_text('SELECT 1;', encoding='utf-8')
+        with self.assertRaises(RuntimeError):
+            migrations.discover(self.dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Tests for per-client outbound backpressure (services/outbound.py): slow
+clients are skipped, their frames coalesced per topic and bounded, then
+delivered once they catch up.
+"""
+
+import os
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User
+from services.outbound import OutboundQueue
+
+
+class _ProbedQueue(OutboundQueue):
+    """Backlog probe driven by the test instead of real engine.io queues."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.slow_eio_sids = set()
+
+    def _backlog(self, eio_sid):
+        return 10_000 if eio_sid in self.slow_eio_sids else 0
+
+
+class TestOutboundQueue(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.clients = []
+        for name in ('out_fast', 'out_slow'):
+            user = User(username=name, email=f'{name}@test.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.commit()
+            http = app.test_client()
+            http.post('/api/auth/login', json={'username': name, 'password': 'password123'})
+            client = socketio.test_client(app, flask_test_client=http)
+            client.get_received()
+            self.clients.append((user.id, client))
+        self.queue = _ProbedQueue(max_pending=3)
+        self.queue.configure(socketio=socketio)
+
+    def tearDown(self):
+        for _, client in self.clients:
+            client.disconnect()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _sid_of(self, user_id):
+        return next(sid for sid, _ in socketio.server.manager.get_participants('/', f"user_{user_id}"))
+
+    def _names(self, client, event):
+        return [m['args'][0] for m in client.get_received() if m['name'] == event]
+
+    def test_slow_client_gets_only_the_latest_state_per_topic(self):
+        (fast_id, fast), (slow_id, slow) = self.clients
+        slow_sid = self._sid_of(slow_id)
+        self.queue.slow_eio_sids.add(socketio.server.manager.eio_sid_from_sid(slow_sid, '/'))
+
+        for seq in range(3):
+            self.queue.send('tournament_updated', {'seq': seq}, topic='tournament:1')
+        self.queue.send('tournament_updated', {'seq': 0, 'other': True}, topic='tournament:2')
+
+        self.assertEqual(len(self._names(fast, 'tournament_updated')), 4)
+        self.assertEqual(self._names(slow, 'tournament_updated'), [])
+        stats = self.queue.stats()
+        self.assertEqual((stats['parked'], stats['coalesced'], stats['parked_frames']), (4, 2, 2))
+
+        # Still behind: nothing is sent yet.
+        self.assertEqual(self.queue.drain(slow_sid), 0)
+        self.queue.slow_eio_sids.clear()
+        self.assertEqual(self.queue.drain(slow_sid), 2)
+        self.assertEqual(self._names(slow, 'tournament_updated'),
+                         [{'seq': 2}, {'seq': 0, 'other': True}])
+        self.queue.forget(slow_sid)
+
+    def test_parked_frames_are_bounded_per_client(self):
+        _, (slow_id, slow) = self.clients
+        slow_sid = self._sid_of(slow_id)
+        self.queue.slow_eio_sids.add(socketio.server.manager.eio_sid_from_sid(slow_sid, '/'))
+
+        for seq in range(5):
+            self.queue.send('participant_joined', {'seq': seq})
+
+        self.assertEqual([p for _, p in self.queue.pending(slow_sid)],
+                         [{'seq': 2}, {'seq': 3}, {'seq': 4}])
+        self.assertEqual(self.queue.stats()['dropped'], 2)
+        self.queue.forget(slow_sid)
+        self.assertEqual(self.queue.stats()['parked_clients'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+Tests for connection presence (services/presence.py) and the grace window
+before a disconnect is written to the game room.
+"""
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, Player, GameRoom
+from services.presence import PresenceTracker, presence
+from services.turn_timers import turn_timers
+from controllers.multiplayer_controller import _offline_timer_key, _persist_offline
+
+
+class TestPresenceTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = PresenceTracker(ttl_seconds=60)
+
+    def test_only_first_connect_and_last_disconnect_are_transitions(self):
+        self.assertTrue(self.tracker.connect(7, 'sid-a'))
+        self.assertFalse(self.tracker.connect(7, 'sid-b'))
+        self.assertFalse(self.tracker.disconnect(7, 'sid-a'))
+        self.assertTrue(self.tracker.is_online(7))
+        self.assertTrue(self.tracker.disconnect(7, 'sid-b'))
+        self.assertFalse(self.tracker.is_online(7))
+        self.assertIsNotNone(self.tracker.last_seen(7))
+
+    def test_connections_without_heartbeat_age_out(self):
+        self.tracker.ttl_seconds = 0.05
+        self.tracker.connect(7, 'sid-a')
+        self.assertTrue(self.tracker.is_online(7))
+        time.sleep(0.1)
+        self.assertFalse(self.tracker.is_online(7))
+        self.tracker.heartbeat(7, 'sid-a')
+        self.assertTrue(self.tracker.is_online(7))
+
+    def test_room_membership_is_filtered_by_liveness(self):
+        self.tracker.connect(1, 'sid-1')
+        self.tracker.connect(2, 'sid-2')
+        self.tracker.enter_room('ROOM01', 1)
+        self.tracker.enter_room('ROOM01', 2)
+        self.tracker.disconnect(2, 'sid-2')
+        self.assertEqual(self.tracker.online_in_room('ROOM01'), {1})
+        self.assertEqual(self.tracker.online_users([1, 2, None]), {1})
+        self.tracker.clear_room('ROOM01')
+        self.assertEqual(self.tracker.online_in_room('ROOM01'), set())
+
+
+class TestDisconnectGraceWindow(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.users, self.clients = [], []
+        for name in ('presence_p1', 'presence_p2'):
+            user = User(username=name, email=f'{name}@test.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, fake_balance=1000.0,
+                                  fake_balance_expires_at=datetime.utcnow() + timedelta(hours=1)))
+            http = app.test_client()
+            http.post('/api/auth/login', json={'username': name, 'password': 'password123'})
+            self.users.append(user)
+            self.clients.append(http)
+        self.room = GameRoom(room_code='PRES01', player1_id=self.users[0].id,
+                             player2_id=self.users[1].id, status='in_progress',
+                             player1_connected=True, player2_connected=True,
+                             turn_deadline=datetime.utcnow() + timedelta(minutes=5))
+        db.session.add(self.room)
+        db.session.commit()
+
+    def tearDown(self):
+        for user in self.users:
+            turn_timers.cancel(_offline_timer_key(user.id))
+        turn_timers.cancel('PRES01')
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _socket(self, http):
+        return socketio.test_client(app, flask_test_client=http)
+
+    def test_short_drop_costs_no_db_write(self):
+        p1 = self._socket(self.clients[0])
+        p1.disconnect()
+        key = _offline_timer_key(self.users[0].id)
+        self.assertTrue(turn_timers.is_armed(key))
+
+        p1 = self._socket(self.clients[0])
+        self.assertFalse(turn_timers.is_armed(key))
+        db.session.refresh(self.room)
+        self.assertTrue(self.room.player1_connected)
+        p1.disconnect()
+
+    def test_second_tab_keeps_user_online(self):
+        tab1 = self._socket(self.clients[0])
+        tab2 = self._socket(self.clients[0])
+        tab1.disconnect()
+        self.assertTrue(presence.is_online(self.users[0].id))
+        self.assertFalse(turn_timers.is_armed(_offline_timer_key(self.users[0].id)))
+        tab2.disconnect()
+
+    def test_drop_past_grace_marks_seat_and_notifies_opponent(self):
+        p1 = self._socket(self.clients[0])
+        p2 = self._socket(self.clients[1])
+        p2.get_received()
+        p1.disconnect()
+
+        _persist_offline(self.users[0].id)
+
+        db.session.refresh(self.room)
+        self.assertFalse(self.room.player1_connected)
+        self.assertIsNotNone(self.room.player1_last_seen)
+        self.assertTrue(self.room.player2_connected)
+        names = [m['name'] for m in p2.get_received()]
+        self.assertIn('opponent_disconnected', names)
+
+        # Coming back flips the seat once.
+        p1 = self._socket(self.clients[0])
+        p1.emit('reconnect_to_room', {'room_code': 'PRES01'})
+        db.session.refresh(self.room)
+        self.assertTrue(self.room.player1_connected)
+        p1.disconnect()
+        p2.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for per-request query counting and the slow-query log (services/query_stats.py).
+"""
+
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, Player
+from services.query_stats import query_stats
+
+
+class TestQueryStats(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        user = User(username='qs_user', email='qs@test.com')
+        user.set_password('pw')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Player(user_id=user.id, real_balance=10.0))
+        db.session.commit()
+        self._saved = (query_stats.slow_query_ms, query_stats.add_header)
+        query_stats.configure(add_header=True)
+        query_stats.reset()
+
+    def tearDown(self):
+        query_stats.configure(slow_query_ms=self._saved[0], add_header=self._saved[1])
+        query_stats.reset()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _by_scope(self):
+        return {row['scope']: row for row in query_stats.stats()}
+
+    def test_http_requests_are_counted_and_reported(self):
+        http = app.test_client()
+        response = http.get('/leaderboard')
+        count = int(response.headers['X-DB-Queries'].split(';')[0])
+        self.assertGreater(count, 0)
+
+        row = self._by_scope()['GET /leaderboard']
+        self.assertEqual((row['calls'], row['queries']), (1, count))
+
+    def test_unmatched_urls_share_one_scope(self):
+        http = app.test_client()
+        for path in ('/no-such-page-1', '/no-such-page-2', '/wp-admin.php'):
+            self.assertEqual(http.get(path).status_code, 404)
+        scopes = [name for name in self._by_scope() if 'no-such-page' in name or 'wp-admin' in name]
+        self.assertEqual(scopes, [])
+        self.assertEqual(self._by_scope()['GET <unmatched>']['calls'], 3)
+
+    def test_scope_counts_only_its_own_queries(self):
+        with query_stats.scope('job:test') as scope:
+            for _ in range(3):
+                User.query.filter_by(username='qs_user').first()
+        self.assertEqual(scope.queries, 3)
+        User.query.count()  # outside any scope: not attributed
+        self.assertEqual(self._by_scope()['job:test']['queries'], 3)
+
+    def test_socket_handlers_are_scoped(self):
+        http = app.test_client()
+        http.post('/api/auth/login', json={'username': 'qs_user', 'password': 'pw'})
+        client = socketio.test_client(app, flask_test_client=http)
+        client.emit('get_lobby')
+        client.disconnect()
+        scopes = self._by_scope()
+        self.assertIn('socket:connect', scopes)
+        self.assertIn('socket:get_lobby', scopes)
+
+    def test_slow_queries_are_logged_with_call_site(self):
+        query_stats.configure(slow_query_ms=0)
+        out = io.StringIO()
+        with redirect_stdout(out), query_stats.scope('job:slow'):
+            User.query.filter_by(username='qs_user').first()
+        # (the scheduler thread may log its own background queries meanwhile)
+        line = next(l for l in out.getvalue().splitlines() if l.startswith('[SLOW SQL]') and 'job:slow' in l)
+        self.assertIn('test_query_stats.py', line)
+        self.assertEqual(self._by_scope()['job:slow']['slow_queries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tests for per-user token-bucket rate limiting on socket events
+(services/rate_limits.py).
+"""
+
+import os
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User
+from services.rate_limits import TokenBucketLimiter, parse_limits, rate_limiter
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.limiter = TokenBucketLimiter(limits={'game_action': (3, 3)})
+
+    def test_burst_passes_then_floods_are_rejected(self):
+        results = [self.limiter.hit('user:1', 'game_action', now=100.0)[0] for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+        allowed, retry_after = self.limiter.hit('user:1', 'game_action', now=100.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(retry_after, 1.0)
+
+        stats = self.limiter.stats()['events']['game_action']
+        self.assertEqual((stats['allowed'], stats['rejected']), (3, 3))
+
+    def test_bucket_refills_over_time(self):
+        for _ in range(3):
+            self.limiter.hit('user:1', 'game_action', now=100.0)
+        self.assertFalse(self.limiter.hit('user:1', 'game_action', now=100.5)[0])
+        self.assertTrue(self.limiter.hit('user:1', 'game_action', now=101.0)[0])
+
+    def test_buckets_are_per_user_and_per_event(self):
+        for _ in range(3):
+            self.limiter.hit('user:1', 'game_action', now=100.0)
+        self.assertTrue(self.limiter.hit('user:2', 'game_action', now=100.0)[0])
+        self.assertTrue(self.limiter.hit('user:1', 'get_lobby', now=100.0)[0])
+
+    def test_idle_buckets_and_log_marks_are_pruned(self):
+        for sid in range(50):
+            for _ in range(4):
+                self.limiter.hit(f'sid:{sid}', 'game_action', now=100.0)
+        self.assertEqual(len(self.limiter._buckets), 50)
+        self.assertEqual(len(self.limiter._logged), 50)
+
+        # Still refilling: kept, and the throttled state carries on
+        self.limiter.hit('user:1', 'game_action', now=101.0)
+        self.assertEqual(len(self.limiter._buckets), 51)
+
+        self.limiter.hit('user:1', 'game_action', now=200.0)
+        self.assertEqual(list(self.limiter._buckets), [('user:1', 'game_action')])
+        self.assertEqual(self.limiter._logged, {})
+
+    def test_parse_limits(self):
+        self.assertEqual(parse_limits('game_action=8/2, get_lobby=5/5,bad=x'),
+                         {'game_action': (8, 2.0), 'get_lobby': (5, 5.0)})
+
+
+class TestRateLimitedEvents(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        user = User(username='rate_p1', email='rate_p1@test.com')
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        self.http = app.test_client()
+        self.http.post('/api/auth/login', json={'username': 'rate_p1', 'password': 'password123'})
+        self.saved_limits = dict(rate_limiter.limits)
+        rate_limiter.reset()
+        rate_limiter.limits['get_lobby'] = (2, 60)
+
+    def tearDown(self):
+        rate_limiter.limits = self.saved_limits
+        rate_limiter.reset()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_spammed_lobby_requests_are_dropped(self):
+        client = socketio.test_client(app, flask_test_client=self.http)
+        client.get_received()
+        for _ in range(4):
+            client.emit('get_lobby')
+        received = client.get_received()
+        names = [m['name'] for m in received]
+        self.assertEqual(names.count('lobby_data'), 2)
+        self.assertEqual(names.count('rate_limited'), 2)
+        notice = [m for m in received if m['name'] == 'rate_limited'][0]['args'][0]
+        self.assertEqual(notice['event'], 'get_lobby')
+        self.assertGreater(notice['retry_after'], 0)
+        self.assertEqual(rate_limiter.stats()['events']['get_lobby']['rejected'], 2)
+        client.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+Tests for read-replica routing (services/read_replica.py) against a local
+SQLite primary/replica pair. The replica is seeded with a tournament the
+primary does not have, so every response shows which database served it.
+"""
+
+import os
+import tempfile
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from flask import session as flask_session
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app import app, socketio
+from database import db, User, Player, Tournament, GameRoom
+from services.lobby_cache import lobby_cache
+from services.read_replica import read_replica, replica_reads
+from services.room_registry import room_registry
+
+
+class ReplicaPairCase(unittest.TestCase):
+    """A fresh primary plus a replica file seeded with its own rows."""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        user = User(username='rr_user', email='rr@test.com')
+        user.set_password('pw')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Player(user_id=user.id, real_balance=50.0))
+        db.session.commit()
+        self.user_id = user.id
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.replica = create_engine(f"sqlite:///{os.path.join(self.tmp.name, 'replica.db')}")
+        db.metadata.create_all(self.replica)
+        with Session(self.replica) as replica_session:
+            replica_session.add(User(id=self.user_id, username='rr_user', email='rr@test.com',
+                                     password_hash=user.password_hash))
+            replica_session.add(Tournament(id=1, tournament_code='REPL01', tournament_name='Replica Cup',
+                                           tournament_type='standard', creator_id=self.user_id,
+                                           max_players=8))
+            replica_session.commit()
+        read_replica.configure(engine=self.replica)
+        read_replica.reset()
+
+    def tearDown(self):
+        read_replica.disable()
+        read_replica.reset()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.replica.dispose()
+        self.tmp.cleanup()
+
+
+class TestReadReplica(ReplicaPairCase):
+    def test_marked_routes_read_the_replica(self):
+        http = app.test_client()
+        body = http.get('/api/tournaments/1/overview').get_json()
+        self.assertEqual(body['tournament']['tournament_name'], 'Replica Cup')
+        # Unmarked routes stay on the primary, which has no such tournament
+        self.assertEqual(http.get('/tournaments/1').status_code, 404)
+
+    def test_socket_events_read_the_replica(self):
+        client = socketio.test_client(app)
+        client.emit('get_tournaments', {})
+        listed = next(m for m in client.get_received() if m['name'] == 'tournaments_list')
+        self.assertEqual([t['name'] for t in listed['args'][0]['tournaments']], ['Replica Cup'])
+        client.disconnect()
+
+    def test_no_replica_means_no_routing(self):
+        read_replica.disable()
+        self.assertEqual(app.test_client().get('/api/tournaments/1/overview').status_code, 404)
+
+    def test_acting_user_reads_their_own_writes(self):
+        http = app.test_client()
+        http.post('/api/auth/login', json={'username': 'rr_user', 'password': 'pw'})
+        self.assertEqual(http.get('/api/tournaments/1/overview').status_code, 200)
+
+        with app.test_request_context():
+            flask_session['user_id'] = self.user_id
+            Player.query.filter_by(user_id=self.user_id).first().real_balance += 5
+            db.session.commit()
+        self.assertTrue(read_replica.recently_wrote(self.user_id))
+
+        # The writer is pinned to the primary; everyone else keeps the replica
+        self.assertEqual(http.get('/api/tournaments/1/overview').status_code, 404)
+        self.assertEqual(app.test_client().get('/api/tournaments/1/overview').status_code, 200)
+
+    def test_a_write_moves_the_rest_of_the_scope_to_the_primary(self):
+        @replica_reads
+        def handler():
+            before = Tournament.query.count()
+            db.session.add(User(username='rr_other', email='rr_other@test.com', password_hash='x'))
+            db.session.flush()
+            after = Tournament.query.count()
+            db.session.rollback()
+            return before, after
+
+        self.assertEqual(handler(), (1, 0))
+        # Outside a marked scope nothing is routed
+        self.assertEqual(Tournament.query.count(), 0)
+
+
+class TestLaggingReplica(ReplicaPairCase):
+    """The replica has not caught up with rooms just written to the primary."""
+
+    def setUp(self):
+        super().setUp()
+        lobby_cache.invalidate()
+        room_registry.discard('LAGW01')
+        room_registry.discard('LAGP01')
+        db.session.add(GameRoom(room_code='LAGW01', player1_id=self.user_id, status='waiting'))
+        db.session.add(GameRoom(room_code='LAGP01', player1_id=self.user_id, player2_id=self.user_id,
+                                status='in_progress', current_turn_player=self.user_id))
+        db.session.commit()
+        with Session(self.replica) as replica_session:
+            # LAGW01 has not reached the replica; LAGP01 is still an old copy
+            replica_session.add(GameRoom(room_code='LAGP01', player1_id=self.user_id, status='waiting'))
+            replica_session.commit()
+
+    def tearDown(self):
+        lobby_cache.invalidate()
+        room_registry.discard('LAGW01')
+        room_registry.discard('LAGP01')
+        super().tearDown()
+
+    def test_lobby_snapshot_is_built_from_the_primary(self):
+        client = socketio.test_client(app)
+        client.emit('get_lobby')
+        lobby = next(m for m in client.get_received() if m['name'] == 'lobby_data')['args'][0]
+        self.assertIn('LAGW01', [room['room_code'] for room in lobby['available_rooms']])
+        client.disconnect()
+
+    def test_room_registry_is_filled_from_the_primary(self):
+        client = socketio.test_client(app)
+        client.emit('spectate_room', {'room_code': 'LAGP01'})
+        client.disconnect()
+        entry = room_registry.get('LAGP01')
+        self.assertEqual((entry.status, entry.current_turn_player), ('in_progress', self.user_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""
+Tests for the per-room single-writer actors (services/room_actor.py).
+
+Commands for one room must never overlap and must run in arrival order;
+commands for different rooms must be able to run at the same time.
+"""
+
+import threading
+import time
+import unittest
+
+import redis
+
+from services.room_actor import RoomActorRegistry, RoomBusy, serialized_by_room, room_actors
+
+
+class _HeldLock:
+    """A Redis lock another worker holds past our blocking timeout."""
+    name = 'room-actor:HELD01'
+
+    def acquire(self):
+        return False
+
+    def release(self):
+        raise AssertionError('never acquired')
+
+
+class _LockedRedis:
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return _HeldLock()
+
+
+class TestRoomActor(unittest.TestCase):
+    def setUp(self):
+        self.registry = RoomActorRegistry()
+
+    def test_same_room_commands_never_overlap(self):
+        active = {'count': 0, 'max': 0}
+        guard = threading.Lock()
+
+        def command():
+            with guard:
+                active['count'] += 1
+                active['max'] = max(active['max'], active['count'])
+            time.sleep(0.005)
+            with guard:
+                active['count'] -= 1
+
+        threads = [
+            threading.Thread(target=self.registry.run, args=('ROOM01', command))
+            for _ in range(20)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(active['max'], 1)
+        self.assertEqual(self.registry.get('ROOM01').processed, 20)
+
+    def test_commands_run_in_arrival_order(self):
+        order = []
+        release_first = threading.Event()
+
+        def first():
+            release_first.wait(2)
+            order.append(0)
+
+        t0 = threading.Thread(target=self.registry.run, args=('ROOM01', first))
+        t0.start()
+        while self.registry.get('ROOM01').pending < 1:
+            time.sleep(0.001)
+
+        followers = []
+        for i in range(1, 6):
+            t = threading.Thread(target=self.registry.run, args=('ROOM01', order.append, i))
+            t.start()
+            followers.append(t)
+            # Wait until this follower is queued so arrival order is well defined.
+            while self.registry.get('ROOM01').pending < i + 1:
+                time.sleep(0.001)
+
+        release_first.set()
+        t0.join()
+        for t in followers:
+            t.join()
+        self.assertEqual(order, [0, 1, 2, 3, 4, 5])
+
+    def test_different_rooms_run_in_parallel(self):
+        both_inside = threading.Barrier(2, timeout=2)
+
+        def command():
+            # Deadlocks (BrokenBarrierError) if the rooms were serialised together.
+            both_inside.wait()
+
+        errors = []
+
+        def run(code):
+            try:
+                self.registry.run(code, command)
+            except threading.BrokenBarrierError as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=run, args=(code,)) for code in ('ROOM01', 'ROOM02')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_nested_command_for_same_room_runs_inline(self):
+        def outer():
+            return self.registry.run('ROOM01', lambda: 'inner')
+
+        self.assertEqual(self.registry.run('ROOM01', outer), 'inner')
+
+    def test_exception_releases_the_mailbox(self):
+        def boom():
+            raise ValueError('bad move')
+
+        with self.assertRaises(ValueError):
+            self.registry.run('ROOM01', boom)
+        self.assertEqual(self.registry.run('ROOM01', lambda: 'next'), 'next')
+        self.assertEqual(self.registry.get('ROOM01').pending, 0)
+
+    def test_discard_retires_actor_after_queue_drains(self):
+        def finish_game():
+            self.registry.discard('ROOM01')
+            return 'done'
+
+        self.assertEqual(self.registry.run('ROOM01', finish_game), 'done')
+        self.assertEqual(self.registry.active_count(), 0)
+        # A late event simply gets a fresh actor.
+        self.assertEqual(self.registry.run('ROOM01', lambda: 'late'), 'late')
+
+    def test_serialized_by_room_decorator_uses_room_code(self):
+        seen = []
+
+        @serialized_by_room
+        def handler(data):
+            if data.get('room_code'):
+                seen.append(room_actors.get(data['room_code'])._owner == threading.get_ident())
+            return data.get('room_code')
+
+        self.assertEqual(handler({'room_code': 'DECOR1'}), 'DECOR1')
+        self.assertEqual(seen, [True])
+        # No room code: handler runs directly (and reports the error itself).
+        self.assertIsNone(handler({}))
+        self.assertEqual(seen, [True])
+
+
+    def test_lock_timeout_does_not_run_the_command(self):
+        self.registry.configure(redis_client=_LockedRedis())
+        ran = []
+        with self.assertRaises(RoomBusy):
+            self.registry.run('HELD01', lambda: ran.append(True))
+        self.assertEqual(ran, [])
+        self.assertEqual(self.registry.get('HELD01').pending, 0)
+
+    def test_unreachable_redis_falls_back_to_the_mailbox(self):
+        unreachable = redis.Redis(host='127.0.0.1', port=1, socket_connect_timeout=0.2)
+        self.registry.configure(redis_client=unreachable)
+        self.assertEqual(self.registry.run('DOWN01', lambda: 'ran'), 'ran')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for optimistic room code allocation (services/room_codes.py).
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import event
+
+from app import app
+from database import db, User, GameRoom
+from services.room_codes import (
+    ALPHABET, CODE_LENGTH, CODE_SPACE, RoomCodeAllocator, _encode, _MULTIPLIER,
+)
+
+
+class TestCodeSpace(unittest.TestCase):
+    def test_encoding_is_six_chars_from_alphabet(self):
+        for n in (0, 1, CODE_SPACE - 1):
+            code = _encode(n)
+            self.assertEqual(len(code), CODE_LENGTH)
+            self.assertTrue(set(code) <= set(ALPHABET))
+
+    def test_counter_permutation_is_a_bijection(self):
+        # Coprime with 36^6, so every counter value maps to a distinct code.
+        self.assertNotEqual(_MULTIPLIER % 2, 0)
+        self.assertNotEqual(_MULTIPLIER % 3, 0)
+        codes = {_encode((n * _MULTIPLIER) % CODE_SPACE) for n in range(5000)}
+        self.assertEqual(len(codes), 5000)
+
+
+class TestInsertRoom(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.user = User(username='codes_p1', email='codes_p1@test.com', password_hash='x')
+        db.session.add(self.user)
+        db.session.commit()
+        self.allocator = RoomCodeAllocator()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_insert_issues_no_select(self):
+        user_id = self.user.id
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', _record)
+        try:
+            room = self.allocator.insert_room(GameRoom(player1_id=user_id))
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _record)
+        db.session.commit()
+        self.assertEqual(len(room.room_code), CODE_LENGTH)
+        self.assertFalse([s for s in statements if s.lstrip().upper().startswith('SELECT')])
+
+    def test_collision_retries_without_losing_pending_changes(self):
+        db.session.add(GameRoom(room_code='TAKEN1', player1_id=self.user.id))
+        db.session.commit()
+
+        self.user.username = 'codes_renamed'
+        with patch.object(self.allocator, 'candidate', side_effect=['TAKEN1', 'FRESH1']):
+            room = self.allocator.insert_room(GameRoom(player1_id=self.user.id))
+        db.session.commit()
+
+        self.assertEqual(room.room_code, 'FRESH1')
+        self.assertEqual(GameRoom.query.count(), 2)
+        self.assertEqual(db.session.get(User, self.user.id).username, 'codes_renamed')
+
+    def test_gives_up_after_max_attempts(self):
+        db.session.add(GameRoom(room_code='TAKEN1', player1_id=self.user.id))
+        db.session.commit()
+        self.allocator.max_attempts = 3
+        with patch.object(self.allocator, 'candidate', return_value='TAKEN1'):
+            with self.assertRaises(RuntimeError):
+                self.allocator.insert_room(GameRoom(player1_id=self.user.id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+Tests for the shared live room registry (services/room_registry.py).
+"""
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import event
+
+from app import app, socketio
+from database import db, User, GameRoom, Move
+from services.room_registry import RoomRegistry, room_registry
+from controllers.multiplayer_controller import handle_game_over, _timer_context
+
+
+class TestRoomRegistry(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.p1 = User(username='registry_p1', email='registry_p1@test.com', password_hash='x')
+        self.p2 = User(username='registry_p2', email='registry_p2@test.com', password_hash='x')
+        for user in (self.p1, self.p2):
+            user.set_password('password123')
+        db.session.add_all([self.p1, self.p2])
+        db.session.commit()
+        self.registry = RoomRegistry()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _room(self, code, status='in_progress'):
+        room = GameRoom(room_code=code, player1_id=self.p1.id, player2_id=self.p2.id,
+                        status=status, game_id=f'game-{code}',
+                        turn_deadline=datetime.utcnow() + timedelta(minutes=5))
+        db.session.add(room)
+        db.session.commit()
+        return room
+
+    def test_lookup_loads_once_then_serves_from_registry(self):
+        self._room('REG001')
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', _record)
+        try:
+            first = self.registry.lookup('REG001')
+            for _ in range(5):
+                entry = self.registry.lookup('REG001')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _record)
+
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(entry.game_id, first.game_id)
+        self.assertEqual(entry.seat_of(self.p2.id), 1)
+        self.assertIsNone(entry.seat_of(12345))
+        self.assertTrue(entry.is_player_in_room(self.p1.id))
+        self.assertEqual(entry.get_opponent_id(self.p1.id), self.p2.id)
+
+    def test_finished_rooms_are_answered_but_not_kept(self):
+        self._room('REG002', status='completed')
+        self.assertEqual(self.registry.lookup('REG002').status, 'completed')
+        self.assertNotIn('REG002', self.registry)
+        self.assertIsNone(self.registry.lookup('NOPE01'))
+
+    def test_register_replace_and_discard(self):
+        entry = self.registry.register(self._room('REG003'))
+        later = entry.replace(status='paused')
+        self.assertEqual(entry.status, 'in_progress')
+        self.registry.register(later)
+        self.assertEqual(self.registry.get('REG003').status, 'paused')
+        self.registry.discard('REG003')
+        self.assertIsNone(self.registry.get('REG003'))
+
+    def test_local_entries_expire_without_redis(self):
+        registry = RoomRegistry(local_ttl_seconds=0, local_max_age_seconds=0)
+        registry.register(self._room('REG008'))
+        # Paused by a path that did not update the registry
+        GameRoom.query.filter_by(room_code='REG008').update({'status': 'paused'})
+        db.session.commit()
+        self.assertEqual(registry.lookup('REG008').status, 'paused')
+
+    def test_game_over_discards_from_shared_registry(self):
+        room = self._room('REG004')
+        room_registry.register(room)
+        self.assertIn('REG004', room_registry)
+        handle_game_over(room, {'winner': 0}, _timer_context['socketio'])
+        self.assertNotIn('REG004', room_registry)
+
+
+    def _stale_move(self, code, **row_changes):
+        """Register ``code``, change the row behind the registry's back, then play a move."""
+        game_manager = app.extensions['game_manager']
+        game_id, _ = game_manager.create_game(mode="local", card_count=6)
+        room = self._room(code)
+        room.game_id = game_id
+        room.current_turn_player = self.p1.id
+        db.session.commit()
+        room_registry.register(room)
+        GameRoom.query.filter_by(room_code=code).update(row_changes)
+        db.session.commit()
+        before = game_manager.get_game(game_id).get_state()
+
+        http = app.test_client()
+        http.post('/api/auth/login', json={'username': 'registry_p1', 'password': 'password123'})
+        client = socketio.test_client(app, flask_test_client=http)
+        client.emit('game_action', {'room_code': code, 'action': 'attack', 'data': {'index': 0}})
+        errors = [m['args'][0] for m in client.get_received() if m['name'] == 'error']
+        client.disconnect()
+
+        # Rejected before the engine was touched
+        self.assertEqual(game_manager.get_game(game_id).get_state(), before)
+        self.assertEqual(Move.query.count(), 0)
+        return errors[-1]
+
+    def test_stale_entry_does_not_apply_a_move_to_a_paused_room(self):
+        # Paused on another worker; this worker's copy still says in_progress
+        error = self._stale_move('REG005', status='paused')
+        self.assertEqual(error['room_status'], 'paused')
+        self.assertEqual(room_registry.get('REG005').status, 'paused')
+        room_registry.discard('REG005')
+
+    def test_stale_entry_does_not_apply_a_move_after_another_move(self):
+        # A move applied on another worker (same turn player, newer move_seq)
+        error = self._stale_move('REG006', move_seq=1)
+        self.assertEqual(error['room_status'], 'in_progress')
+        self.assertEqual(room_registry.get('REG006').move_seq, 1)
+        db.session.expire_all()
+        self.assertEqual(GameRoom.query.filter_by(room_code='REG006').one().move_seq, 1)
+        room_registry.discard('REG006')
+
+    def test_accepted_moves_bump_move_seq(self):
+        game_id, _ = app.extensions['game_manager'].create_game(mode="local", card_count=6)
+        room = self._room('REG007')
+        room.game_id = game_id
+        room.current_turn_player = self.p1.id
+        db.session.commit()
+        http = app.test_client()
+        http.post('/api/auth/login', json={'username': 'registry_p1', 'password': 'password123'})
+        client = socketio.test_client(app, flask_test_client=http)
+        client.emit('game_action', {'room_code': 'REG007', 'action': 'attack', 'data': {'index': 0}})
+        client.disconnect()
+        db.session.expire_all()
+        self.assertEqual(GameRoom.query.filter_by(room_code='REG007').one().move_seq, 1)
+        self.assertEqual(room_registry.get('REG007').move_seq, 1)
+        room_registry.discard('REG007')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Tests for live room spectating (services/spectators.py): public-only
+snapshots, rate limiting with coalescing, and the spectate_room event.
+"""
+
+import os
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, GameRoom
+from services.room_registry import RoomEntry, room_registry
+from services.spectators import SpectatorFeed, public_state, spectator_room
+from services.turn_timers import turn_timers
+from controllers.multiplayer_controller import _timer_context
+
+
+STATE = {
+    'phase': 'ATTACK', 'attacker': 0, 'defender': 1,
+    'attack_card': None, 'attack_card_value': None,
+    'hands': {0: ['10♥', '2♣'], 1: ['K♠']},
+    'game_over': False, 'winner': None,
+    'ui_log': ['Player 1 draws a card (value: 10)'],
+}
+
+
+class TestSpectatorFeed(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.feed = SpectatorFeed()
+        self.feed.configure(emit=lambda event, payload, room: self.sent.append((event, payload, room)),
+                            max_per_second=0.01)
+
+    def tearDown(self):
+        self.feed.close('SPEC01')
+
+    def test_public_state_hides_hands_and_log(self):
+        room = RoomEntry(room_code='SPEC01', player1_id=1, player2_id=2)
+        snapshot = public_state(STATE, room)
+        self.assertEqual(snapshot['hand_counts'], [2, 1])
+        self.assertNotIn('hands', snapshot)
+        self.assertNotIn('ui_log', snapshot)
+        self.assertNotIn('10♥', repr(snapshot))
+
+    def test_bursts_are_coalesced_into_latest_snapshot(self):
+        self.feed.publish('SPEC01', {'seq': 1})
+        for seq in range(2, 6):
+            self.feed.publish('SPEC01', {'seq': seq})
+
+        # First send goes straight out; the rest wait for the window.
+        self.assertEqual([p['seq'] for _, p, _ in self.sent], [1])
+        self.assertEqual(self.sent[0][2], spectator_room('SPEC01'))
+        self.assertTrue(turn_timers.is_armed('spectate:SPEC01'))
+
+        self.feed.flush('SPEC01')
+        self.assertEqual([p['seq'] for _, p, _ in self.sent], [1, 5])
+        self.assertIsNone(self.feed.flush('SPEC01'))
+
+    def test_final_snapshot_bypasses_the_limit(self):
+        self.feed.publish('SPEC01', {'seq': 1})
+        self.feed.publish('SPEC01', {'seq': 2, 'game_over': True}, final=True)
+        self.assertEqual([p['seq'] for _, p, _ in self.sent], [1, 2])
+        self.assertFalse(turn_timers.is_armed('spectate:SPEC01'))
+
+
+class TestSpectateRoomEvent(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        p1 = User(username='spec_p1', email='spec_p1@test.com', password_hash='x')
+        p2 = User(username='spec_p2', email='spec_p2@test.com', password_hash='x')
+        db.session.add_all([p1, p2])
+        db.session.commit()
+        game_id, _ = _timer_context['game_manager'].create_game(mode='local', card_count=6)
+        self.room = GameRoom(room_code='SPEC02', player1_id=p1.id, player2_id=p2.id,
+                             status='in_progress', game_id=game_id,
+                             turn_deadline=datetime.utcnow() + timedelta(minutes=5))
+        db.session.add(self.room)
+        db.session.commit()
+
+    def tearDown(self):
+        room_registry.discard('SPEC02')
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_guest_receives_masked_snapshot(self):
+        viewer = socketio.test_client(app)
+        viewer.emit('spectate_room', {'room_code': 'SPEC02'})
+        updates = [m['args'][0] for m in viewer.get_received() if m['name'] == 'spectator_update']
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0]['hand_counts'], [6, 6])
+        self.assertNotIn('hands', updates[0])
+        viewer.disconnect()
+
+    def test_rooms_that_are_not_live_are_refused(self):
+        viewer = socketio.test_client(app)
+        viewer.emit('spectate_room', {'room_code': 'NOPE99'})
+        names = [m['name'] for m in viewer.get_received()]
+        self.assertIn('error', names)
+        self.assertNotIn('spectator_update', names)
+        viewer.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests for the denormalized tournament counters (services/tournament_counters.py).
+"""
+
+import os
+import unittest
+
+os.environ['ENV'] = 'development'
+
+from sqlalchemy import event
+
+from app import app
+from controllers.tournament_controller import _serialize_tournament
+from database import (
+    db, User, Player, Tournament, TournamentParticipant,
+    create_tournament_record, add_tournament_participant,
+)
+from services.tournament_counters import tournament_counters
+
+
+class TestTournamentCounters(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['MOJAPOS_MOCK_MODE'] = 'true'
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+
+        self.users = []
+        for i in range(1, 5):
+            user = User(username=f'tc_player{i}', email=f'tc_player{i}@test.com')
+            user.set_password('pw')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, real_balance=100.0))
+            self.users.append(user)
+        db.session.commit()
+
+        creator = self.users[0]
+        self.tournament = create_tournament_record(
+            creator_id=creator.id, tournament_type='standard', tournament_name='Counter Cup', max_players=4)
+        for user in self.users[:3]:
+            add_tournament_participant(self.tournament.id, user.id, payment_status='completed')
+        db.session.commit()
+        self.tournament_id = self.tournament.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _participant(self, user):
+        return TournamentParticipant.query.filter_by(tournament_id=self.tournament_id, user_id=user.id).one()
+
+    def _counts(self):
+        return tournament_counters.counts(db.session.get(Tournament, self.tournament_id))
+
+    def test_counters_follow_registration_and_votes(self):
+        self.assertEqual(self._counts(), (3, 2, 0))
+
+        self._participant(self.users[1]).lock_voted = True
+        db.session.commit()
+        self.assertEqual(self._counts(), (3, 2, 1))
+
+        # A voter leaving takes their vote with them
+        self._participant(self.users[1]).status = 'withdrawn'
+        db.session.commit()
+        self.assertEqual(self._counts(), (2, 1, 0))
+
+        db.session.delete(self._participant(self.users[2]))
+        db.session.commit()
+        self.assertEqual(self._counts(), (1, 0, 0))
+
+    def test_change_to_an_expired_row_is_counted(self):
+        participant = self._participant(self.users[2])
+        db.session.commit()  # expires the participant
+        participant.status = 'withdrawn'
+        db.session.commit()
+        self.assertEqual(self._counts()[0], 2)
+
+    def test_rollback_discards_the_increment(self):
+        self._participant(self.users[1]).status = 'withdrawn'
+        self.assertEqual(self._counts()[0], 2)
+        db.session.rollback()
+        self.assertEqual(self._counts()[0], 3)
+
+    def test_join_route_updates_the_counter(self):
+        client = app.test_client()
+        client.post('/api/auth/login', json={'username': 'tc_player4', 'password': 'pw'})
+        response = client.post(f'/api/tournaments/{self.tournament_id}/join')
+        self.assertEqual(response.status_code, 200, response.get_json())
+        tournament = db.session.get(Tournament, self.tournament_id)
+        self.assertEqual(tournament.registered_count, 4)
+        self.assertEqual(tournament.current_player_count, 4)
+
+    def test_check_reports_and_repairs_drift(self):
+        self.assertEqual(tournament_counters.check(), [])
+        db.session.execute(db.update(Tournament).values(registered_count=9, lock_vote_count=5))
+        db.session.commit()
+
+        drift = tournament_counters.check()
+        self.assertEqual(drift[0]['stored']['registered_count'], 9)
+        self.assertEqual(drift[0]['actual']['registered_count'], 3)
+        self.assertFalse(drift[0]['repaired'])
+
+        self.assertTrue(tournament_counters.check(repair=True)[0]['repaired'])
+        self.assertEqual(tournament_counters.check(), [])
+        self.assertEqual(self._counts(), (3, 2, 0))
+
+    def test_serializing_does_not_touch_participants(self):
+        statements = []
+
+        def _record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        tournament = db.session.get(Tournament, self.tournament_id)
+        event.listen(db.engine, 'before_cursor_execute', _record)
+        try:
+            payload = _serialize_tournament(tournament)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', _record)
+        self.assertEqual((payload['current_players'], payload['lock']['votes_needed']), (3, 2))
+        self.assertFalse([s for s in statements if 'tournament_participants' in s])
+
+
+if __name__ == '__main__':
+    unittest.main()
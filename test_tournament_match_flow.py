@@ -13,16 +13,21 @@ from database import (
     TournamentMatch,
     TournamentPrizePool,
     GameRoom,
+    MatchRoll,
     create_tournament_record,
     add_tournament_participant,
 )
 
 from controllers.tournament_controller import (
     _build_bracket,
+    _resolve_roll,
+    _serialize_match,
     start_tournament_match_helper,
     record_tournament_match_result,
 )
 from controllers.multiplayer_controller import handle_game_over
+from services.presence import presence
+from services.room_registry import room_registry
 
 
 class SocketIOMock:
@@ -59,6 +64,57 @@ class TestTournamentMatchFlow(unittest.TestCase):
         db.drop_all()
         self.app_context.pop()
 
+    def _locked_tournament(self):
+        t = create_tournament_record(creator_id=self.users[0].id, tournament_type='standard',
+                                     tournament_name='Registry Cup', entry_fee=10.0, max_players=4)
+        for u in self.users:
+            add_tournament_participant(t.id, u.id, payment_status='completed', payment_method='wallet')
+        db.session.commit()
+        _build_bracket(t)
+        t.status = 'locked'
+        db.session.commit()
+        return t
+
+    def test_match_rooms_are_kept_in_the_room_registry(self):
+        t = self._locked_tournament()
+        match = TournamentMatch.query.filter_by(tournament_id=t.id, status='scheduled').first()
+        match, response, code = start_tournament_match_helper(t.id, match.id, user_id=match.player1_id)
+        self.assertEqual(code, 200)
+        room_code = response['room_code']
+        self.assertEqual(room_registry.get(room_code).status, 'in_progress')
+
+        # The opponent never shows: the roll resolves and closes the room
+        roll = MatchRoll(match_id=match.id, requested_by=match.player1_id,
+                         deadline=datetime.utcnow(), status='rolling')
+        db.session.add(roll)
+        db.session.commit()
+        _resolve_roll(roll)
+        self.assertIsNone(room_registry.get(room_code))
+        self.assertEqual(GameRoom.query.filter_by(room_code=room_code).one().status, 'abandoned')
+
+    def test_match_connection_state_comes_from_presence(self):
+        t = self._locked_tournament()
+        match = TournamentMatch.query.filter_by(tournament_id=t.id, status='scheduled').first()
+        match, response, code = start_tournament_match_helper(t.id, match.id, user_id=match.player1_id)
+        room = GameRoom.query.filter_by(room_code=response['room_code']).one()
+        # Stale columns say both are connected; only player 1 actually is
+        room.player1_connected = room.player2_connected = True
+        db.session.commit()
+        presence.connect(match.player1_id, 'sid-flow-1')
+        try:
+            payload = _serialize_match(match)
+            self.assertEqual((payload['player1_connected'], payload['player2_connected']), (True, False))
+
+            http = app.test_client()
+            player1 = User.query.get(match.player1_id).username
+            http.post('/api/auth/login', json={'username': player1, 'password': 'password123'})
+            # Player 2 has gone: player 1 may roll
+            rolled = http.post(f'/api/tournaments/{t.id}/matches/{match.id}/roll')
+            self.assertEqual(rolled.status_code, 200, rolled.get_json())
+        finally:
+            presence.disconnect(match.player1_id, 'sid-flow-1')
+        presence.clear_room(room.room_code)
+
     def test_full_tournament_match_flow(self):
         creator = self.users[0]
         # 1. Create a 4-player tournament
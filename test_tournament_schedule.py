@@ -222,12 +222,17 @@ class TestTournamentSchedulingAndRoll(unittest.TestCase):
             from database import GameRoom
             match, _resp, code = start_tournament_match_helper(tid, match_id, user_id=p1)
             self.assertEqual(code, 200)
-            room = GameRoom.query.get(match.game_room_id)
-            room.player2_connected = True
-            db.session.commit()
-
-        self._login(next(u for u in self.users if u.id == p1))
-        r = self.client.post(f'/api/tournaments/{tid}/matches/{match_id}/roll')
+            room_code = GameRoom.query.get(match.game_room_id).room_code
+
+        # The opponent has a live connection
+        from services.presence import presence
+        presence.connect(p2, 'sid-roll-p2')
+        try:
+            self._login(next(u for u in self.users if u.id == p1))
+            r = self.client.post(f'/api/tournaments/{tid}/matches/{match_id}/roll')
+        finally:
+            presence.disconnect(p2, 'sid-roll-p2')
+            presence.clear_room(room_code)
         self.assertEqual(r.status_code, 400)
         self.assertIn('online', r.get_json()['error'])
 
@@ -0,0 +1,243 @@
+"""
+Tests for the turn-deadline timer wheel (services/turn_timers.py) and how the
+multiplayer controller arms it.
+"""
+
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, Player, GameRoom, BetSession, Transaction
+from services.turn_timers import HierarchicalTimerWheel, turn_timers, _utc_timestamp
+from controllers.multiplayer_controller import (
+    AFK_GRACE_SECONDS,
+    GAME_START_COUNTDOWN_SECONDS,
+    _prepared_games,
+    arm_turn_timer,
+    reconcile_turn_timers,
+)
+
+
+class TestHierarchicalTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.fired = []
+        # Small wheel so the tests cross several levels quickly.
+        self.wheel = HierarchicalTimerWheel(tick_seconds=1, slots=4, levels=3, now=0)
+
+    def _fire(self, key):
+        self.fired.append(key)
+
+    def test_fires_at_deadline_not_before(self):
+        self.wheel.schedule('ROOM01', 3, self._fire)
+        self.wheel.advance(2)
+        self.assertEqual(self.fired, [])
+        self.wheel.advance(3)
+        self.assertEqual(self.fired, ['ROOM01'])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_far_deadlines_cascade_down_to_the_exact_tick(self):
+        # 4 slots x 3 levels covers 64 ticks; these land on levels 1 and 2.
+        deadlines = (('A', 5), ('B', 16), ('C', 17), ('D', 42), ('E', 63))
+        for key, when in deadlines:
+            self.wheel.schedule(key, when, self._fire)
+        for now in range(1, 64):
+            self.wheel.advance(now)
+            due = [k for k, w in deadlines if w <= now]
+            self.assertEqual(self.fired, due, f"at t={now}")
+
+    def test_deadline_beyond_wheel_range_is_parked_then_fired(self):
+        self.wheel.schedule('FAR', 200, self._fire)
+        self.wheel.advance(199)
+        self.assertEqual(self.fired, [])
+        self.wheel.advance(200)
+        self.assertEqual(self.fired, ['FAR'])
+
+    def test_rearm_replaces_previous_deadline(self):
+        self.wheel.schedule('ROOM01', 3, self._fire)
+        self.wheel.schedule('ROOM01', 10, self._fire)
+        self.wheel.advance(9)
+        self.assertEqual(self.fired, [])
+        self.wheel.advance(10)
+        self.assertEqual(self.fired, ['ROOM01'])
+
+    def test_cancel_disarms(self):
+        self.wheel.schedule('ROOM01', 3, self._fire)
+        self.assertTrue(self.wheel.cancel('ROOM01'))
+        self.assertFalse(self.wheel.cancel('ROOM01'))
+        self.wheel.advance(10)
+        self.assertEqual(self.fired, [])
+
+    def test_past_deadline_fires_on_next_tick(self):
+        self.wheel.advance(5)
+        self.wheel.schedule('LATE', 1, self._fire)
+        self.wheel.advance(6)
+        self.assertEqual(self.fired, ['LATE'])
+
+    def test_callback_error_does_not_stop_other_timers(self):
+        def boom(key):
+            raise RuntimeError('broken room')
+
+        self.wheel.schedule('BAD', 2, boom)
+        self.wheel.schedule('GOOD', 2, self._fire)
+        self.assertEqual(self.wheel.advance(2), 2)
+        self.assertEqual(self.fired, ['GOOD'])
+
+    def test_many_rooms_only_due_bucket_fires(self):
+        wheel = HierarchicalTimerWheel(tick_seconds=0.1, now=0)
+        for i in range(20000):
+            wheel.schedule(f'R{i}', 30 + (i % 600), self._fire)
+        self.assertEqual(wheel.advance(30), 20000 // 600 + 1)
+        self.assertEqual(len(wheel), 20000 - len(self.fired))
+
+
+class TestRoomTurnTimers(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.user = User(username='timer_p1', email='timer_p1@test.com')
+        self.user.set_password('password123')
+        db.session.add(self.user)
+        db.session.commit()
+        self.codes = []
+
+    def tearDown(self):
+        for code in self.codes:
+            turn_timers.cancel(code)
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _room(self, code, status='in_progress', deadline=None):
+        room = GameRoom(room_code=code, player1_id=self.user.id, status=status,
+                        turn_deadline=deadline)
+        db.session.add(room)
+        db.session.commit()
+        self.codes.append(code)
+        return room
+
+    def test_arm_uses_deadline_plus_grace_and_pause_cancels(self):
+        deadline = datetime.utcnow() + timedelta(seconds=300)
+        room = self._room('TIMER1', deadline=deadline)
+        arm_turn_timer(room)
+        self.assertAlmostEqual(turn_timers.wheel.deadline('TIMER1'),
+                               _utc_timestamp(deadline) + AFK_GRACE_SECONDS, delta=0.2)
+
+        room.status = 'paused'
+        arm_turn_timer(room)
+        self.assertFalse(turn_timers.is_armed('TIMER1'))
+
+    def test_reconcile_arms_only_untracked_in_progress_rooms(self):
+        deadline = datetime.utcnow() + timedelta(seconds=300)
+        tracked = self._room('TIMER2', deadline=deadline)
+        arm_turn_timer(tracked)
+        self._room('TIMER3', deadline=deadline)
+        self._room('TIMER4', status='completed', deadline=deadline)
+
+        self.assertEqual(reconcile_turn_timers(), 1)
+        self.assertTrue(turn_timers.is_armed('TIMER3'))
+        self.assertFalse(turn_timers.is_armed('TIMER4'))
+
+
+class TestScheduledGameStart(unittest.TestCase):
+    """The join countdown is a wheel timer, with the engine dealt up front."""
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.clients = []
+        for name in ('countdown_p1', 'countdown_p2'):
+            user = User(username=name, email=f'{name}@test.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, fake_balance=1000.0,
+                                  fake_balance_expires_at=datetime.utcnow() + timedelta(hours=1)))
+            http = app.test_client()
+            http.post('/api/auth/login', json={'username': name, 'password': 'password123'})
+            self.clients.append(http)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _socket(self, http):
+        return socketio.test_client(app, flask_test_client=http)
+
+    def test_join_deals_engine_and_starts_on_timer(self):
+        creator = self._socket(self.clients[0])
+        creator.emit('create_room', {'card_count': 6, 'bet_amount': 0, 'bet_type': 'fake'})
+        created = [m for m in creator.get_received() if m['name'] == 'room_created']
+        room_code = created[0]['args'][0]['room']['room_code']
+
+        joiner = self._socket(self.clients[1])
+        joined_at = time.time()
+        joiner.emit('join_room', {'room_code': room_code})
+
+        # The handler returned straight away with the engine already dealt.
+        self.assertLess(time.time() - joined_at, GAME_START_COUNTDOWN_SECONDS)
+        prepared = _prepared_games.get(room_code)
+        self.assertIsNotNone(prepared)
+        self.assertTrue(turn_timers.is_armed(f'start:{room_code}'))
+
+        room = None
+        for _ in range(100):
+            db.session.expire_all()
+            room = GameRoom.query.filter_by(room_code=room_code).first()
+            if room.status == 'in_progress':
+                break
+            time.sleep(0.1)
+        self.assertEqual(room.status, 'in_progress')
+        self.assertEqual(room.game_id, prepared)
+        self.assertGreaterEqual(time.time() - joined_at, GAME_START_COUNTDOWN_SECONDS - 0.2)
+        self.assertNotIn(room_code, _prepared_games)
+        turn_timers.cancel(room_code)
+        creator.disconnect()
+        joiner.disconnect()
+
+    def test_start_is_aborted_when_a_stake_cannot_be_taken(self):
+        creator = self._socket(self.clients[0])
+        creator.emit('create_room', {'card_count': 6, 'bet_amount': 100, 'bet_type': 'fake'})
+        created = [m for m in creator.get_received() if m['name'] == 'room_created']
+        room_code = created[0]['args'][0]['room']['room_code']
+
+        joiner = self._socket(self.clients[1])
+        joiner.emit('join_room', {'room_code': room_code})
+        # The joiner spends their balance elsewhere during the countdown
+        joiner_id = GameRoom.query.filter_by(room_code=room_code).first().player2_id
+        Player.query.filter_by(user_id=joiner_id).update({'fake_balance': 50.0})
+        db.session.commit()
+
+        errors = []
+        for _ in range(100):
+            errors += [m for m in joiner.get_received() if m['name'] == 'error']
+            if errors:
+                break
+            time.sleep(0.1)
+        self.assertEqual(errors[0]['args'][0]['room_status'], 'waiting')
+
+        db.session.expire_all()
+        room = GameRoom.query.filter_by(room_code=room_code).first()
+        self.assertEqual((room.status, room.player2_id), ('waiting', None))
+        self.assertEqual(BetSession.query.count(), 0)
+        self.assertEqual(Transaction.query.count(), 0)
+        balances = sorted(p.fake_balance for p in Player.query.all())
+        self.assertEqual(balances, [50.0, 1000.0])
+        self.assertIn('error', [m['name'] for m in creator.get_received()])
+        creator.disconnect()
+        joiner.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
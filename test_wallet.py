@@ -0,0 +1,135 @@
+"""
+Tests for the atomic wallet service (services/wallet.py).
+"""
+
+import os
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app
+from database import db, User, Player, Transaction, TX_BET, TX_WIN, TX_PRIZE_AWARD
+from services.wallet import wallet
+
+
+class TestWallet(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.players = []
+        for name in ('wallet_a', 'wallet_b'):
+            user = User(username=name, email=f'{name}@test.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            player = Player(user_id=user.id, real_balance=100.0, fake_balance=20.0,
+                            fake_balance_expires_at=datetime.utcnow() + timedelta(hours=1),
+                            total_games=0, wins=0, losses=0, total_wagered=0.0, total_winnings=0.0)
+            db.session.add(player)
+            self.players.append(player)
+        db.session.commit()
+        self.a, self.b = self.players
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def _ledger(self, player):
+        return Transaction.query.filter_by(player_id=player.id).order_by(Transaction.id).all()
+
+    def test_debit_only_when_covered(self):
+        self.assertEqual(wallet.debit(self.a.id, 30.0, 'real', session_id=None, game_id='g1'), 70.0)
+        self.assertIsNone(wallet.debit(self.a.id, 70.5, 'real'))
+        db.session.commit()
+
+        self.assertEqual(self.a.real_balance, 70.0)
+        self.assertEqual(self.a.total_wagered, 30.0)
+        [tx] = self._ledger(self.a)
+        self.assertEqual((tx.transaction_type, tx.amount, tx.balance_before, tx.balance_after, tx.game_id),
+                         (TX_BET, 30.0, 100.0, 70.0, 'g1'))
+
+    def test_expired_free_cash_cannot_be_wagered(self):
+        self.a.fake_balance_expires_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+        self.assertFalse(self.a.deduct_bet(5.0, 'fake'))
+        self.assertTrue(self.b.deduct_bet(5.0, 'fake'))
+        self.assertEqual(self.b.fake_balance, 15.0)
+
+    def test_stale_object_does_not_overwrite_balance(self):
+        stale = db.session.get(Player, self.a.id)
+
+        def spend_elsewhere():
+            with app.app_context():
+                wallet.debit(self.a.id, 40.0, 'real')
+                db.session.commit()
+
+        worker = threading.Thread(target=spend_elsewhere)
+        worker.start()
+        worker.join()
+
+        # The in-memory copy still says 100; the UPDATE works from the row.
+        stale.award_winnings(10.0, 'real')
+        self.assertEqual(stale.real_balance, 70.0)
+        self.assertEqual(self._ledger(self.a)[-1].balance_before, 60.0)
+
+    def test_concurrent_debits_lose_no_updates(self):
+        player_id = self.a.id
+        outcomes = []
+
+        def bet():
+            with app.app_context():
+                for _ in range(5):
+                    balance = wallet.debit(player_id, 3.0, 'real')
+                    db.session.commit()
+                    outcomes.append(balance is not None)
+
+        workers = [threading.Thread(target=bet) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        db.session.expire_all()
+        taken = sum(outcomes)
+        self.assertEqual(taken, 33)  # 100 // 3: every successful debit is accounted for
+        self.assertAlmostEqual(db.session.get(Player, player_id).real_balance, 100.0 - 3.0 * taken)
+        self.assertEqual(len(self._ledger(self.a)), taken)
+
+    def test_settle_credits_and_results_in_one_transaction(self):
+        balances = wallet.settle(
+            credits=[{'player_id': self.a.id, 'amount': 50.0, 'balance_type': 'real',
+                      'transaction_type': TX_PRIZE_AWARD, 'tournament_id': None}],
+            results={self.a.id: True, self.b.id: False},
+        )
+        self.assertEqual(balances, {self.a.id: 150.0})
+        db.session.rollback()
+
+        # Rolled back together: nothing was half-applied
+        db.session.expire_all()
+        self.assertEqual(self.a.real_balance, 100.0)
+        self.assertEqual(self.a.total_games, 0)
+        self.assertEqual(self._ledger(self.a), [])
+
+        wallet.settle(
+            credits=[{'player_id': self.a.id, 'amount': 50.0, 'balance_type': 'real'}],
+            results={self.a.id: True, self.b.id: False},
+        )
+        db.session.commit()
+        self.assertEqual((self.a.real_balance, self.a.total_winnings, self.a.wins), (150.0, 50.0, 1))
+        self.assertEqual((self.b.total_games, self.b.losses), (1, 1))
+        self.assertEqual(self._ledger(self.a)[0].transaction_type, TX_WIN)
+
+    def test_negative_amounts_are_rejected(self):
+        with self.assertRaises(ValueError):
+            wallet.credit(self.a.id, -1.0, 'real')
+        with self.assertRaises(ValueError):
+            wallet.debit(self.a.id, 1.0, 'bonus')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Tests for the compact wire encoding (services/wire_codec.py) and its
+per-connection negotiation.
+"""
+
+import os
+import re
+import time
+import unittest
+from datetime import datetime, timedelta
+
+os.environ['ENV'] = 'development'
+
+from app import app, socketio
+from database import db, User, Player
+from services import wire_codec
+
+
+UPDATE = {
+    'game_state': {
+        'phase': 'DEFENSE', 'attacker': 0, 'defender': 1,
+        'attack_card': '10♥', 'attack_card_value': 10,
+        'game_over': False, 'winner': None, 'ui_log': [],
+        'attack_pile': ['10♥'],
+        'players': [{'hand': ['A♠', 'Q♦', '7♣']}, {'hand_count': 5}],
+    },
+    'player_index': 0, 'actor_index': 0, 'is_my_turn': False,
+    'action': 'attack', 'result': None,
+    'turn_deadline': '2026-01-01T00:00:00', 'bet_total': 200,
+}
+
+
+def _card(value):
+    if isinstance(value, int):
+        return wire_codec.CARDS[value]
+    if isinstance(value, list):
+        return [_card(v) for v in value]
+    return value
+
+
+def expand(value):
+    """What static/js/wire-codec.js does on the client."""
+    long_keys = {short: key for key, short in wire_codec.KEYS.items()}
+    if isinstance(value, dict):
+        out = {}
+        for key, item in value.items():
+            key = long_keys.get(key, key)
+            if key in wire_codec.CARD_KEYS:
+                item = _card(item)
+            else:
+                item = expand(item)
+            out[key] = item
+        return out
+    if isinstance(value, list):
+        return [expand(v) for v in value]
+    return value
+
+
+class TestCompactEncoding(unittest.TestCase):
+    def test_cards_become_integers_and_keys_shrink(self):
+        body = wire_codec.compact(UPDATE)
+        state = body['s']
+        self.assertEqual(state['ac'], wire_codec.CARDS.index('10♥'))
+        self.assertEqual(state['pl'][0]['h'], [wire_codec.CARDS.index(c) for c in ('A♠', 'Q♦', '7♣')])
+        self.assertEqual(state['pl'][1]['hc'], 5)
+        self.assertLess(wire_codec.json_size(body), wire_codec.json_size(UPDATE) * 0.75)
+
+    def test_round_trip_restores_the_verbose_payload(self):
+        self.assertEqual(expand(wire_codec.compact(UPDATE)), UPDATE)
+
+    def test_card_table_covers_the_deck(self):
+        self.assertEqual(len(set(wire_codec.CARDS)), 52)
+        self.assertIn('10♠', wire_codec.CARDS)
+
+
+class TestEncodedEvents(unittest.TestCase):
+    def test_only_listed_events_are_encoded(self):
+        self.assertEqual(wire_codec.tables()['events'], list(wire_codec.ENCODED_EVENTS))
+        with self.assertRaises(ValueError):
+            wire_codec.emit_encoded(socketio, 'room_created', {}, 'lobby')
+
+    def test_pages_listen_for_encoded_events_through_the_codec(self):
+        # A plain socket.on('<event>') never fires for a compact client.
+        root = os.path.dirname(os.path.abspath(__file__))
+        pattern = re.compile(r"\.on\(\s*['\"](%s)['\"]" % '|'.join(wire_codec.ENCODED_EVENTS))
+        offenders = []
+        for folder, suffix in (('static/js', '.js'), ('templates', '.html')):
+            for name in sorted(os.listdir(os.path.join(root, folder))):
+                if not name.endswith(suffix) or name == 'wire-codec.js':
+                    continue
+                with open(os.path.join(root, folder, name), encoding='utf-8') as handle:
+                    for lineno, line in enumerate(handle, 1):
+                        if pattern.search(line):
+                            offenders.append(f"{folder}/{name}:{lineno}")
+        self.assertEqual(offenders, [])
+
+
+class TestNegotiation(unittest.TestCase):
+    def setUp(self):
+        app.config['TESTING'] = True
+        self.app_context = app.app_context()
+        self.app_context.push()
+        db.drop_all()
+        db.create_all()
+        self.clients = []
+        for name in ('wire_p1', 'wire_p2'):
+            user = User(username=name, email=f'{name}@test.com')
+            user.set_password('password123')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Player(user_id=user.id, fake_balance=1000.0,
+                                  fake_balance_expires_at=datetime.utcnow() + timedelta(hours=1)))
+            http = app.test_client()
+            http.post('/api/auth/login', json={'username': name, 'password': 'password123'})
+            self.clients.append(http)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_each_client_gets_its_own_encoding(self):
+        compact_client = socketio.test_client(app, flask_test_client=self.clients[0])
+        compact_client.emit('set_encoding', {'encoding': 'compact'})
+        ack = [m for m in compact_client.get_received() if m['name'] == 'encoding_set'][0]['args'][0]
+        self.assertEqual(ack['keys'], wire_codec.KEYS)
+        self.assertEqual(ack['format'], wire_codec.packet_format())
+
+        json_client = socketio.test_client(app, flask_test_client=self.clients[1])
+        compact_client.emit('create_room', {'card_count': 6, 'bet_amount': 0, 'bet_type': 'fake'})
+        room_code = [m for m in compact_client.get_received()
+                     if m['name'] == 'room_created'][0]['args'][0]['room']['room_code']
+        json_client.emit('join_room', {'room_code': room_code})
+
+        compact_started, json_started = [], []
+        for _ in range(60):
+            compact_started += [m for m in compact_client.get_received() if m['name'].endswith('game_started')]
+            json_started += [m for m in json_client.get_received() if m['name'].endswith('game_started')]
+            if compact_started and json_started:
+                break
+            time.sleep(0.1)
+
+        self.assertEqual([m['name'] for m in compact_started], ['c:game_started'])
+        self.assertEqual([m['name'] for m in json_started], ['game_started'])
+        payload = compact_started[0]['args'][0]
+        if wire_codec.packet_format() == 'json':
+            hand = payload['gs']['pl'][0]['h']
+            self.assertTrue(all(isinstance(card, int) for card in hand))
+            self.assertEqual(expand(payload)['room_code'], room_code)
+        compact_client.disconnect()
+        json_client.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+"""Move finished games older than the cutoff into cold storage.
+
+The background scheduler does this hourly in small batches; run it by hand
+to drain a backlog or to archive with a different cutoff:
+
+    python tools/archive_games.py             # GAME_ARCHIVE_AFTER_DAYS (30)
+    python tools/archive_games.py --days 7
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Running this file directly makes Python search ``tools/`` first. Add the
+# project root explicitly so the application package resolves consistently.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import app
+from services.game_archive import game_archive
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive finished games to compressed daily files.')
+    parser.add_argument('--days', type=int, default=None,
+                        help='archive games finished more than this many days ago')
+    args = parser.parse_args()
+
+    with app.app_context():
+        cutoff = datetime.utcnow() - timedelta(days=args.days) if args.days is not None else None
+        count = game_archive.archive(cutoff=cutoff)
+        print(f'Archived {count} game(s) to {game_archive.directory}')
+
+
+if __name__ == '__main__':
+    main()
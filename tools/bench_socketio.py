@@ -0,0 +1,205 @@
+"""Load-test the Socket.IO server under each async runtime.
+
+For every mode given on the command line this starts the app in a child
+process (``SOCKETIO_ASYNC_MODE=<mode>``, no message queue, one worker), opens
+``--clients`` guest connections, then has every client round-trip
+``get_lobby`` -> ``lobby_data`` ``--actions`` times. It reports per worker:
+
+  - connections established / failed and how long connecting took
+  - actions per second across all clients, with p50 / p95 latency
+
+    python tools/bench_socketio.py --modes threading,gevent --clients 200
+
+Needs the Socket.IO client extras locally (``pip install "python-socketio[client]"``).
+Results are also appended to ``bench_output.txt`` in the project root.
+"""
+
+import argparse
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Running this file directly makes Python search ``tools/`` first. Add the
+# project root explicitly so the application package resolves consistently.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import socketio
+
+SERVER_SNIPPET = (
+    "from app import app, socketio\n"
+    "socketio.run(app, host='127.0.0.1', port={port}, allow_unsafe_werkzeug=True)\n"
+)
+
+
+def start_server(mode, port):
+    # app.py silently falls back to threading when a runtime is missing, which
+    # would mislabel the results.
+    if mode != 'threading' and importlib.util.find_spec(mode) is None:
+        raise RuntimeError(f'{mode} is not installed')
+    env = dict(os.environ)
+    env.update({
+        'SOCKETIO_ASYNC_MODE': mode,
+        'SOCKETIO_MESSAGE_QUEUE': 'none',
+        'SOCKETIO_LOGGER': 'false',
+    })
+    # ENV=development would pin threading mode's dev defaults; the mode above wins anyway.
+    env.pop('ENV', None)
+    proc = subprocess.Popen(
+        [sys.executable, '-c', SERVER_SNIPPET.format(port=port)],
+        cwd=str(PROJECT_ROOT), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'server for mode {mode!r} exited with code {proc.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f'server for mode {mode!r} did not start listening on port {port}')
+
+
+class BenchClient:
+    """One guest connection that round-trips get_lobby."""
+
+    def __init__(self, url, transports):
+        self.url = url
+        self.transports = transports
+        self.sio = socketio.Client(reconnection=False)
+        self._reply = threading.Event()
+        self.latencies = []
+        self.errors = 0
+        self.sio.on('lobby_data', lambda data: self._reply.set())
+
+    def connect(self):
+        self.sio.connect(self.url, transports=self.transports, wait_timeout=10)
+
+    def run_actions(self, count, timeout):
+        for _ in range(count):
+            self._reply.clear()
+            started = time.perf_counter()
+            self.sio.emit('get_lobby')
+            if self._reply.wait(timeout):
+                self.latencies.append(time.perf_counter() - started)
+            else:
+                self.errors += 1
+
+    def close(self):
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+
+
+def _run_all(clients, target, *args):
+    threads = [threading.Thread(target=target, args=(c,) + args, daemon=True) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def bench_mode(mode, port, n_clients, n_actions, transports, timeout):
+    proc = start_server(mode, port)
+    url = f'http://127.0.0.1:{port}'
+    clients = [BenchClient(url, transports) for _ in range(n_clients)]
+    connected, failed = [], []
+
+    def _connect(client):
+        try:
+            client.connect()
+            connected.append(client)
+        except Exception:
+            failed.append(client)
+
+    try:
+        started = time.perf_counter()
+        _run_all(clients, _connect)
+        connect_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        _run_all(connected, BenchClient.run_actions, n_actions, timeout)
+        action_seconds = time.perf_counter() - started
+    finally:
+        for client in connected:
+            client.close()
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    latencies = sorted(l for c in connected for l in c.latencies)
+    done = len(latencies)
+    return {
+        'mode': mode,
+        'connected': len(connected),
+        'failed': len(failed),
+        'connect_s': connect_seconds,
+        'actions': done,
+        'timeouts': sum(c.errors for c in connected),
+        'actions_per_s': done / action_seconds if action_seconds else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p95_ms': latencies[int(done * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def format_results(results, args):
+    lines = [
+        f"Socket.IO benchmark: {args.clients} clients x {args.actions} get_lobby round trips "
+        f"({'/'.join(args.transports)}), one worker per mode",
+        f"{'mode':<10} {'conn':>6} {'fail':>5} {'conn_s':>7} {'actions/s':>10} "
+        f"{'p50_ms':>8} {'p95_ms':>8} {'timeouts':>9}",
+    ]
+    for r in results:
+        if 'error' in r:
+            lines.append(f"{r['mode']:<10} ERROR: {r['error']}")
+            continue
+        lines.append(
+            f"{r['mode']:<10} {r['connected']:>6} {r['failed']:>5} {r['connect_s']:>7.2f} "
+            f"{r['actions_per_s']:>10.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['timeouts']:>9}"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare Socket.IO async runtimes under load.')
+    parser.add_argument('--modes', default='threading,gevent',
+                        help='comma separated SOCKETIO_ASYNC_MODE values')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--actions', type=int, default=20, help='round trips per client')
+    parser.add_argument('--port', type=int, default=5100, help='first port (one per mode)')
+    parser.add_argument('--transports', default='polling',
+                        help="client transports, e.g. 'polling' or 'websocket'")
+    parser.add_argument('--timeout', type=float, default=10.0, help='seconds to wait per reply')
+    args = parser.parse_args()
+    args.transports = [t.strip() for t in args.transports.split(',') if t.strip()]
+
+    results = []
+    for offset, mode in enumerate(m.strip() for m in args.modes.split(',') if m.strip()):
+        print(f'[BENCH] {mode}: {args.clients} clients ...')
+        try:
+            results.append(bench_mode(mode, args.port + offset, args.clients, args.actions,
+                                      args.transports, args.timeout))
+        except Exception as exc:
+            results.append({'mode': mode, 'error': str(exc)})
+
+    report = format_results(results, args)
+    print('\n' + report)
+    with open(PROJECT_ROOT / 'bench_output.txt', 'a') as fh:
+        fh.write(time.strftime('%Y-%m-%d %H:%M:%S') + '\n' + report + '\n\n')
+
+
+if __name__ == '__main__':
+    main()
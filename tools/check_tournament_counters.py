@@ -0,0 +1,40 @@
+"""Verify the denormalized tournament participant counters.
+
+Recounts registered players and lock votes from tournament_participants and
+lists every tournament whose stored counters differ. The background
+scheduler repairs running tournaments hourly; run this by hand after editing
+participant rows directly:
+
+    python tools/check_tournament_counters.py           # report only
+    python tools/check_tournament_counters.py --repair  # and fix them
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Running this file directly makes Python search ``tools/`` first. Add the
+# project root explicitly so the application package resolves consistently.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import app
+from services.tournament_counters import tournament_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check tournament participant counters against a recount.')
+    parser.add_argument('--repair', action='store_true', help='reset drifted counters to the recount')
+    args = parser.parse_args()
+
+    with app.app_context():
+        drift = tournament_counters.check(repair=args.repair)
+        for row in drift:
+            print(f"tournament {row['tournament_id']}: stored {row['stored']} actual {row['actual']}"
+                  f"{' -> repaired' if row['repaired'] else ''}")
+        print(f'{len(drift)} tournament(s) out of step')
+
+
+if __name__ == '__main__':
+    main()
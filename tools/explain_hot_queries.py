@@ -0,0 +1,181 @@
+"""EXPLAIN the hot queries and fail if any of them scans a whole table.
+
+Every query the lobby, the socket handlers and the schedulers run on a hot
+path is registered in ``HOT_QUERIES`` below (same filters as the code that
+issues it, with placeholder values). The tool asks the database for each
+plan and exits non-zero when a step is a full table scan, so a dropped index
+or a new unindexed filter shows up before it reaches production:
+
+    python tools/explain_hot_queries.py            # summary, exit 1 on scans
+    python tools/explain_hot_queries.py --verbose  # print every plan
+
+SQLite (``EXPLAIN QUERY PLAN``: ``SCAN <table>`` without an index) and
+PostgreSQL (``EXPLAIN``: ``Seq Scan``) are understood. The indexes themselves
+ship in ``migrations/003_hot_query_indexes.sql``.
+"""
+
+import argparse
+import re
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Running this file directly makes Python search ``tools/`` first. Add the
+# project root explicitly so the application package resolves consistently.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from sqlalchemy import or_, select
+
+from database import (
+    db, BalanceCheckpoint, GameRoom, MatchRoll, Transaction, TournamentMatch, TournamentParticipant,
+)
+
+
+def _lobby_waiting_rooms():
+    # controllers/multiplayer_controller.py: _load_lobby_rooms
+    return (select(GameRoom)
+            .where(GameRoom.status == 'waiting',
+                   GameRoom.created_at >= datetime.utcnow() - timedelta(hours=5))
+            .order_by(GameRoom.created_at.desc())
+            .limit(200))
+
+
+def _rooms_to_mark_offline():
+    # controllers/multiplayer_controller.py: _persist_offline
+    return select(GameRoom).where(
+        or_(GameRoom.player1_id == 1, GameRoom.player2_id == 1),
+        GameRoom.status.in_(['in_progress', 'paused']),
+    )
+
+
+def _turn_timer_reconcile():
+    # controllers/multiplayer_controller.py: reconcile_turn_timers
+    return select(GameRoom.room_code, GameRoom.turn_deadline).where(
+        GameRoom.status == 'in_progress',
+        GameRoom.turn_deadline.isnot(None),
+    )
+
+
+def _room_by_code():
+    # services/room_registry.py: lookup (registry miss)
+    return select(GameRoom).where(GameRoom.room_code == 'ABC123')
+
+
+def _my_next_match():
+    # controllers/tournament_controller.py: my_next_match
+    return select(TournamentMatch).where(
+        or_(TournamentMatch.player1_id == 1, TournamentMatch.player2_id == 1),
+        TournamentMatch.status.in_(['scheduled', 'pending', 'in_progress']),
+    )
+
+
+def _active_match_roll():
+    # controllers/tournament_controller.py: roll_match / _start_match_roll
+    return select(MatchRoll).where(MatchRoll.match_id == 1, MatchRoll.status == 'rolling')
+
+
+def _expired_match_rolls():
+    # controllers/tournament_controller.py: scheduler roll deadlines
+    return select(MatchRoll).where(MatchRoll.status == 'rolling',
+                                   MatchRoll.deadline <= datetime.utcnow())
+
+
+def _participant_lookup():
+    # controllers/tournament_controller.py: join / result progression
+    return select(TournamentParticipant).where(TournamentParticipant.tournament_id == 1,
+                                               TournamentParticipant.user_id == 1)
+
+
+def _ledger_page():
+    # services/ledger.py: LedgerService.page (keyset, after the first page)
+    return (select(Transaction)
+            .where(Transaction.player_id == 1,
+                   or_(Transaction.created_at < datetime.utcnow(),
+                       (Transaction.created_at == datetime.utcnow()) & (Transaction.id < 100)))
+            .order_by(Transaction.created_at.desc(), Transaction.id.desc())
+            .limit(51))
+
+
+def _latest_balance_checkpoint():
+    # services/ledger.py: LedgerService.balance_at
+    return (select(BalanceCheckpoint)
+            .where(BalanceCheckpoint.player_id == 1,
+                   BalanceCheckpoint.taken_at <= datetime.utcnow())
+            .order_by(BalanceCheckpoint.taken_at.desc(), BalanceCheckpoint.id.desc())
+            .limit(1))
+
+
+HOT_QUERIES = {
+    'lobby_waiting_rooms': _lobby_waiting_rooms,
+    'rooms_to_mark_offline': _rooms_to_mark_offline,
+    'turn_timer_reconcile': _turn_timer_reconcile,
+    'room_by_code': _room_by_code,
+    'my_next_match': _my_next_match,
+    'active_match_roll': _active_match_roll,
+    'expired_match_rolls': _expired_match_rolls,
+    'participant_lookup': _participant_lookup,
+    'ledger_page': _ledger_page,
+    'latest_balance_checkpoint': _latest_balance_checkpoint,
+}
+
+# SQLite: "SCAN game_rooms" is a full scan; "SCAN game_rooms USING INDEX ..."
+# walks an index and "SEARCH ..." seeks one.
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)(\S+)(?: AS \S+)?$')
+
+
+def explain(statement):
+    """The database's plan for ``statement``, one line per step."""
+    engine = db.engine
+    compiled = statement.compile(dialect=engine.dialect,
+                                 compile_kwargs={'render_postcompile': True})
+    with engine.connect() as connection:
+        if engine.name == 'sqlite':
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)
+            return [row[-1] for row in rows]
+        rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params)
+        return [row[0] for row in rows]
+
+
+def full_scans(plan, dialect_name):
+    """Steps of ``plan`` that read a whole table."""
+    if dialect_name == 'sqlite':
+        return [step for step in plan if _SQLITE_FULL_SCAN.match(step.strip())]
+    return [step for step in plan if 'Seq Scan' in step]
+
+
+def audit(queries=None):
+    """Explain every registered query. Returns ``{name: (plan, full_scans)}``."""
+    results = {}
+    for name, build in (queries or HOT_QUERIES).items():
+        plan = explain(build())
+        results[name] = (plan, full_scans(plan, db.engine.name))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN the hot queries; fail on full table scans.')
+    parser.add_argument('--verbose', action='store_true', help='print every query plan')
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        results = audit()
+
+    failures = 0
+    for name, (plan, scans) in results.items():
+        print(f"{'FULL SCAN' if scans else 'ok':>9}  {name}")
+        if args.verbose or scans:
+            for step in plan:
+                print(f"           {step}")
+        failures += bool(scans)
+
+    print(f"\n{len(results) - failures}/{len(results)} hot queries use an index")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
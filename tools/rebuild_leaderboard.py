@@ -0,0 +1,29 @@
+"""Rebuild the maintained leaderboard from the ``players`` table.
+
+Run after migrations/005_maintained_leaderboard.sql (backfill), or any time
+the ``leaderboard`` table or the Redis sorted set looks out of sync:
+
+    python tools/rebuild_leaderboard.py
+"""
+
+import sys
+from pathlib import Path
+
+# Running this file directly makes Python search ``tools/`` first. Add the
+# project root explicitly so the application package resolves consistently.
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app import app
+from services.leaderboard import leaderboard
+
+
+def main():
+    with app.app_context():
+        count = leaderboard.rebuild()
+    print(f'Leaderboard rebuilt: {count} qualifying player(s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -22,11 +22,14 @@ from flask import (
 
 from controllers.auth_controller import login_required
 from database import User, db, get_player_by_user_id
+from services.ledger import parse_statement_range
 from user.forms import ProfileForm, KYCDocumentForm, IDPhotoForm
 from user.service import (
     get_account_json,
     initiate_topup,
     recent_transactions,
+    transaction_history,
+    balance_statement,
     store_id_photos,
     store_kyc_document,
     update_profile_fields,
@@ -145,6 +148,36 @@ def account_api():
     return jsonify({'account': get_account_json(user)})
 
 
+@user_bp.route('/transactions', methods=['GET'])
+@login_required
+def transactions_api():
+    """Keyset-paged wallet history: pass ``next_cursor`` back as ``?cursor=``."""
+    user = _current_user()
+    try:
+        return jsonify(transaction_history(
+            user,
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', 50, type=int),
+        ))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+
+@user_bp.route('/statement', methods=['GET'])
+@login_required
+def statement_api():
+    """Balance statement for ``?start=&end=`` (ISO timestamps)."""
+    user = _current_user()
+    try:
+        start, end = parse_statement_range(request.args)
+        statement = balance_statement(user, start, end, request.args.get('balance_type', 'real'))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    if statement is None:
+        return jsonify({'error': 'Player profile not found'}), 404
+    return jsonify(statement)
+
+
 @user_bp.route('/topup', methods=['POST'])
 @login_required
 def wallet_topup():
@@ -16,6 +16,7 @@ from database import (
     get_player_by_user_id,
     log_transaction,
 )
+from services.ledger import ledger
 
 
 KYC_NOT_SUBMITTED = 'not_submitted'
@@ -118,8 +119,25 @@ def recent_transactions(user, limit=10):
     player = get_player_by_user_id(user.id)
     if not player:
         return []
-    return Transaction.query.filter_by(player_id=player.id)\
-        .order_by(Transaction.id.desc()).limit(limit).all()
+    transactions, _ = ledger.page(player.id, limit=limit)
+    return transactions
+
+
+def transaction_history(user, cursor=None, limit=50):
+    """One page of the user's ledger, newest first (``cursor`` from the previous page)."""
+    player = get_player_by_user_id(user.id)
+    if not player:
+        return {'transactions': [], 'next_cursor': None}
+    transactions, next_cursor = ledger.page(player.id, limit=limit, cursor=cursor)
+    return {'transactions': [tx.to_dict() for tx in transactions], 'next_cursor': next_cursor}
+
+
+def balance_statement(user, start, end, balance_type='real'):
+    """Opening/closing balance and ledger rows for ``[start, end]``."""
+    player = get_player_by_user_id(user.id)
+    if not player:
+        return None
+    return ledger.statement(player.id, start, end, balance_type)
 
 
 def initiate_topup(user, amount):